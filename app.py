@@ -1,38 +1,55 @@
 # app.py
+#
+# Streamlit re-runs this whole script on every interaction. Keep the top level
+# cheap: heavy libraries (pandas, openai, textstat, scikit-learn) are imported
+# by the stage that needs them, and file-backed resources come from the
+# process-wide accessors in resources.py.
 
+import hashlib
 import os
-import sqlite3
+import time
+import uuid
 import streamlit as st
-from collections import Counter
-import textstat, requests, re, openai, json
-from bs4 import BeautifulSoup
-from sklearn.feature_extraction.text import TfidfVectorizer
 import streamlit.components.v1 as components
 import markdown as md
-import pandas as pd
 
-import json
-
-with open("technical_links.json") as f:
-    keyword_map = json.load(f)
-
-sorted_keywords = sorted(keyword_map.keys(), key=len, reverse=True)
-
-from company_config import (
-    openai_api_key,
-    google_api_key,
-    google_cx,
+from jobs import QueueFull, get_job_queue
+from pipeline import (
+    LONG_BLOG_STAGES,
+    ShortPost,
+    build_short_prompt,
+    generate_short_post,
+    generate_short_posts,
+    long_blog_job,
+    scrape_articles,
 )
+from search import get_search_cache, search
+from urlnorm import dedupe_urls
+from summarize import DIRECT_TOKENS, count_tokens, prepare_article
+from scraper import (
+    MIN_ARTICLE_CHARS,
+    extract_page,
+    fetch_page,
+    remember_extraction,
+)
+from page_cache import get_page_cache
+from llm_cache import CACHE_ENABLED_BY_DEFAULT, get_llm_cache
+from link_health import prewarm_pool
+from metrics import host_summary, span, stage_summary, start_metrics_server, trace
+from rate_limit import get_rate_limiter
+from research_store import bundle_key, get_research_store
+from resources import get_context_manager
 from context_manager import (
-    ContextManager,
     get_workspace_key,
     render_context_selector,
     render_context_editor,
 )
 
-openai.api_key = openai_api_key
+# Check every curated link in the background so verification is a cache lookup (again after edits)
+prewarm_pool()
 
-STOPWORDS = set("the and that with this from have which will would there their what when where while about these those been because could into upon some other than then they them were such only also very many more most over your ours ourselves hers herself his himself yourself yourselves does did had has was are not for but you its our can may might shall should must been who whom how why each few both same once".split())
+# Prometheus /metrics endpoint when BLOGBUDDY_METRICS_PORT is set (once per process)
+start_metrics_server()
 
 # -------------------- FONT STYLING --------------------
 st.markdown("""
@@ -42,192 +59,41 @@ html, body, [class*="css"] { font-family: 'Be Vietnam Pro', sans-serif !importan
 </style>
 """, unsafe_allow_html=True)
 
-# -------------------- HELPERS --------------------
-def call_openai(prompt):
-    res = openai.ChatCompletion.create(
-        model="gpt-4-turbo",
-        messages=[
-            {"role": "system", "content": "You are a concise, insightful summarizer and formatter."},
-            {"role": "user", "content": prompt}
-        ],
-        temperature=0.7
-    )
-    return res.choices[0].message.content.strip()
-
 # -------------------- HELPERS --------------------
 
-def extract_section_from_template(section_header, filepath="blog_prompt_template.txt"):
-    """
-    Reads the template file and returns all lines after `section_header`
-    up to the next line starting with '###' (or EOF).
+def render_stream(deltas, placeholder, min_interval=0.05):
     """
-    tpl = load_prompt_template(filepath)
-    lines = tpl.splitlines()
-    collecting = False
-    section_lines = []
-    for line in lines:
-        if collecting:
-            if line.startswith("###") and line.strip() != section_header:
-                break
-            section_lines.append(line)
-        elif line.strip() == section_header:
-            collecting = True
-    return "\n".join(section_lines).strip()
-
-import re
-
-def hyperlink_keywords(text: str, mapping: dict) -> str:
+    Render streamed tokens into ``placeholder`` as they arrive. Returns the
+    final markdown. (Long blogs are keyword-linked paragraph by paragraph in
+    their job; see pipeline.long_blog_job.)
     """
-    Wrap any occurrence of each keyword in text with a markdown link
-    to the first URL in its list.
-    """
-    for kw in sorted_keywords:
-        url = mapping[kw][0]  # or pick random.choice(mapping[kw])
-        # \b for word boundaries, re.IGNORECASE for case-insensitive
-        pattern = re.compile(rf"\b{re.escape(kw)}\b", flags=re.IGNORECASE)
-        text = pattern.sub(lambda m: f"[{m.group(0)}]({url})", text)
-    return text
+    parts, last_draw = [], 0.0
+    for delta in deltas:
+        parts.append(delta)
+        now = time.monotonic()
+        if now - last_draw >= min_interval:
+            placeholder.markdown("".join(parts) + "▌", unsafe_allow_html=True)
+            last_draw = now
+    final = "".join(parts).strip()
+    placeholder.markdown(final, unsafe_allow_html=True)
+    return final
 
 def markdown_to_html(markdown_text):
     return md.markdown(markdown_text)
 
-def google_search_urls(query, num=5):
-    try:
-        params = {"q": query, "cx": google_cx, "key": google_api_key, "num": num}
-        res = requests.get("https://www.googleapis.com/customsearch/v1", params=params, timeout=8)
-        res.raise_for_status()
-        return [item["link"] for item in res.json().get("items", [])]
-    except:
-        return []
-
 def scrape_article_text(url):
-    try:
-        headers = {"User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 Chrome/110.0.0.0 Safari/537.36"}
-        response = requests.get(url, headers=headers, timeout=10)
-        response.raise_for_status()
-
-        # Try newspaper3k if available
-        try:
-            from newspaper import Article  # lazy import to avoid import-time failures
-            article = Article(url)
-            article.set_html(response.text)
-            article.parse()
-            text = article.text.strip()
-            if len(text) >= 100:
-                return text
-        except Exception:
-            pass
-
-        # Fallback: extract main text via BeautifulSoup heuristics
-        soup = BeautifulSoup(response.text, "html.parser")
-        # Remove script/style
-        for tag in soup(["script", "style", "noscript"]):
-            tag.extract()
-        # Prefer <article> content
-        article_tag = soup.find("article")
-        if article_tag:
-            text = "\n".join(p.get_text(strip=True) for p in article_tag.find_all("p"))
-        else:
-            text = "\n".join(p.get_text(strip=True) for p in soup.find_all("p"))
-
-        text = text.strip()
-        if len(text) < 100:
-            st.warning(f"Article parsed but too short: {url}")
-            return None
-        return text
-
-    except Exception:
+    page = fetch_page(url)
+    if not page.ok:
         return None
-
-def scrape_html(url):
-    try:
-        r = requests.get(url, headers={"User-Agent": "Mozilla/5.0"})
-        return BeautifulSoup(r.text, "html.parser")
-    except:
+    if page.text is None:
+        with span("extract", url=url, chars=len(page.html)):
+            page.text, page.snippet_format = extract_page(url, page.html)
+        remember_extraction(page)
+    text = page.text
+    if len(text) < MIN_ARTICLE_CHARS:
+        st.warning(f"Article parsed but too short: {url}")
         return None
-
-def extract_keywords(text):
-    words = re.findall(r"\w+", text.lower())
-    filtered = [w for w in words if w not in STOPWORDS and len(w) > 4]
-    return Counter(filtered).most_common(10)
-
-def keyword_share(counter):
-    total = sum(counter.values())
-    return [(kw, f"{(cnt/total)*100:.1f}%") for kw, cnt in counter.most_common(10)] if total else []
-
-def compute_tfidf_keywords(texts):
-    if not texts:
-        return []
-    vectorizer = TfidfVectorizer(stop_words='english', max_features=50)
-    X = vectorizer.fit_transform(texts)
-    sums = X.sum(axis=0).A1
-    return sorted(
-        [(word, sums[idx]) for word, idx in vectorizer.vocabulary_.items()],
-        key=lambda x: x[1], reverse=True
-    )[:10]
-
-def detect_snippet_format(soup):
-    if soup is None:
-        return "unknown"
-    if soup.find_all('div', class_='related-question-pair'):
-        return "faq"
-    if soup.find('ol') or soup.find('ul'):
-        return "list"
-    if soup.find('table'):
-        return "table"
-    return "paragraph"
-
-def verify_urls(urls):
-    verified = []
-    for url in urls:
-        try:
-            res = requests.get(url, timeout=5)
-            if res.status_code == 200:
-                verified.append(url)
-        except:
-            continue
-    return verified
-
-def load_prompt_template(filepath="blog_prompt_template.txt"):
-    try:
-        with open(filepath, "r") as f:
-            return f.read()
-    except:
-        return ""
-
-def load_tagged_technical_pool(filepath="technical_links.json"):
-    try:
-        with open(filepath, "r") as f:
-            return json.load(f)
-    except:
-        return {}
-
-def match_links_to_keywords(tagged_pool, keywords):
-    matches = []
-    for kw in keywords:
-        for topic, links in tagged_pool.items():
-            if topic.lower() in kw.lower():
-                matches.extend(links)
-    return list(set(matches))
-
-def build_prompt(avg_read, kw_guidance, tfidf_keywords, user_additional_info, format_summary,
-                 news_links, authority_links, solution_links,
-                 company_context_text: str):
-    template = load_prompt_template()
-    kw_lines = "\n".join([f"- {kw}: {share}" for kw, share in kw_guidance])
-    tfidf_lines = "\n".join([f"- {kw} (priority keyword)" for kw, _ in tfidf_keywords])
-
-    return template.format(
-        kw_lines=kw_lines,
-        tfidf_lines=tfidf_lines,
-        company_context=company_context_text,
-        user_additional_info=user_additional_info,
-        format_summary=format_summary,
-        news_links=", ".join([f"[{url}]({url})" for url in news_links]),
-        authority_links=", ".join([f"[{url}]({url})" for url in authority_links]),
-        solution_links=", ".join([f"[{url}]({url})" for url in solution_links]),
-        avg_read=avg_read
-    )
+    return text
 
 def copy_to_clipboard_component(blog_html):
     components.html(f"""
@@ -249,70 +115,101 @@ def copy_to_clipboard_component(blog_html):
     """, height=60)
 
 # -------------------- BLOG GENERATOR --------------------
-def analyze_and_generate(comp_urls, tech_urls, user_additional_info, company_context_text, topic=None):
-    read_scores, article_texts, kw_counter, formats = [], [], Counter(), []
-
-    for url in comp_urls:
-        txt = scrape_article_text(url)
-        soup = scrape_html(url)
-        if txt:
-            article_texts.append(txt)
-            read_scores.append(textstat.flesch_reading_ease(txt))
-            kw_counter.update(dict(extract_keywords(txt)))
-        if soup:
-            formats.append(detect_snippet_format(soup))
-
-    for url in tech_urls:
-        txt = scrape_article_text(url)
-        if txt:
-            article_texts.append(txt)
-            kw_counter.update(dict(extract_keywords(txt)))
-
-    if not read_scores:
-        st.warning("No readable competitor content scraped.")
+JOB_POLL_SECONDS = 0.5
+
+# Long blogs run as background jobs (jobs.py), so reruns, reloads and
+# disconnects don't throw the work away
+job_queue = get_job_queue()
+job_queue.register("long_blog", long_blog_job, LONG_BLOG_STAGES)
+
+def job_owner():
+    """Per-session owner id, the unit the job queue shares workers between."""
+    if "job_owner" not in st.session_state:
+        st.session_state.job_owner = uuid.uuid4().hex
+    return st.session_state.job_owner
+
+def workspace_id(workspace_key):
+    return hashlib.sha256(workspace_key.encode("utf-8")).hexdigest()[:16] if workspace_key else None
+
+def open_job(job_id):
+    st.session_state.long_job_id = job_id
+    st.query_params["job"] = job_id
+
+def render_job(job_id):
+    """Follow a generation job until it finishes, then show its blog. Safe to re-enter on any rerun."""
+    job = job_queue.get(job_id)
+    if job is None:
+        st.info("That generation is no longer available.")
+        st.session_state.long_job_id = None
+        st.query_params.pop("job", None)
         return
 
-    avg_read = sum(read_scores) / len(read_scores)
-    kw_guidance = keyword_share(kw_counter)
-    tfidf_keywords = compute_tfidf_keywords(article_texts)
-    format_summary = ", ".join(formats) if formats else "unknown"
-    news_links = comp_urls[:5]
-
-    tagged_pool = load_tagged_technical_pool()
-    all_keywords = [kw for kw, _ in kw_guidance] + [kw for kw, _ in tfidf_keywords]
-    authority_links = verify_urls(match_links_to_keywords(tagged_pool, all_keywords))[:10]
-    # Fr0ntierX-links logic removed:
-    solution_links = authority_links[:3]
-
-    prompt = build_prompt(
-        avg_read,
-        kw_guidance,
-        tfidf_keywords,
-        user_additional_info,
-        format_summary,
-        news_links,
-        authority_links,
-        solution_links,
-        company_context_text,
-    )
-
-    # … after you’ve built your prompt …
-    raw_blog = call_openai(prompt)
+    if not job.done:
+        if st.button("Cancel generation", key=f"cancel_{job_id}"):
+            job_queue.cancel(job_id)
+        bar = st.progress(job.progress, text=job.stage)
+        draft = st.empty()
+        while not job.done:
+            ahead = job_queue.waiting_ahead(job_id) if job.status == "queued" else 0
+            bar.progress(job.progress, text=f"{job.stage} ({ahead} ahead in the queue)" if ahead else job.stage)
+            if job.partial:
+                draft.markdown(job.partial + "▌", unsafe_allow_html=True)
+            time.sleep(JOB_POLL_SECONDS)
+            job = job_queue.get(job_id)
+        bar.empty()
+        draft.empty()
+
+    result = job.result or {}
+    if st.session_state.get("last_trace_job") != job_id and result.get("trace"):
+        st.session_state.last_trace = result["trace"]
+        st.session_state.last_trace_job = job_id
+    if result.get("research_saved_at"):
+        st.caption(f"Written from research saved {time.strftime('%b %d %H:%M', time.localtime(result['research_saved_at']))}")
+    for warning in result.get("warnings", []):
+        st.warning(warning)
+    duplicates = result.get("duplicates") or {}
+    if duplicates:
+        st.info(
+            f"Skipped {len(duplicates)} near-duplicate article(s): "
+            + ", ".join(f"{dup} (copy of {orig})" for dup, orig in duplicates.items())
+        )
+    if job.status == "cancelled":
+        st.info("Generation cancelled.")
+        return
+    if job.status == "error":
+        st.error(job.error)
+        return
 
-    # ←── Add these three lines here ──→
-    blog_markdown = hyperlink_keywords(raw_blog, keyword_map)
     st.subheader("Your Optimized Blog")
-    st.write(blog_markdown, unsafe_allow_html=True)
-
-    blog_html = markdown_to_html(blog_markdown)
-    copy_to_clipboard_component(blog_html)
+    blog_markdown = result.get("blog", "")
+    st.markdown(blog_markdown, unsafe_allow_html=True)
+    with span("render"):
+        copy_to_clipboard_component(markdown_to_html(blog_markdown))
+    if result.get("related_links"):
+        with st.expander("Related authority links", expanded=False):
+            st.markdown("\n".join(f"- {url}" for url in result["related_links"]))
+
+def render_recent_jobs(workspace):
+    jobs = job_queue.recent(workspace) if workspace else []
+    if not jobs:
+        return
+    with st.sidebar.expander("Recent generations", expanded=False):
+        for job in jobs:
+            when = time.strftime("%b %d %H:%M", time.localtime(job.created_at))
+            if st.button(f"{when} · {job.label[:40]} · {job.status}", key=f"open_job_{job.id}"):
+                open_job(job.id)
 
 # -------------------- Short blog generator --------------------
-def extract_compelling_quote(text):
-    return call_openai(f"Extract the most striking sentence from:\n\n{text[:2000]}")
+# Long articles are condensed chunk by chunk (summarize.py) instead of cut at a fixed length
+def extract_compelling_quote(text, use_cache=None, force_refresh=False):
+    from llm import call_openai
+    text = prepare_article(text, use_cache=use_cache, force_refresh=force_refresh)
+    return call_openai(f"Extract the most striking sentence from:\n\n{text}", use_cache=use_cache, force_refresh=force_refresh)
 
-def summarize_text(text):
-    return call_openai(f"Summarize this in 1–2 sentences:\n\n{text[:2000]}")
+def summarize_text(text, use_cache=None, force_refresh=False):
+    from llm import call_openai
+    text = prepare_article(text, use_cache=use_cache, force_refresh=force_refresh)
+    return call_openai(f"Summarize this in 1–2 sentences:\n\n{text}", use_cache=use_cache, force_refresh=force_refresh)
 
 def map_to_fr0ntierx_value_prop(text):
     kws = {
@@ -333,21 +230,100 @@ def format_social_post(quote, summary, insight, url):
         f"🔗 Source: [{url}]({url})"
     )
 
+def render_manual_fallback(url, key):
+    """The paste-it-yourself fallback for a page that couldn't be scraped. Returns the pasted text."""
+    st.warning("⚠️ Website couldn’t be scraped. Please paste the text below:")
+    st.markdown(f"[🔗 Open in browser]({url})", unsafe_allow_html=True)
+    return st.text_area("Paste article text here:", height=300, key=key)
+
+def render_short_post(post):
+    with st.container(border=True):
+        st.markdown(f"**Source:** {post.url}")
+        if post.error:
+            st.error(f"Generation failed: {post.error}")
+            return
+        st.markdown(post.markdown, unsafe_allow_html=True)
+        copy_to_clipboard_component(markdown_to_html(post.markdown))
+
+def render_cache_panel():
+    """Sidebar cache controls and counters. Returns (use_llm_cache, force_regenerate)."""
+    page_stats = get_page_cache().snapshot()
+    llm_stats = get_llm_cache().snapshot()
+    search_stats = get_search_cache().snapshot()
+    with st.sidebar.expander("Cache", expanded=False):
+        use_llm_cache = st.checkbox("Reuse cached AI responses", value=CACHE_ENABLED_BY_DEFAULT, key="use_llm_cache")
+        force_regenerate = st.checkbox("Force regenerate (ignore cached AI responses)", key="force_regenerate")
+        st.write(
+            f"Page cache: {page_stats['hits']} hits, {page_stats['revalidated']} revalidated, "
+            f"{page_stats['misses']} misses, {page_stats['evictions']} evicted"
+        )
+        st.write(
+            f"AI response cache: {llm_stats['hits']} calls saved "
+            f"({llm_stats['saved_seconds']:.1f}s), {llm_stats['misses']} misses"
+        )
+        st.write(
+            f"Search: {search_stats['hits']} cached, {search_stats['misses']} live; "
+            f"quota {search_stats['calls_today']}/{search_stats['daily_quota']} calls today"
+            + (" (exhausted)" if search_stats["exhausted"] else "")
+        )
+        limiter_stats = get_rate_limiter().snapshot()
+        st.write(
+            f"OpenAI rate limit: {limiter_stats['calls']} calls, "
+            f"{limiter_stats['waited_seconds']:.1f}s spent waiting for budget"
+        )
+        research_stats = get_research_store().snapshot()
+        st.write(
+            f"Saved research: {research_stats['hits']} reused, {research_stats['saved']} saved"
+        )
+    return use_llm_cache, force_regenerate
+
+def remember_trace(run_trace):
+    st.session_state.last_trace = run_trace.to_dict()
+
+def render_debug_panel():
+    """Sidebar timings: the last run in this session, plus p95s and slow hosts across all sessions."""
+    import pandas as pd
+    with st.sidebar.expander("Debug timings", expanded=False):
+        last = st.session_state.get("last_trace")
+        if last:
+            st.write(f"Last run: {last['trace']} in {last['seconds']:.2f}s")
+            st.dataframe(
+                pd.DataFrame(sorted(last["stages"].items(), key=lambda kv: -kv[1]), columns=["stage", "seconds"]),
+                hide_index=True,
+            )
+            if last["requests"]:
+                requests_df = pd.DataFrame(last["requests"])
+                st.dataframe(requests_df[["url", "status", "bytes", "seconds"]], hide_index=True)
+        else:
+            st.write("No runs yet in this session.")
+
+        stages = stage_summary()
+        if stages:
+            st.write("Stage latency (all sessions)")
+            st.dataframe(
+                pd.DataFrame.from_dict(stages, orient="index")[["count", "p50", "p95"]].sort_values("p95", ascending=False)
+            )
+        hosts = host_summary()
+        if hosts:
+            st.write("Slowest hosts (p95)")
+            hosts_df = pd.DataFrame.from_dict(hosts, orient="index")[["requests", "errors", "p50", "p95"]]
+            st.dataframe(hosts_df.sort_values("p95", ascending=False).head(10))
+
 # -------------------- STREAMLIT UI --------------------
 
 mode = st.radio(
     "Choose mode:",
-    ["Long Blog Generator", "Short Blog Generator"],
+    ["Long Blog Generator", "Short Blog Generator", "Trending"],
     key="mode_selector"
 )
 
 if mode == "Long Blog Generator":
     # Workspace and context login/selection
     workspace_key = get_workspace_key()
-    if 'context_manager' not in st.session_state:
-        st.session_state.context_manager = ContextManager()
-    selected_context_name = render_context_selector(st.session_state.context_manager)
-    current_context = render_context_editor(st.session_state.context_manager, selected_context_name)
+    context_manager = get_context_manager()
+    selected_context_name = render_context_selector(context_manager)
+    current_context = render_context_editor(context_manager, selected_context_name)
+    use_llm_cache, force_regenerate = render_cache_panel()
 
     active_company_name = (current_context or {}).get("company_name", "Your Company")
     st.title(f"{active_company_name} BlogBuddy")
@@ -386,34 +362,87 @@ if mode == "Long Blog Generator":
         key="long_extra_info"
     )
 
-    # Generate button for long blogs
-    if st.button("Generate Blog", key="generate_long"):
+    manual_urls = [u.strip() for u in manual_urls_box.splitlines() if u.strip()]
+    tech_urls   = [u.strip() for u in tech_box.splitlines()   if u.strip()]
+    # Search results are only known after a search; remember the last one so the
+    # saved research for the same inputs can be offered without searching again
+    inputs = (sub_mode, topic, tuple(manual_urls), tuple(tech_urls))
+    last_urls = st.session_state.get("long_last_urls")
+    if "Auto" in sub_mode and topic:
+        saved_urls = last_urls[1] if last_urls and last_urls[0] == inputs else None
+    else:
+        saved_urls = (manual_urls, tech_urls) if manual_urls else None
+    saved_at = get_research_store().saved_at(bundle_key(*saved_urls)) if saved_urls else None
+
+    def submit_long_job(comp_urls, tech_urls, reuse_research=False):
+        try:
+            open_job(job_queue.submit(
+                job_owner(),
+                "long_blog",
+                {
+                    "comp_urls": comp_urls,
+                    "tech_urls": tech_urls,
+                    "additional_info": extra_info.strip(),
+                    "company_context": current_context.get("company_context", ""),
+                    "template_name": current_context.get("long_template"),
+                    "use_cache": use_llm_cache,
+                    "force_refresh": force_regenerate,
+                    "reuse_research": reuse_research,
+                },
+                label=topic or comp_urls[0],
+                workspace=workspace_id(workspace_key),
+            ))
+        except QueueFull as e:
+            st.warning(str(e))
+
+    # Generate button for long blogs: research + writing run as a background job
+    generate_col, regenerate_col = st.columns(2)
+    if generate_col.button("Generate Blog", key="generate_long"):
         if not current_context:
             st.warning("Please create and select a company context first.")
             st.stop()
-        manual_urls = [u.strip() for u in manual_urls_box.splitlines() if u.strip()]
-        tech_urls   = [u.strip() for u in tech_box.splitlines()   if u.strip()]
-        comp_urls   = (google_search_urls(topic) + manual_urls) if ("Auto" in sub_mode and topic) else manual_urls
+        with trace("long_blog") as run_trace:
+            comp_urls = manual_urls
+            if "Auto" in sub_mode and topic:
+                found = search(topic)
+                if found.error:
+                    st.warning(f"Google search problem: {found.error}")
+                comp_urls = found.urls + manual_urls
+
+            if not comp_urls:
+                st.warning("No competitor URLs to analyze.")
+            else:
+                st.session_state.long_last_urls = (inputs, (comp_urls, tech_urls))
+                submit_long_job(comp_urls, tech_urls)
+        remember_trace(run_trace)
+
+    # Same URLs, new instructions or context: skip straight to writing
+    if saved_at and regenerate_col.button(
+        "Regenerate from saved research",
+        key="regenerate_long",
+        help=f"Reuses the analysis saved {time.strftime('%b %d %H:%M', time.localtime(saved_at))}",
+    ):
+        if not current_context:
+            st.warning("Please create and select a company context first.")
+            st.stop()
+        submit_long_job(*saved_urls, reuse_research=True)
 
-        if not comp_urls:
-            st.warning("No competitor URLs to analyze.")
-        else:
-            analyze_and_generate(
-                comp_urls,
-                tech_urls,
-                extra_info.strip(),
-                current_context.get("company_context", ""),
-                topic,
-            )
+    render_recent_jobs(workspace_id(workspace_key))
+    # The job id is also in the URL, so a reload picks the generation back up
+    long_job_id = st.session_state.get("long_job_id") or st.query_params.get("job")
+    if long_job_id:
+        render_job(long_job_id)
+
+    render_debug_panel()
 
 
 elif mode == "Short Blog Generator":
     # Workspace and context login/selection
     workspace_key = get_workspace_key()
-    if 'context_manager' not in st.session_state:
-        st.session_state.context_manager = ContextManager()
-    selected_context_name = render_context_selector(st.session_state.context_manager)
-    current_context = render_context_editor(st.session_state.context_manager, selected_context_name)
+    context_manager = get_context_manager()
+    selected_context_name = render_context_selector(context_manager)
+    current_context = render_context_editor(context_manager, selected_context_name)
+    use_llm_cache, force_regenerate = render_cache_panel()
 
     active_company_name = (current_context or {}).get("company_name", "Your Company")
     st.title(f"{active_company_name} Short Blog Generator")
@@ -423,95 +452,117 @@ elif mode == "Short Blog Generator":
         st.session_state.scrape_failed = False
     if "article_text" not in st.session_state:
         st.session_state.article_text = ""
-
-    # Step 1: URL input & scrape
-    url = st.text_input("Paste the article URL here:", key="short_url")
-    if st.button("Try Scraping Article", key="try_scrape"):
-        txt = scrape_article_text(url)
-        if txt:
-            st.session_state.scrape_failed = False
-            st.session_state.article_text = txt
+    if "short_batch_posts" not in st.session_state:
+        st.session_state.short_batch_posts = {}
+    if "short_batch_failed" not in st.session_state:
+        st.session_state.short_batch_failed = {}
+
+    short_template = (current_context or {}).get("short_template")
+    short_input = st.radio("Articles:", ["Single URL", "Batch of URLs"], horizontal=True, key="short_input")
+
+    if short_input == "Batch of URLs":
+        # Scrape every URL at once, then generate posts in parallel; call_openai paces
+        # the calls to the RPM/TPM budget, so each post shows up as soon as it is ready
+        batch_text = st.text_area("Article URLs (one per line):", height=160, key="short_batch_urls")
+        if st.button("Generate Posts", key="short_batch_go"):
+            batch_urls = dedupe_urls(u.strip() for u in batch_text.splitlines() if u.strip())
+            st.session_state.short_batch_posts = {}
+            if not batch_urls:
+                st.info("Enter at least one URL.")
+            with trace("short_batch") as run_trace:
+                with st.spinner(f"Scraping {len(batch_urls)} articles…"):
+                    texts, failed = scrape_articles(batch_urls)
+                st.session_state.short_batch_failed = failed
+                if texts:
+                    progress = st.progress(0.0, text=f"Generating {len(texts)} posts…")
+                    for done, post in enumerate(generate_short_posts(texts, short_template, use_llm_cache,
+                                                                     force_regenerate), start=1):
+                        st.session_state.short_batch_posts[post.url] = post
+                        render_short_post(post)
+                        progress.progress(done / len(texts), text=f"{done}/{len(texts)} posts ready")
+            remember_trace(run_trace)
         else:
-            st.session_state.scrape_failed = True
-            st.session_state.article_text = ""
-
-    # Step 2: Manual fallback
-    if st.session_state.scrape_failed:
-        st.warning("⚠️ Website couldn’t be scraped. Please paste the text below:")
-        st.markdown(f"[🔗 Open in browser]({url})", unsafe_allow_html=True)
-        manual = st.text_area("Paste article text here:", height=300, key="short_manual_text")
-        if manual:
-            st.session_state.article_text = manual
-
-    # ────── Step 3: Summarize & Link button ──────
-    if st.session_state.article_text:
-        if st.button("Summarize & Link", key="summarize_short"):
-            article_text = st.session_state.article_text
-
-            # 1) Pull in the SOCIAL_MODE_INSTRUCTIONS from your template
-            social_instructions = extract_section_from_template("###SOCIAL_MODE_INSTRUCTIONS")
-
-            # 2) Build a single prompt using that instruction block
-            prompt = f"""
-You are a formatting assistant. Follow the exact instructions below to generate a polished, insight-driven short-form blog post.
-
-{social_instructions}
-
-Article text:
-{article_text}
-
-Source URL:
-{url}
-
-Only return the final formatted result.
-"""
-
-            # 3) Ask OpenAI for the fully formatted markdown
-            blog_markdown = call_openai(prompt)
-
-            # 4) Display it
-            st.markdown(blog_markdown, unsafe_allow_html=True)
-
-            # 5) Convert markdown → HTML so the rich copy button works
-            blog_html = markdown_to_html(blog_markdown)
-
-            # 6) Show the same “Copy Formatted Blog” button you have in Long mode
-            copy_to_clipboard_component(blog_html)
+            for post in st.session_state.short_batch_posts.values():
+                render_short_post(post)
+
+        # Pages that couldn't be scraped drop into the manual-paste fallback, one per URL
+        for failed_url, reason in list(st.session_state.short_batch_failed.items()):
+            key = hashlib.sha1(failed_url.encode("utf-8")).hexdigest()[:12]
+            st.markdown(f"**{failed_url}** ({reason})")
+            manual = render_manual_fallback(failed_url, f"short_batch_manual_{key}")
+            if manual and st.button("Generate from pasted text", key=f"short_batch_manual_go_{key}"):
+                with trace("short_blog") as run_trace:
+                    try:
+                        post = ShortPost(failed_url, generate_short_post(manual, failed_url, short_template,
+                                                                         use_llm_cache, force_regenerate))
+                    except Exception as e:
+                        post = ShortPost(failed_url, error=f"{type(e).__name__}: {e}")
+                remember_trace(run_trace)
+                st.session_state.short_batch_posts[failed_url] = post
+                if not post.error:
+                    del st.session_state.short_batch_failed[failed_url]
+                render_short_post(post)
+    else:
+        # Step 1: URL input & scrape
+        url = st.text_input("Paste the article URL here:", key="short_url")
+        if st.button("Try Scraping Article", key="try_scrape"):
+            with trace("short_scrape") as run_trace:
+                txt = scrape_article_text(url)
+            remember_trace(run_trace)
+            if txt:
+                st.session_state.scrape_failed = False
+                st.session_state.article_text = txt
+            else:
+                st.session_state.scrape_failed = True
+                st.session_state.article_text = ""
+
+        # Step 2: Manual fallback
+        if st.session_state.scrape_failed:
+            manual = render_manual_fallback(url, "short_manual_text")
+            if manual:
+                st.session_state.article_text = manual
+
+        # ────── Step 3: Summarize & Link button ──────
+        if st.session_state.article_text:
+            if st.button("Summarize & Link", key="summarize_short"):
+                article_text = st.session_state.article_text
+                from llm import stream_openai
+
+                with trace("short_blog") as run_trace:
+                    # 1) Long articles are condensed chunk by chunk first, so the prompt has a fixed budget
+                    if count_tokens(article_text) > DIRECT_TOKENS:
+                        with st.spinner("Long article: condensing it section by section…"):
+                            article_text = prepare_article(
+                                article_text, use_cache=use_llm_cache, force_refresh=force_regenerate
+                            )
+
+                    # 2) Build a single prompt from the SOCIAL_MODE_INSTRUCTIONS template block
+                    prompt = build_short_prompt(article_text, url, short_template)
+
+                    # 3) Stream the fully formatted markdown from OpenAI as it is written
+                    deltas = stream_openai(prompt, use_cache=use_llm_cache, force_refresh=force_regenerate)
+                    blog_markdown = render_stream(deltas, st.empty())
+
+                    with span("render"):
+                        # 4) Convert markdown → HTML so the rich copy button works
+                        blog_html = markdown_to_html(blog_markdown)
+
+                        # 5) Show the same “Copy Formatted Blog” button you have in Long mode
+                        copy_to_clipboard_component(blog_html)
+                remember_trace(run_trace)
+
+    render_debug_panel()
 
 else:
-    # Trending mode (read-only MVP with SQLite)
+    # Trending mode: posts gathered by the watchlist crawler (crawler.py)
+    import pandas as pd
+    from trending import PAGE_SIZE, TrendingFeed, add_age_score, get_trending_store
+
+    TRENDING_REFRESH_SECONDS = 30
     st.title("Trending posts (last 72h)")
 
-    db_path = os.getenv("BLOGBUDDY_DB", "data.db")
-    conn = sqlite3.connect(db_path)
-    conn.execute(
-        """
-        CREATE TABLE IF NOT EXISTS watchlist (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            profile_url TEXT UNIQUE,
-            display_name TEXT,
-            max_per_crawl INTEGER DEFAULT 10,
-            freq_hours INTEGER DEFAULT 24,
-            last_crawled_at TEXT,
-            status TEXT DEFAULT 'active'
-        );
-        """
-    )
-    conn.execute(
-        """
-        CREATE TABLE IF NOT EXISTS posts (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            profile_id INTEGER,
-            post_url TEXT UNIQUE,
-            posted_at TEXT,
-            reactions INTEGER,
-            comments INTEGER,
-            snippet TEXT,
-            fetched_at TEXT
-        );
-        """
-    )
-    conn.commit()
+    # One WAL connection per process; the schema is checked when it opens, not on every rerun
+    store = get_trending_store(os.getenv("BLOGBUDDY_DB", "data.db"))
 
     with st.sidebar:
         st.header("Add profile")
@@ -519,47 +570,43 @@ else:
         new_name = st.text_input("Display name (optional)")
         if st.button("Add to watchlist") and new_url:
             try:
-                conn.execute(
-                    "INSERT OR IGNORE INTO watchlist(profile_url, display_name, status, max_per_crawl, freq_hours) VALUES(?, ?, 'active', 10, 24)",
-                    (new_url.strip(), new_name.strip() or None),
-                )
-                conn.commit()
+                store.add_profile(new_url.strip(), new_name.strip() or None)
                 st.success("Added!")
             except Exception as e:
                 st.error(f"Could not add: {e}")
+        auto_refresh = st.checkbox(f"Auto-refresh every {TRENDING_REFRESH_SECONDS}s", value=True, key="trending_auto")
+
+    if "trending_feed" not in st.session_state or st.button("Start over", key="trending_reset"):
+        st.session_state.trending_feed = TrendingFeed(store)
+    feed = st.session_state.trending_feed
+
+    def render_trending_posts():
+        # Only posts crawled since the last poll are read; the loaded set is re-ranked in memory
+        feed.refresh()
+        posts = feed.ranked()
+        if posts:
+            df = add_age_score(pd.DataFrame(posts))
+            st.dataframe(df[["post_url", "reactions", "comments", "score", "snippet", "posted_at"]])
+            if feed.more:
+                st.button("Load more", key="trending_more", on_click=feed.load_more)
+        else:
+            st.info("No posts yet—crawler will populate this once it runs. Use the sidebar to add profiles to your watchlist.")
 
-    query = (
-        """
-        SELECT p.post_url, p.reactions, p.comments, p.snippet, p.posted_at, p.fetched_at
-        FROM posts p
-        WHERE p.posted_at >= datetime('now','-72 hours')
-        ORDER BY (p.reactions + p.comments) * 1.0 / (JULIANDAY('now') - JULIANDAY(p.posted_at) + 0.02) DESC
-        LIMIT 50;
-        """
-    )
-    try:
-        df = pd.read_sql_query(query, conn)
-    except Exception:
-        df = pd.DataFrame()
-
-    def _age_hours(ts: str) -> float:
-        import datetime as _dt
-        try:
-            return max(0.5, (_dt.datetime.utcnow() - _dt.datetime.fromisoformat(ts)).total_seconds() / 3600.0)
-        except Exception:
-            return 1.0
-
-    if not df.empty:
-        df["score"] = (df["reactions"].fillna(0) + df["comments"].fillna(0)) / df["posted_at"].fillna("").apply(_age_hours)
-        st.dataframe(df[["post_url", "reactions", "comments", "score", "snippet", "posted_at"]])
+    if auto_refresh and hasattr(st, "fragment"):
+        st.fragment(run_every=TRENDING_REFRESH_SECONDS)(render_trending_posts)()
     else:
-        st.info("No posts yet—crawler will populate this once it runs. Use the sidebar to add profiles to your watchlist.")
+        render_trending_posts()
 
     with st.expander("Status"):
-        try:
-            wl = pd.read_sql_query("SELECT profile_url, display_name, status, last_crawled_at FROM watchlist ORDER BY id DESC", conn)
-            st.write("Watchlist:")
-            st.dataframe(wl)
-        except Exception:
+        # Keyset pages: the stack holds the "before id" of every page visited so far
+        cursors = st.session_state.setdefault("watchlist_cursors", [None])
+        page = store.watchlist_page(before_id=cursors[-1])
+        if page:
+            st.write(f"Watchlist ({store.watchlist_size()} profiles):")
+            st.dataframe(pd.DataFrame(page)[["profile_url", "display_name", "status", "last_crawled_at"]])
+            prev_col, next_col = st.columns(2)
+            prev_col.button("Previous page", key="watchlist_prev", disabled=len(cursors) == 1, on_click=cursors.pop)
+            next_col.button("Next page", key="watchlist_next", disabled=len(page) < PAGE_SIZE,
+                            on_click=cursors.append, args=(page[-1]["id"],))
+        else:
             st.write("No watchlist entries yet.")
-    conn.close()
\ No newline at end of file
@@ -0,0 +1,215 @@
+"""
+Headless batch generation of long-form blogs.
+
+Reads a CSV or JSONL file of topics and runs the same research + generation
+pipeline as the Streamlit app over a worker pool. Each finished blog is
+appended to ``results.jsonl`` and written as a Markdown file in the output
+directory as soon as it completes.
+
+Input fields (CSV columns or JSONL keys; all but one of topic/urls optional):
+- topic: search query for Google (automatic mode)
+- urls: competitor URLs (whitespace/comma separated, or a JSON list)
+- tech_urls: technical article URLs
+- additional_info: extra instructions for the blog
+- context: company context name (defaults to --context)
+- template: prompt template name (defaults to the context's long-blog template)
+
+Every successful analysis is saved (research_store.py); with --reuse-research
+a topic whose URLs already have saved research skips straight to writing.
+
+Usage:
+    python batch_generate.py topics.csv --workspace-key KEY --context "Acme" --out-dir out --workers 4
+"""
+
+import argparse
+import csv
+import json
+import os
+import re
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from typing import Dict, List, Optional
+
+from context_manager import ContextManager
+from keyword_linker import KeywordLinker
+from metrics import trace
+from pipeline import (
+    generate_blog,
+    load_research,
+    related_links,
+    run_research,
+    save_research,
+)
+from resources import get_keyword_linker
+from search import search
+
+
+def _split_urls(value) -> List[str]:
+    if not value:
+        return []
+    if isinstance(value, list):
+        return [u.strip() for u in value if u and u.strip()]
+    return [u for u in re.split(r"[\s,]+", str(value)) if u]
+
+
+def load_topics(path: str) -> List[Dict]:
+    rows = []
+    if path.endswith(".jsonl"):
+        with open(path, "r") as f:
+            for line in f:
+                if line.strip():
+                    rows.append(json.loads(line))
+    else:
+        with open(path, "r", newline="") as f:
+            rows = list(csv.DictReader(f))
+    return rows
+
+
+def _slug(text: str) -> str:
+    return re.sub(r"[^a-z0-9]+", "-", text.lower()).strip("-")[:60] or "blog"
+
+
+class ResultWriter:
+    """Appends results as they finish; safe to call from worker threads."""
+
+    def __init__(self, out_dir: str, formats: List[str]):
+        self.out_dir = out_dir
+        self.formats = formats
+        self._lock = threading.Lock()
+        os.makedirs(out_dir, exist_ok=True)
+        self._jsonl = open(os.path.join(out_dir, "results.jsonl"), "a") if "jsonl" in formats else None
+
+    def write(self, result: Dict) -> None:
+        with self._lock:
+            if self._jsonl:
+                self._jsonl.write(json.dumps(result) + "\n")
+                self._jsonl.flush()
+            if "md" in self.formats and result.get("blog"):
+                name = f"{result['index']:04d}-{_slug(result.get('topic') or result['comp_urls'][0])}.md"
+                with open(os.path.join(self.out_dir, name), "w") as f:
+                    f.write(result["blog"] + "\n")
+
+    def close(self) -> None:
+        if self._jsonl:
+            self._jsonl.close()
+
+
+def run_one(index: int, row: Dict, contexts: ContextManager, workspace_key: str, default_context: Optional[str],
+            linker: KeywordLinker, llm_slots: threading.Semaphore, num_results: int, use_cache: Optional[bool],
+            reuse_research: bool = False) -> Dict:
+    """Generate one topic; the result carries per-stage timings in ``stages``."""
+    with trace("batch_topic") as run_trace:
+        result = _run_topic(index, row, contexts, workspace_key, default_context, linker, llm_slots,
+                            num_results, use_cache, reuse_research)
+    result["stages"] = {stage: round(seconds, 3) for stage, seconds in run_trace.stage_totals().items()}
+    return result
+
+
+def _run_topic(index: int, row: Dict, contexts: ContextManager, workspace_key: str, default_context: Optional[str],
+               linker: KeywordLinker, llm_slots: threading.Semaphore, num_results: int, use_cache: Optional[bool],
+               reuse_research: bool) -> Dict:
+    started = time.monotonic()
+    topic = (row.get("topic") or "").strip() or None
+    manual_urls = _split_urls(row.get("urls"))
+    tech_urls = _split_urls(row.get("tech_urls"))
+    context_name = (row.get("context") or "").strip() or default_context
+    result = {"index": index, "topic": topic, "context": context_name, "status": "error", "warnings": []}
+
+    context = contexts.get_context(context_name, workspace_key) if context_name else None
+    if context_name and not context:
+        result["error"] = f"Unknown company context: {context_name}"
+        return result
+
+    comp_urls = manual_urls
+    if topic:
+        found = search(topic, num=num_results)
+        if found.error:
+            result["warnings"].append(f"Google search problem: {found.error}")
+        comp_urls = found.urls + manual_urls
+    result["comp_urls"] = comp_urls
+    if not comp_urls:
+        result["error"] = "No competitor URLs to analyze."
+        return result
+
+    research = load_research(comp_urls, tech_urls)[0] if reuse_research else None
+    if research is None:
+        research = run_research(comp_urls, tech_urls)
+        save_research(research)
+    else:
+        result["reused_research"] = True
+    result["warnings"] += research.warnings
+    result["duplicates"] = research.duplicates
+    if not research.ok:
+        result["error"] = "No readable competitor content scraped."
+        return result
+
+    with llm_slots:
+        result["blog"] = generate_blog(
+            research,
+            (row.get("additional_info") or "").strip(),
+            (context or {}).get("company_context", ""),
+            linker,
+            use_cache=use_cache,
+            template_name=(row.get("template") or "").strip() or (context or {}).get("long_template"),
+        )
+    result["related_links"] = related_links(research, result["blog"])
+    result["status"] = "ok"
+    result["seconds"] = round(time.monotonic() - started, 2)
+    return result
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Generate long-form blogs for a list of topics without the UI.")
+    parser.add_argument("input", help="CSV or JSONL file of topics")
+    parser.add_argument("--workspace-key", default=os.getenv("BLOGBUDDY_WORKSPACE_KEY", ""),
+                        help="workspace key whose company contexts to use (or BLOGBUDDY_WORKSPACE_KEY)")
+    parser.add_argument("--context", help="default company context name")
+    parser.add_argument("--out-dir", default="batch_output")
+    parser.add_argument("--format", choices=["jsonl", "md", "both"], default="both")
+    parser.add_argument("--workers", type=int, default=4, help="topics processed concurrently")
+    parser.add_argument("--llm-concurrency", type=int, default=2, help="max simultaneous OpenAI calls")
+    parser.add_argument("--num-results", type=int, default=5, help="Google results per topic")
+    parser.add_argument("--llm-cache", action="store_true", help="reuse cached AI responses")
+    parser.add_argument("--reuse-research", action="store_true",
+                        help="skip analysis for topics whose URLs have saved research")
+    args = parser.parse_args(argv)
+
+    rows = load_topics(args.input)
+    if not rows:
+        print("No topics found.", file=sys.stderr)
+        return 1
+
+    formats = ["jsonl", "md"] if args.format == "both" else [args.format]
+    writer = ResultWriter(args.out_dir, formats)
+    contexts = ContextManager()
+    linker = get_keyword_linker()
+    llm_slots = threading.Semaphore(max(1, args.llm_concurrency))
+    failures = 0
+
+    with ThreadPoolExecutor(max_workers=max(1, args.workers)) as pool:
+        futures = {
+            pool.submit(run_one, i, row, contexts, args.workspace_key, args.context, linker, llm_slots,
+                        args.num_results, args.llm_cache or None, args.reuse_research): i
+            for i, row in enumerate(rows)
+        }
+        for future in as_completed(futures):
+            index = futures[future]
+            try:
+                result = future.result()
+            except Exception as e:
+                result = {"index": index, "topic": rows[index].get("topic"), "status": "error", "error": str(e)}
+            writer.write(result)
+            if result["status"] != "ok":
+                failures += 1
+            label = result.get("topic") or f"row {index}"
+            print(f"[{result['status']}] {label}" + (f": {result['error']}" if result.get("error") else ""), flush=True)
+
+    writer.close()
+    print(f"Done: {len(rows) - failures} ok, {failures} failed. Output in {args.out_dir}")
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,246 @@
+"""
+End-to-end benchmark for the long- and short-blog pipelines, fully offline.
+
+Starts local stand-ins (benchmarks/fakes.py) for Google Custom Search, a set
+of article hosts (fast, typical, slow and flaky) and the chat-completions API,
+then drives the same pipeline code the app uses at several concurrency
+levels. Reports per-stage wall time, end-to-end latency and throughput, and
+writes everything to a JSON file for comparison across commits.
+
+    python benchmarks/bench_e2e.py --concurrency 1 4 8 --runs 8
+    python benchmarks/bench_e2e.py --llm-first-token 1.5 --llm-token-latency 0.02 --out results.json
+"""
+
+import argparse
+import json
+import os
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+REPO = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, REPO)
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from fakes import FakeOpenAI, FakeSearch, FakeSite  # noqa: E402
+
+
+def summarize(values):
+    if not values:
+        return {}
+    ordered = sorted(values)
+    p95 = ordered[min(len(ordered) - 1, int(round(0.95 * (len(ordered) - 1))))]
+    return {"mean": statistics.fmean(values), "p50": statistics.median(values), "p95": p95, "max": ordered[-1]}
+
+
+class Timer:
+    def __init__(self):
+        self.stages = {}
+        self._last = time.perf_counter()
+        self.start = self._last
+
+    def mark(self, stage):
+        now = time.perf_counter()
+        self.stages[stage] = self.stages.get(stage, 0.0) + (now - self._last)
+        self._last = now
+
+    def total(self):
+        return time.perf_counter() - self.start
+
+
+def long_blog_run(i, args, sites):
+    """The app's path: search in the session, then the long_blog job handler (research, stream, link)."""
+    import markdown as md
+    from jobs import JobFailed
+    from metrics import trace
+    from pipeline import google_search_urls, long_blog_job
+
+    timer = Timer()
+    urls = google_search_urls(f"benchmark topic {i}", num=5)
+    timer.mark("search")
+
+    def report(stage=None, progress=None, partial=None):
+        if stage == "llm" and "research" not in timer.stages:
+            timer.mark("research")
+        elif partial is not None and "llm_first_token" not in timer.stages:
+            timer.mark("llm_first_token")
+
+    params = {
+        "comp_urls": urls + [sites["typical"].url(10_000 + i)],
+        "tech_urls": [sites["fast"].url(20_000 + i)],
+        "additional_info": "benchmark run",
+        "company_context": "Benchmark Co. builds secure things.",
+        "use_cache": False,
+    }
+    try:
+        with trace("bench_long_blog", on_stage=lambda stage: report(stage=stage)):
+            result = long_blog_job(params, report)
+    except JobFailed as e:
+        return timer, str(e)
+    timer.mark("llm_stream")
+    md.markdown(result["blog"])
+    timer.mark("render")
+    return timer, None
+
+
+def short_blog_run(i, args, sites):
+    import markdown as md
+    from llm import stream_openai
+    from pipeline import build_short_prompt
+    from scraper import MIN_ARTICLE_CHARS, extract_page, fetch_page
+
+    timer = Timer()
+    url = sites["typical"].url(30_000 + i)
+    page = fetch_page(url)
+    timer.mark("fetch")
+    if not page.ok:
+        return timer, f"fetch failed: {page.status or page.error}"
+    text, _ = extract_page(url, page.html)
+    timer.mark("extract")
+    if len(text) < MIN_ARTICLE_CHARS:
+        return timer, "article too short"
+    prompt = build_short_prompt(text, url)
+    timer.mark("prompt")
+    parts, first = [], True
+    for delta in stream_openai(prompt, use_cache=False):
+        if first:
+            timer.mark("llm_first_token")
+            first = False
+        parts.append(delta)
+    timer.mark("llm_stream")
+    md.markdown("".join(parts))
+    timer.mark("render")
+    return timer, None
+
+
+def run_level(flow, fn, concurrency, runs, args, sites, offset):
+    results = []
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        futures = [pool.submit(fn, offset + n, args, sites) for n in range(runs)]
+        for future in futures:
+            try:
+                timer, error = future.result()
+                results.append((timer.total(), timer.stages, error))
+            except Exception as e:
+                results.append((0.0, {}, f"{type(e).__name__}: {e}"))
+    wall = time.perf_counter() - started
+    ok = [r for r in results if r[2] is None]
+    stage_names = sorted({name for _, stages, _ in ok for name in stages})
+    return {
+        "flow": flow,
+        "concurrency": concurrency,
+        "runs": runs,
+        "ok": len(ok),
+        "errors": [r[2] for r in results if r[2] is not None],
+        "wall_seconds": wall,
+        "throughput_per_min": 60.0 * len(ok) / wall if wall else 0.0,
+        "latency": summarize([r[0] for r in ok]),
+        "stages": {name: summarize([stages.get(name, 0.0) for _, stages, _ in ok]) for name in stage_names},
+    }
+
+
+def git_commit():
+    try:
+        return subprocess.check_output(["git", "-C", REPO, "rev-parse", "--short", "HEAD"], text=True).strip()
+    except Exception:
+        return None
+
+
+def print_level(level):
+    lat = level["latency"]
+    print(f"\n{level['flow']} @ concurrency {level['concurrency']}: {level['ok']}/{level['runs']} ok, "
+          f"{level['throughput_per_min']:.1f} runs/min, latency p50 {lat.get('p50', 0):.2f}s p95 {lat.get('p95', 0):.2f}s")
+    for name, stats in level["stages"].items():
+        print(f"    {name:<16} p50 {stats['p50']:7.3f}s  p95 {stats['p95']:7.3f}s")
+    for error in sorted(set(level["errors"])):
+        print(f"    error: {error}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[1, 4, 8])
+    parser.add_argument("--runs", type=int, default=8, help="runs per concurrency level")
+    parser.add_argument("--flows", nargs="+", choices=["long", "short"], default=["long", "short"])
+    parser.add_argument("--llm-first-token", type=float, default=0.8, help="fake time-to-first-token (s)")
+    parser.add_argument("--llm-token-latency", type=float, default=0.005, help="fake per-token latency (s)")
+    parser.add_argument("--llm-tokens", type=int, default=600)
+    parser.add_argument("--slow-latency", type=float, default=1.5, help="latency of the slow article host (s)")
+    parser.add_argument("--flaky-fail-rate", type=float, default=0.3)
+    parser.add_argument("--warm-cache", action="store_true", help="keep the page and search cache TTLs (default: always refetch)")
+    parser.add_argument("--out", help="JSON output path (default benchmarks/results/e2e-<timestamp>.json)")
+    args = parser.parse_args()
+
+    sites = {
+        "fast": FakeSite(latency=0.02, seed_offset=1).start(),
+        "typical": FakeSite(latency=0.15, seed_offset=2).start(),
+        "slow": FakeSite(latency=args.slow_latency, seed_offset=3).start(),
+        "flaky": FakeSite(latency=0.1, fail_rate=args.flaky_fail_rate, seed_offset=4).start(),
+    }
+
+    def search_links(query):
+        n = abs(hash(query)) % 100_000
+        return [sites["fast"].url(n), sites["typical"].url(n), sites["slow"].url(n),
+                sites["flaky"].url(n), sites["typical"].url(n + 1)]
+
+    search = FakeSearch(search_links, latency=0.3).start()
+    chat = FakeOpenAI(args.llm_first_token, args.llm_token_latency, args.llm_tokens).start()
+
+    out_path = args.out or os.path.join(REPO, "benchmarks", "results", time.strftime("e2e-%Y%m%d-%H%M%S.json"))
+    workdir = tempfile.mkdtemp(prefix="blogbuddy-bench-")
+    try:
+        shutil.copy(os.path.join(REPO, "blog_prompt_template.txt"), workdir)
+        with open(os.path.join(workdir, "technical_links.json"), "w") as f:
+            json.dump({
+                "ransomware": [sites["fast"].url(900)],
+                "encryption": [sites["typical"].url(901)],
+                "supply chain": [sites["flaky"].url(902)],
+            }, f)
+        os.chdir(workdir)
+        os.environ.update({
+            "OPENAI_API_KEY": "benchmark",
+            "OPENAI_API_BASE": chat.api_base,
+            "BLOGBUDDY_GOOGLE_ENDPOINT": search.endpoint,
+            "BLOGBUDDY_PAGE_CACHE": os.path.join(workdir, "cache", "pages.db"),
+            "BLOGBUDDY_CORPUS_PATH": os.path.join(workdir, "cache", "corpus.db"),
+            "BLOGBUDDY_SEARCH_CACHE": os.path.join(workdir, "cache", "search.db"),
+            "BLOGBUDDY_RESEARCH_STORE": os.path.join(workdir, "cache", "research.db"),
+            "BLOGBUDDY_SEARCH_DAILY_QUOTA": "1000000",
+            "BLOGBUDDY_LLM_CACHE": "0",
+        })
+        if not args.warm_cache:
+            os.environ["BLOGBUDDY_PAGE_CACHE_TTL"] = "0"
+            os.environ["BLOGBUDDY_SEARCH_TTL"] = "0"
+
+        flows = {"long": long_blog_run, "short": short_blog_run}
+        levels, offset = [], 0
+        for flow in args.flows:
+            for concurrency in args.concurrency:
+                level = run_level(flow, flows[flow], concurrency, args.runs, args, sites, offset)
+                offset += args.runs
+                levels.append(level)
+                print_level(level)
+    finally:
+        os.chdir(REPO)
+        shutil.rmtree(workdir, ignore_errors=True)
+        for server in list(sites.values()) + [search, chat]:
+            server.stop()
+
+    report = {
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "commit": git_commit(),
+        "config": vars(args),
+        "levels": levels,
+    }
+    os.makedirs(os.path.dirname(os.path.abspath(out_path)), exist_ok=True)
+    with open(out_path, "w") as f:
+        json.dump(report, f, indent=2)
+    print(f"\nWrote {out_path}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,120 @@
+"""
+Parse time and peak memory per page for article extraction: the original
+path (full html.parser parse for the text plus a second full parse for
+detect_snippet_format) versus scraper.extract_page (one strained parse).
+
+Point --fixtures at a directory of saved .html pages; without one, a set of
+synthetic news pages (nav, scripts, comments, related links) is generated.
+
+    python benchmarks/bench_extraction.py --fixtures path/to/saved_pages
+"""
+
+import argparse
+import glob
+import os
+import random
+import sys
+import tempfile
+import time
+import tracemalloc
+
+from bs4 import BeautifulSoup
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import scraper  # noqa: E402
+
+
+def legacy_extract(html):
+    soup = BeautifulSoup(html, "html.parser")
+    for tag in soup(["script", "style", "noscript"]):
+        tag.extract()
+    article_tag = soup.find("article")
+    root = article_tag if article_tag else soup
+    text = "\n".join(p.get_text(strip=True) for p in root.find_all("p")).strip()
+
+    soup = BeautifulSoup(html, "html.parser")
+    if soup.find_all('div', class_='related-question-pair'):
+        fmt = "faq"
+    elif soup.find('ol') or soup.find('ul'):
+        fmt = "list"
+    elif soup.find('table'):
+        fmt = "table"
+    else:
+        fmt = "paragraph"
+    return text, fmt
+
+
+def new_extract(html):
+    soup = scraper.parse_content(html)
+    return scraper._paragraph_text(soup), scraper.detect_snippet_format(soup, html)
+
+
+def synth_page(rng, paragraphs, chrome_blocks):
+    words = "security cloud attack network breach vendor patch zero trust data policy agency threat report".split()
+
+    def sentence():
+        return " ".join(rng.choice(words) for _ in range(rng.randint(8, 20))).capitalize() + "."
+
+    chrome = []
+    for i in range(chrome_blocks):
+        chrome.append(
+            f'<div class="nav-{i}"><ul>' + "".join(f'<li><a href="/s/{i}/{j}">Section {j}</a></li>' for j in range(12)) + "</ul>"
+            f'<script>window.ads_{i} = {{"slot": {i}, "payload": "{"x" * 400}"}};</script>'
+            f'<div class="promo"><span>{sentence()}</span><img src="/i/{i}.png"/></div></div>'
+        )
+    body = "".join(f"<p>{' '.join(sentence() for _ in range(4))}</p>" for _ in range(paragraphs))
+    comments = "".join(f'<div class="comment"><span>{sentence()}</span></div>' for _ in range(chrome_blocks * 3))
+    return (
+        "<!doctype html><html><head><title>News</title>"
+        + "".join(f"<style>.c{i}{{color:red}}</style>" for i in range(50))
+        + f"</head><body>{''.join(chrome[: chrome_blocks // 2])}<article><h1>Headline</h1>{body}</article>"
+        + f"{''.join(chrome[chrome_blocks // 2:])}<section>{comments}</section></body></html>"
+    )
+
+
+def measure(fn, html, repeat):
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = fn(html)
+        best = min(best, time.perf_counter() - start)
+    tracemalloc.start()
+    fn(html)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return best, peak, result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--fixtures", help="directory of saved .html pages")
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        fixtures = args.fixtures
+        if not fixtures:
+            fixtures = tmp
+            rng = random.Random(3)
+            for name, paragraphs, chrome in [("light", 10, 20), ("typical", 30, 120), ("heavy", 60, 600), ("huge", 120, 2000)]:
+                with open(os.path.join(tmp, f"{name}.html"), "w") as f:
+                    f.write(synth_page(rng, paragraphs, chrome))
+        paths = sorted(glob.glob(os.path.join(fixtures, "*.html")))
+        if not paths:
+            print(f"No .html fixtures in {fixtures}")
+            return
+
+        print(f"parser backend: {scraper.HTML_PARSER}")
+        print(f"{'page':<24} {'KB':>7} {'old ms':>8} {'new ms':>8} {'old peak MB':>12} {'new peak MB':>12} {'same':>5}")
+        for path in paths:
+            with open(path, "r", errors="replace") as f:
+                html = f.read()
+            old_t, old_mem, old_out = measure(legacy_extract, html, args.repeat)
+            new_t, new_mem, new_out = measure(new_extract, html, args.repeat)
+            print(f"{os.path.basename(path)[:24]:<24} {len(html) / 1024:7.0f} {old_t * 1000:8.1f} {new_t * 1000:8.1f} "
+                  f"{old_mem / 2**20:12.1f} {new_mem / 2**20:12.1f} {str(old_out == new_out):>5}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,86 @@
+"""
+Compare the compiled single-pass KeywordLinker with the original
+per-keyword regex loop it replaced (app.hyperlink_keywords) on large keyword maps.
+
+    python benchmarks/bench_keyword_linker.py --sizes 100 1000 10000 30000
+"""
+
+import argparse
+import os
+import random
+import re
+import string
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from keyword_linker import KeywordLinker  # noqa: E402
+
+
+def legacy_hyperlink_keywords(text, mapping):
+    """The pre-KeywordLinker implementation, kept verbatim for comparison."""
+    sorted_keywords = sorted(mapping.keys(), key=len, reverse=True)
+    for kw in sorted_keywords:
+        url = mapping[kw][0]
+        pattern = re.compile(rf"\b{re.escape(kw)}\b", flags=re.IGNORECASE)
+        text = pattern.sub(lambda m: f"[{m.group(0)}]({url})", text)
+    return text
+
+
+def make_mapping(size, rng):
+    words = set()
+    while len(words) < size:
+        n = rng.randint(1, 3)
+        words.add(" ".join("".join(rng.choices(string.ascii_lowercase, k=rng.randint(4, 9))) for _ in range(n)))
+    return {w: [f"https://example.com/{i}"] for i, w in enumerate(sorted(words))}
+
+
+def make_text(mapping, rng, n_words=1500, hit_rate=0.05):
+    keys = list(mapping)
+    out = []
+    for _ in range(n_words):
+        if rng.random() < hit_rate:
+            out.append(rng.choice(keys))
+        else:
+            out.append("".join(rng.choices(string.ascii_lowercase, k=rng.randint(2, 8))))
+    return " ".join(out)
+
+
+def timed(fn, repeat):
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[100, 1000, 10000, 30000])
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--legacy-max", type=int, default=10000, help="skip the legacy loop above this size")
+    args = parser.parse_args()
+
+    rng = random.Random(42)
+    print(f"{'keywords':>9} {'build (s)':>10} {'link (ms)':>10} {'legacy (ms)':>12} {'speedup':>8}")
+    for size in args.sizes:
+        mapping = make_mapping(size, rng)
+        text = make_text(mapping, rng)
+
+        start = time.perf_counter()
+        linker = KeywordLinker(mapping)
+        build = time.perf_counter() - start
+        new = timed(lambda: linker.link(text), args.repeat)
+
+        if size <= args.legacy_max:
+            old = timed(lambda: legacy_hyperlink_keywords(text, mapping), 1)
+            legacy_col, speedup = f"{old * 1000:12.1f}", f"{old / new:7.0f}x"
+        else:
+            legacy_col, speedup = f"{'skipped':>12}", f"{'-':>8}"
+        print(f"{size:9d} {build:10.3f} {new * 1000:10.2f} {legacy_col} {speedup}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,77 @@
+"""
+Cold-start and rerun latency of the Streamlit app.
+
+Each sample starts a fresh interpreter, runs app.py once through Streamlit's
+AppTest harness (cold start: imports, resource loading, first render), then
+reruns it several times the way Streamlit does after every widget change.
+Runs in a scratch directory with copies of the template and technical links,
+so no real contexts or caches are touched.
+
+    python benchmarks/bench_startup.py --samples 5 --reruns 20
+    python benchmarks/bench_startup.py --app /path/to/app.py
+"""
+
+import argparse
+import json
+import os
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+
+REPO = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+CHILD = r"""
+import json, sys, time
+start = time.perf_counter()
+from streamlit.testing.v1 import AppTest
+harness = time.perf_counter() - start
+at = AppTest.from_file(sys.argv[1], default_timeout=120)
+start = time.perf_counter()
+at.run()
+cold = time.perf_counter() - start
+reruns = []
+for _ in range(int(sys.argv[2])):
+    start = time.perf_counter()
+    at.run()
+    reruns.append(time.perf_counter() - start)
+heavy = [m for m in ("pandas", "textstat", "sklearn", "openai", "bs4", "numpy") if m in sys.modules]
+print(json.dumps({"harness_import": harness, "cold": cold, "reruns": reruns,
+                  "exceptions": [str(e.value) for e in at.exception], "heavy_modules_loaded": heavy}))
+"""
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Measure app.py cold start and rerun latency.")
+    parser.add_argument("--app", default=os.path.join(REPO, "app.py"))
+    parser.add_argument("--samples", type=int, default=3, help="fresh processes to start")
+    parser.add_argument("--reruns", type=int, default=10, help="reruns per process")
+    args = parser.parse_args(argv)
+
+    workdir = tempfile.mkdtemp(prefix="blogbuddy-startup-")
+    try:
+        shutil.copy(os.path.join(REPO, "blog_prompt_template.txt"), workdir)
+        shutil.copy(os.path.join(REPO, "technical_links.json"), workdir)
+        env = dict(os.environ, PYTHONPATH=os.pathsep.join([REPO, os.environ.get("PYTHONPATH", "")]),
+                   BLOGBUDDY_PAGE_CACHE=os.path.join(workdir, "cache", "pages.db"))
+        samples = []
+        for _ in range(args.samples):
+            out = subprocess.run([sys.executable, "-c", CHILD, os.path.abspath(args.app), str(args.reruns)],
+                                 cwd=workdir, env=env, capture_output=True, text=True, check=True)
+            samples.append(json.loads(out.stdout.strip().splitlines()[-1]))
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+    cold = [s["cold"] for s in samples]
+    reruns = [r for s in samples for r in s["reruns"]]
+    print(f"cold start (first run): median {statistics.median(cold) * 1000:8.1f} ms   max {max(cold) * 1000:8.1f} ms")
+    print(f"rerun:                  median {statistics.median(reruns) * 1000:8.1f} ms   max {max(reruns) * 1000:8.1f} ms")
+    print(f"heavy modules loaded after first render: {', '.join(samples[0]['heavy_modules_loaded']) or 'none'}")
+    if samples[0]["exceptions"]:
+        print(f"app raised: {samples[0]['exceptions']}")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,112 @@
+"""
+Benchmark the Trending ranking at scale: the original full-scan query plus
+row-by-row ``_age_hours`` scoring versus the indexed ``trending`` module.
+
+    python benchmarks/bench_trending.py --posts 1000000 --days 365
+"""
+
+import argparse
+import datetime as dt
+import os
+import random
+import sqlite3
+import sys
+import tempfile
+import time
+
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from trending import SCHEMA, add_age_score, ensure_schema, fetch_trending  # noqa: E402
+
+LEGACY_QUERY = """
+    SELECT p.post_url, p.reactions, p.comments, p.snippet, p.posted_at, p.fetched_at
+    FROM posts p
+    WHERE p.posted_at >= datetime('now','-72 hours')
+    ORDER BY (p.reactions + p.comments) * 1.0 / (JULIANDAY('now') - JULIANDAY(p.posted_at) + 0.02) DESC
+    LIMIT 50;
+"""
+
+
+def legacy_age_hours(ts):
+    try:
+        return max(0.5, (dt.datetime.utcnow() - dt.datetime.fromisoformat(ts)).total_seconds() / 3600.0)
+    except Exception:
+        return 1.0
+
+
+def populate(conn, posts, days, now, seed=7):
+    rng = random.Random(seed)
+    batch = []
+    for i in range(posts):
+        posted = now - dt.timedelta(seconds=rng.random() * days * 86400)
+        batch.append((i % 500, f"https://example.com/p/{i}", posted.strftime("%Y-%m-%d %H:%M:%S"),
+                      rng.randint(0, 5000), rng.randint(0, 500), "snippet", now.isoformat()))
+        if len(batch) == 50000:
+            conn.executemany("INSERT INTO posts(profile_id, post_url, posted_at, reactions, comments, snippet, fetched_at) VALUES(?, ?, ?, ?, ?, ?, ?)", batch)
+            batch.clear()
+    if batch:
+        conn.executemany("INSERT INTO posts(profile_id, post_url, posted_at, reactions, comments, snippet, fetched_at) VALUES(?, ?, ?, ?, ?, ?, ?)", batch)
+    conn.commit()
+
+
+def best_of(fn, repeat):
+    best, out = float("inf"), None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        out = fn()
+        best = min(best, time.perf_counter() - start)
+    return best, out
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--posts", type=int, default=1_000_000)
+    parser.add_argument("--days", type=float, default=365, help="spread posts uniformly over this many days")
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    now = dt.datetime.utcnow()
+    with tempfile.TemporaryDirectory() as tmp:
+        legacy = sqlite3.connect(os.path.join(tmp, "legacy.db"))
+        for statement in SCHEMA:
+            legacy.execute(statement)
+        start = time.perf_counter()
+        populate(legacy, args.posts, args.days, now)
+        print(f"insert {args.posts:,} posts, original schema : {time.perf_counter() - start:6.1f} s")
+
+        def run_legacy():
+            df = pd.read_sql_query(LEGACY_QUERY, legacy)
+            df["score"] = (df["reactions"].fillna(0) + df["comments"].fillna(0)) / df["posted_at"].fillna("").apply(legacy_age_hours)
+            return df
+
+        legacy_time, legacy_df = best_of(run_legacy, args.repeat)
+
+        ranked = sqlite3.connect(os.path.join(tmp, "ranked.db"))
+        ensure_schema(ranked)
+        start = time.perf_counter()
+        populate(ranked, args.posts, args.days, now)
+        print(f"insert {args.posts:,} posts, ranked schema   : {time.perf_counter() - start:6.1f} s")
+
+        def run_ranked():
+            return add_age_score(fetch_trending(ranked, hours=72, limit=50))
+
+        ranked_time, ranked_df = best_of(run_ranked, args.repeat)
+
+        # 'now' moves between the two queries, so compare membership rather than exact order
+        overlap = len(set(legacy_df["post_url"]) & set(ranked_df["post_url"]))
+        print(f"legacy query + apply : {legacy_time * 1000:9.1f} ms")
+        print(f"indexed + vectorized : {ranked_time * 1000:9.1f} ms  ({legacy_time / ranked_time:.0f}x, top-50 overlap {overlap}/50)")
+
+        # Incremental maintenance cost: triggers on insert/refresh
+        rng = random.Random(1)
+        start = time.perf_counter()
+        for i in range(1000):
+            ranked.execute("UPDATE posts SET reactions = ? WHERE id = ?", (rng.randint(0, 9000), rng.randint(1, args.posts)))
+        ranked.commit()
+        print(f"1,000 refreshes with trigger maintenance: {(time.perf_counter() - start) * 1000:.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,200 @@
+"""
+Local stand-ins for the services the pipeline talks to.
+
+- FakeSite: serves generated article pages; each instance is its own host
+  (port), with configurable latency and failure rate.
+- FakeSearch: a Custom Search endpoint returning links into FakeSite hosts.
+- FakeOpenAI: a chat-completions endpoint (plain and SSE streaming) with
+  configurable time-to-first-token and per-token latency.
+
+Each server runs on a daemon thread bound to 127.0.0.1 on a free port.
+"""
+
+import json
+import random
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlsplit
+
+
+class _Server:
+    handler_class = BaseHTTPRequestHandler
+
+    def __init__(self):
+        owner = self
+
+        class Handler(self.handler_class):
+            server_owner = owner
+
+            def log_message(self, *args):
+                pass
+
+        self.httpd = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self.httpd.daemon_threads = True
+        self.thread = threading.Thread(target=self.httpd.serve_forever, daemon=True)
+
+    @property
+    def base_url(self) -> str:
+        return f"http://127.0.0.1:{self.httpd.server_address[1]}"
+
+    def start(self):
+        self.thread.start()
+        return self
+
+    def stop(self):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+
+WORDS = ("security cloud attack network breach vendor patch zero trust data policy agency threat report "
+         "ransomware malware supply chain encryption identity access incident response compliance").split()
+
+
+def article_html(seed: int, paragraphs: int = 25, chrome_blocks: int = 80) -> str:
+    """A news-like page: navigation, scripts, promo blocks, an <article> and comments."""
+    rng = random.Random(seed)
+
+    def sentence():
+        return " ".join(rng.choice(WORDS) for _ in range(rng.randint(8, 20))).capitalize() + "."
+
+    chrome = "".join(
+        f'<div class="nav-{i}"><ul>' + "".join(f'<li><a href="/s/{i}/{j}">Section {j}</a></li>' for j in range(10)) + "</ul>"
+        f'<script>window.ads_{i} = {{"slot": {i}, "payload": "{"x" * 300}"}};</script></div>'
+        for i in range(chrome_blocks)
+    )
+    body = "".join(f"<p>{' '.join(sentence() for _ in range(4))}</p>" for _ in range(paragraphs))
+    return (f"<!doctype html><html><head><title>Story {seed}</title></head><body>{chrome}"
+            f"<article><h1>Story {seed}</h1>{body}</article><section>{chrome[:5000]}</section></body></html>")
+
+
+class _SiteHandler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        site = self.server_owner
+        site.requests += 1
+        if site.latency:
+            time.sleep(site.latency)
+        if site.fail_rate and site.rng.random() < site.fail_rate:
+            self.send_response(500)
+            self.end_headers()
+            return
+        path = urlsplit(self.path).path
+        try:
+            seed = int(path.rstrip("/").rsplit("/", 1)[-1])
+        except ValueError:
+            seed = 0
+        body = article_html(seed + site.seed_offset).encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", "text/html; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        if self.command != "HEAD":
+            self.wfile.write(body)
+
+    do_HEAD = do_GET
+
+
+class FakeSite(_Server):
+    handler_class = _SiteHandler
+
+    def __init__(self, latency: float = 0.0, fail_rate: float = 0.0, seed_offset: int = 0):
+        self.latency = latency
+        self.fail_rate = fail_rate
+        self.seed_offset = seed_offset
+        self.rng = random.Random(seed_offset)
+        self.requests = 0
+        super().__init__()
+
+    def url(self, n: int) -> str:
+        return f"{self.base_url}/article/{n}"
+
+
+class _SearchHandler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        search = self.server_owner
+        search.requests += 1
+        if search.latency:
+            time.sleep(search.latency)
+        qs = parse_qs(urlsplit(self.path).query)
+        num = int(qs.get("num", ["10"])[0])
+        start = int(qs.get("start", ["1"])[0])
+        query = qs.get("q", [""])[0]
+        pool = search.links(query) if callable(search.links) else search.links
+        links = pool[start - 1:start - 1 + num]
+        body = json.dumps({"items": [{"link": link} for link in links]}).encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+
+class FakeSearch(_Server):
+    handler_class = _SearchHandler
+
+    def __init__(self, links, latency: float = 0.0):
+        # A list of links, or a callable mapping the query to a list
+        self.links = links if callable(links) else list(links)
+        self.latency = latency
+        self.requests = 0
+        super().__init__()
+
+    @property
+    def endpoint(self) -> str:
+        return f"{self.base_url}/customsearch/v1"
+
+
+class _ChatHandler(BaseHTTPRequestHandler):
+    def do_POST(self):
+        fake = self.server_owner
+        length = int(self.headers.get("Content-Length", 0))
+        payload = json.loads(self.rfile.read(length) or b"{}")
+        with fake.lock:
+            fake.requests += 1
+            fake.prompt_chars += sum(len(m.get("content", "")) for m in payload.get("messages", []))
+        tokens = [f"{WORDS[i % len(WORDS)]} " for i in range(fake.completion_tokens)]
+        tokens = ["# Generated blog\n\n"] + [t + ("\n\n" if i % 40 == 39 else "") for i, t in enumerate(tokens)]
+        time.sleep(fake.first_token_latency)
+
+        if payload.get("stream"):
+            self.send_response(200)
+            self.send_header("Content-Type", "text/event-stream")
+            self.end_headers()
+            for token in tokens:
+                chunk = {"id": "fake", "object": "chat.completion.chunk", "model": payload.get("model"),
+                         "choices": [{"index": 0, "delta": {"content": token}, "finish_reason": None}]}
+                self.wfile.write(f"data: {json.dumps(chunk)}\n\n".encode("utf-8"))
+                self.wfile.flush()
+                if fake.token_latency:
+                    time.sleep(fake.token_latency)
+            self.wfile.write(b"data: [DONE]\n\n")
+            return
+
+        time.sleep(fake.token_latency * len(tokens))
+        body = json.dumps({
+            "id": "fake", "object": "chat.completion", "model": payload.get("model"),
+            "choices": [{"index": 0, "message": {"role": "assistant", "content": "".join(tokens)}, "finish_reason": "stop"}],
+            "usage": {"prompt_tokens": 0, "completion_tokens": len(tokens), "total_tokens": len(tokens)},
+        }).encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+
+class FakeOpenAI(_Server):
+    handler_class = _ChatHandler
+
+    def __init__(self, first_token_latency: float = 0.5, token_latency: float = 0.01, completion_tokens: int = 400):
+        self.first_token_latency = first_token_latency
+        self.token_latency = token_latency
+        self.completion_tokens = completion_tokens
+        self.requests = 0
+        self.prompt_chars = 0
+        self.lock = threading.Lock()
+        super().__init__()
+
+    @property
+    def api_base(self) -> str:
+        return f"{self.base_url}/v1"
@@ -5,6 +5,7 @@ Secrets are loaded from environment variables or Streamlit secrets:
 - OPENAI_API_KEY
 - GOOGLE_API_KEY
 - GOOGLE_CX
+- OPENAI_API_BASE (optional; e.g. a local fake completion server)
 """
 
 import os
@@ -19,6 +20,8 @@ def get_api_key(key_name: str):
     try:
         if key_name == "OPENAI_API_KEY":
             return st.secrets["openai"]["api_key"]
+        if key_name == "OPENAI_API_BASE":
+            return st.secrets["openai"]["api_base"]
         if key_name == "GOOGLE_API_KEY":
             return st.secrets["google"]["api_key"]
         if key_name == "GOOGLE_CX":
@@ -30,5 +33,6 @@ def get_api_key(key_name: str):
 
 # Secrets (loaded at runtime)
 openai_api_key = get_api_key("OPENAI_API_KEY")
+openai_api_base = get_api_key("OPENAI_API_BASE")
 google_api_key = get_api_key("GOOGLE_API_KEY")
 google_cx = get_api_key("GOOGLE_CX")
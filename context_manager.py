@@ -1,43 +1,168 @@
 import json
 import os
 import hashlib
+import sqlite3
+import threading
 from datetime import datetime
-from typing import Dict, List, Optional
+from typing import Dict, List, Optional, Tuple
 
 import streamlit as st
 
+from prompt_templates import DEFAULT_TEMPLATE, get_template_registry
+
+# Parsed contexts per (db path, workspace hash), tagged with the workspace
+# version they were read at. Shared by every session in the process.
+_read_cache: Dict[Tuple[str, str], Tuple[int, Dict[str, Dict]]] = {}
+_read_cache_lock = threading.Lock()
+
 
 class ContextManager:
+    """
+    Company contexts stored one row per context in SQLite
+    (``user_contexts/contexts.db``). Each workspace carries a version number
+    bumped on every write; reads are served from an in-process cache until
+    the version changes, and writes are single transactions so concurrent
+    sessions cannot corrupt each other. Legacy ``contexts_<hash>.json`` files
+    are imported on first access.
+    """
+
     def __init__(self):
         self.base_storage_dir = "user_contexts"
         self.ensure_storage_dir()
+        self.db_path = os.path.join(self.base_storage_dir, "contexts.db")
+        self._conn = sqlite3.connect(self.db_path, check_same_thread=False, timeout=30, isolation_level=None)
+        self._lock = threading.Lock()
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS contexts (
+                workspace TEXT NOT NULL,
+                name TEXT NOT NULL,
+                data TEXT NOT NULL,
+                position INTEGER NOT NULL,
+                PRIMARY KEY (workspace, name)
+            );
+            """
+        )
+        self._conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS workspaces (
+                workspace TEXT PRIMARY KEY,
+                version INTEGER NOT NULL DEFAULT 0
+            );
+            """
+        )
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
 
     def ensure_storage_dir(self) -> None:
         if not os.path.exists(self.base_storage_dir):
             os.makedirs(self.base_storage_dir)
 
+    def _workspace_id(self, workspace_key: str) -> str:
+        return hashlib.sha256(workspace_key.encode()).hexdigest()[:16]
+
     def get_user_file_path(self, workspace_key: str) -> str:
-        key_hash = hashlib.sha256(workspace_key.encode()).hexdigest()[:16]
-        return os.path.join(self.base_storage_dir, f"contexts_{key_hash}.json")
+        """Location of the legacy per-workspace JSON file (read only for migration)."""
+        return os.path.join(self.base_storage_dir, f"contexts_{self._workspace_id(workspace_key)}.json")
+
+    def _version(self, workspace: str) -> Optional[int]:
+        row = self._conn.execute("SELECT version FROM workspaces WHERE workspace = ?", (workspace,)).fetchone()
+        return row[0] if row else None
+
+    def _migrate_json(self, workspace_key: str, workspace: str) -> None:
+        """Import a legacy JSON file once, then rename it out of the way."""
+        file_path = self.get_user_file_path(workspace_key)
+        contexts: Dict[str, Dict] = {}
+        if os.path.exists(file_path):
+            try:
+                with open(file_path, "r") as f:
+                    contexts = json.load(f)
+            except (FileNotFoundError, json.JSONDecodeError):
+                contexts = {}
+        imported = False
+        self._conn.execute("BEGIN IMMEDIATE")
+        try:
+            # Another session/process may have migrated while we were reading
+            if self._version(workspace) is None:
+                self._conn.executemany(
+                    "INSERT OR REPLACE INTO contexts(workspace, name, data, position) VALUES(?, ?, ?, ?)",
+                    [(workspace, name, json.dumps(data), i) for i, (name, data) in enumerate(contexts.items())],
+                )
+                self._conn.execute("INSERT INTO workspaces(workspace, version) VALUES(?, 1)", (workspace,))
+                imported = True
+            self._conn.execute("COMMIT")
+        except Exception:
+            self._conn.execute("ROLLBACK")
+            raise
+        if imported and contexts:
+            try:
+                os.replace(file_path, file_path + ".migrated")
+            except OSError:
+                pass
 
     def load_contexts(self, workspace_key: str) -> Dict[str, Dict]:
         if not workspace_key:
             return {}
-        try:
-            file_path = self.get_user_file_path(workspace_key)
-            if os.path.exists(file_path):
-                with open(file_path, "r") as f:
-                    return json.load(f)
-            return {}
-        except (FileNotFoundError, json.JSONDecodeError):
-            return {}
+        workspace = self._workspace_id(workspace_key)
+        cache_key = (os.path.abspath(self.db_path), workspace)
+        with self._lock:
+            version = self._version(workspace)
+            if version is None:
+                self._migrate_json(workspace_key, workspace)
+                version = self._version(workspace)
+            with _read_cache_lock:
+                cached = _read_cache.get(cache_key)
+            if cached is None or cached[0] != version:
+                rows = self._conn.execute(
+                    "SELECT name, data FROM contexts WHERE workspace = ? ORDER BY position", (workspace,)
+                ).fetchall()
+                cached = (version, {name: json.loads(data) for name, data in rows})
+                with _read_cache_lock:
+                    _read_cache[cache_key] = cached
+        # Hand out copies so callers can't mutate the shared cache
+        return {name: dict(data) for name, data in cached[1].items()}
+
+    def _write(self, workspace_key: str, upserts: Dict[str, Dict], deletes: List[str], replace_all: bool = False) -> None:
+        workspace = self._workspace_id(workspace_key)
+        with self._lock:
+            if self._version(workspace) is None:
+                self._migrate_json(workspace_key, workspace)
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                if replace_all:
+                    self._conn.execute("DELETE FROM contexts WHERE workspace = ?", (workspace,))
+                if deletes:
+                    self._conn.executemany(
+                        "DELETE FROM contexts WHERE workspace = ? AND name = ?",
+                        [(workspace, name) for name in deletes],
+                    )
+                next_pos = self._conn.execute(
+                    "SELECT COALESCE(MAX(position), -1) + 1 FROM contexts WHERE workspace = ?", (workspace,)
+                ).fetchone()[0]
+                for name, data in upserts.items():
+                    existing = self._conn.execute(
+                        "SELECT position FROM contexts WHERE workspace = ? AND name = ?", (workspace, name)
+                    ).fetchone()
+                    position = existing[0] if existing else next_pos
+                    if not existing:
+                        next_pos += 1
+                    self._conn.execute(
+                        "INSERT OR REPLACE INTO contexts(workspace, name, data, position) VALUES(?, ?, ?, ?)",
+                        (workspace, name, json.dumps(data), position),
+                    )
+                self._conn.execute("UPDATE workspaces SET version = version + 1 WHERE workspace = ?", (workspace,))
+                self._conn.execute("COMMIT")
+            except Exception:
+                self._conn.execute("ROLLBACK")
+                raise
 
     def save_contexts(self, contexts: Dict[str, Dict], workspace_key: str) -> None:
         if not workspace_key:
             return
-        file_path = self.get_user_file_path(workspace_key)
-        with open(file_path, "w") as f:
-            json.dump(contexts, f, indent=2)
+        self._write(workspace_key, contexts, [], replace_all=True)
 
     def get_context_names(self, workspace_key: str) -> List[str]:
         return list(self.load_contexts(workspace_key).keys())
@@ -48,18 +173,13 @@ class ContextManager:
     def save_context(self, name: str, context_data: Dict, workspace_key: str) -> None:
         if not workspace_key:
             return
-        contexts = self.load_contexts(workspace_key)
         context_data["last_updated"] = datetime.now().isoformat()
-        contexts[name] = context_data
-        self.save_contexts(contexts, workspace_key)
+        self._write(workspace_key, {name: context_data}, [])
 
     def delete_context(self, name: str, workspace_key: str) -> None:
         if not workspace_key:
             return
-        contexts = self.load_contexts(workspace_key)
-        if name in contexts:
-            del contexts[name]
-            self.save_contexts(contexts, workspace_key)
+        self._write(workspace_key, {}, [name])
 
     def export_context(self, name: str, workspace_key: str) -> Optional[str]:
         context = self.get_context(name, workspace_key)
@@ -111,11 +231,17 @@ def create_default_context() -> Dict:
     return {
         "company_name": "",
         "company_context": "",
+        "long_template": DEFAULT_TEMPLATE,
+        "short_template": DEFAULT_TEMPLATE,
         "created": now,
         "last_updated": now,
     }
 
 
+def _template_index(names: List[str], name: Optional[str]) -> int:
+    return names.index(name) if name in names else 0
+
+
 def render_context_selector(context_manager: ContextManager):
     workspace_key = st.session_state.workspace_key
     context_names = context_manager.get_context_names(workspace_key)
@@ -188,6 +314,22 @@ def render_context_editor(context_manager: ContextManager, context_name: Optiona
             help="Add general background, tone, priorities, examples, and any guidance that should inform blog writing.",
         )
 
+        template_names = get_template_registry().names()
+        col_long, col_short = st.columns(2)
+        with col_long:
+            long_template = st.selectbox(
+                "Long blog template:",
+                options=template_names,
+                index=_template_index(template_names, context_data.get("long_template")),
+                help="Templates are blog_prompt_template.txt (default) plus any prompt_templates/<name>.txt file.",
+            )
+        with col_short:
+            short_template = st.selectbox(
+                "Short blog template:",
+                options=template_names,
+                index=_template_index(template_names, context_data.get("short_template")),
+            )
+
         st.write("---")
         col1, col2, col3 = st.columns(3)
 
@@ -200,6 +342,8 @@ def render_context_editor(context_manager: ContextManager, context_name: Optiona
                 updated = {
                     "company_name": final_name,
                     "company_context": company_context_text.strip(),
+                    "long_template": long_template,
+                    "short_template": short_template,
                 }
                 context_manager.save_context(final_name, updated, workspace_key)
                 st.success(f"Saved '{final_name}'!")
@@ -0,0 +1,145 @@
+"""
+Corpus-wide document frequencies for TF-IDF keyword scoring, hashed into
+buckets and kept in SQLite so several processes can add articles at once.
+
+Configuration (env vars):
+- BLOGBUDDY_CORPUS_PATH: model database (default cache/corpus.db)
+"""
+
+import hashlib
+import os
+import sqlite3
+import threading
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+from sklearn.feature_extraction.text import CountVectorizer
+from sklearn.utils import murmurhash3_32
+
+DEFAULT_PATH = os.path.join("cache", "corpus.db")
+N_FEATURES = 2 ** 20
+CANDIDATE_TERMS = 50
+_SQL_VARS = 500  # bound parameters per IN (...) query
+
+INCREMENT_BUCKET = "INSERT INTO df(bucket, n) VALUES(?, 1) ON CONFLICT(bucket) DO UPDATE SET n = n + 1"
+
+
+def _fingerprint(text: str) -> int:
+    # Signed, so it fits an SQLite INTEGER
+    return int.from_bytes(hashlib.blake2b(text.encode("utf-8"), digest_size=8).digest(), "little", signed=True)
+
+
+def term_buckets(terms) -> np.ndarray:
+    return np.fromiter(
+        (murmurhash3_32(t, positive=True) % N_FEATURES for t in terms),
+        dtype=np.int64,
+        count=len(terms),
+    )
+
+
+class CorpusModel:
+    def __init__(self, path: str = DEFAULT_PATH):
+        self.path = path
+        self._lock = threading.Lock()
+        directory = os.path.dirname(path)
+        if directory and not os.path.exists(directory):
+            os.makedirs(directory, exist_ok=True)
+        # Autocommit mode: writes use explicit BEGIN IMMEDIATE transactions
+        self._conn = sqlite3.connect(path, check_same_thread=False, timeout=30, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("CREATE TABLE IF NOT EXISTS df (bucket INTEGER PRIMARY KEY, n INTEGER NOT NULL)")
+        self._conn.execute("CREATE TABLE IF NOT EXISTS seen (fingerprint INTEGER PRIMARY KEY)")
+        self._conn.execute("CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value INTEGER)")
+
+    def _n_docs(self) -> int:
+        # Caller holds self._lock
+        row = self._conn.execute("SELECT value FROM meta WHERE key = 'n_docs'").fetchone()
+        return int(row[0]) if row else 0
+
+    def add_documents(self, texts: List[str], buckets_per_doc: List[np.ndarray]) -> int:
+        """Count each unseen document once. Returns how many were new."""
+        new = 0
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                for text, buckets in zip(texts, buckets_per_doc):
+                    # Ignored when any process counted this text before, including earlier in this batch
+                    if self._conn.execute(
+                        "INSERT OR IGNORE INTO seen(fingerprint) VALUES(?)", (_fingerprint(text),)
+                    ).rowcount == 0:
+                        continue
+                    self._conn.executemany(INCREMENT_BUCKET, ((b,) for b in np.unique(buckets).tolist()))
+                    new += 1
+                if new:
+                    self._conn.execute(
+                        "INSERT INTO meta(key, value) VALUES('n_docs', ?) "
+                        "ON CONFLICT(key) DO UPDATE SET value = value + excluded.value",
+                        (new,),
+                    )
+                self._conn.execute("COMMIT")
+            except Exception:
+                self._conn.execute("ROLLBACK")
+                raise
+        return new
+
+    def document_frequencies(self, buckets: np.ndarray) -> Tuple[int, np.ndarray]:
+        """The corpus document count and the document frequency of each bucket."""
+        wanted = np.unique(buckets).tolist()
+        found: Dict[int, int] = {}
+        with self._lock:
+            for i in range(0, len(wanted), _SQL_VARS):
+                chunk = wanted[i:i + _SQL_VARS]
+                found.update(self._conn.execute(
+                    f"SELECT bucket, n FROM df WHERE bucket IN ({','.join('?' * len(chunk))})", chunk
+                ).fetchall())
+            n_docs = self._n_docs()
+        return n_docs, np.array([found.get(int(b), 0) for b in buckets], dtype=np.float64)
+
+    def top_keywords(self, texts: List[str], top_n: int = 10, update: bool = True) -> List[Tuple[str, float]]:
+        """
+        Score the run's texts against corpus-wide IDF: candidates are the
+        most frequent terms in these texts, ranked by summed l2-normalized
+        TF-IDF. With ``update`` the texts are added to the corpus first.
+        """
+        texts = [t for t in texts if t and t.strip()]
+        if not texts:
+            return []
+        counter = CountVectorizer(stop_words="english")
+        try:
+            counts = counter.fit_transform(texts)
+        except ValueError:  # only stop words / empty vocabulary
+            return []
+        terms = counter.get_feature_names_out()
+        buckets = term_buckets(terms)
+
+        if update:
+            per_doc = [buckets[counts.indices[counts.indptr[i]:counts.indptr[i + 1]]] for i in range(counts.shape[0])]
+            self.add_documents(texts, per_doc)
+
+        # Restrict to the most frequent terms of this run, as before
+        totals = np.asarray(counts.sum(axis=0)).ravel()
+        candidates = np.argsort(-totals, kind="stable")[:CANDIDATE_TERMS]
+        n_docs, df = self.document_frequencies(buckets[candidates])
+        n_docs = max(n_docs, len(texts))
+
+        idf = np.log((1.0 + n_docs) / (1.0 + df)) + 1.0
+        tf = counts[:, candidates].toarray().astype(np.float64)
+        tfidf = tf * idf
+        norms = np.linalg.norm(tfidf, axis=1, keepdims=True)
+        norms[norms == 0] = 1.0
+        scores = (tfidf / norms).sum(axis=0)
+
+        order = np.argsort(-scores, kind="stable")[:top_n]
+        return [(str(terms[candidates[i]]), float(scores[i])) for i in order]
+
+
+_model: Optional[CorpusModel] = None
+_model_lock = threading.Lock()
+
+
+def get_corpus_model() -> CorpusModel:
+    global _model
+    with _model_lock:
+        if _model is None:
+            _model = CorpusModel(os.getenv("BLOGBUDDY_CORPUS_PATH", DEFAULT_PATH))
+        return _model
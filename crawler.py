@@ -0,0 +1,206 @@
+"""
+Background crawler for the Trending watchlist (the ``worker`` entry in the Procfile).
+
+The default parser only understands the fixture format described in
+``parse_posts``; crawling real profile pages needs a site-specific parser
+passed to ``HttpFetcher``.
+
+Usage:
+    python crawler.py               # loop forever
+    python crawler.py --once        # single cycle, then exit
+"""
+
+import argparse
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timezone
+from typing import Callable, Dict, List, Optional
+from urllib.parse import urlsplit
+
+from bs4 import BeautifulSoup
+
+from scraper import get_session
+from trending import due_profiles, enable_wal, ensure_schema, store_crawl
+
+log = logging.getLogger("blogbuddy.crawler")
+
+FETCH_TIMEOUT = 15
+MAX_WORKERS = 4
+HOST_MIN_INTERVAL = 2.0  # seconds between requests to the same host
+POLL_INTERVAL = 300  # seconds between scheduling cycles
+
+
+def utc_now() -> str:
+    # Same text format as SQLite's datetime('now') so comparisons stay consistent
+    return datetime.now(timezone.utc).strftime("%Y-%m-%d %H:%M:%S")
+
+
+def _normalize_timestamp(value) -> Optional[str]:
+    if not value:
+        return None
+    try:
+        parsed = datetime.fromisoformat(str(value).replace("Z", "+00:00"))
+    except ValueError:
+        return None
+    if parsed.tzinfo:
+        parsed = parsed.astimezone(timezone.utc).replace(tzinfo=None)
+    return parsed.strftime("%Y-%m-%d %H:%M:%S")
+
+
+def _int(value) -> int:
+    try:
+        return int(str(value).replace(",", ""))
+    except (TypeError, ValueError):
+        return 0
+
+
+def parse_posts(body: str, profile_url: str) -> List[Dict]:
+    """Fixture parser: a JSON list of posts, or elements carrying ``data-post-url``,
+    ``data-posted-at``, ``data-reactions`` and ``data-comments``. Real sites don't
+    serve either, so it only works against a local fixture server."""
+    try:
+        data = json.loads(body)
+        items = data.get("posts", []) if isinstance(data, dict) else data
+        return [
+            {
+                "post_url": item.get("post_url") or item.get("url"),
+                "posted_at": item.get("posted_at"),
+                "reactions": item.get("reactions"),
+                "comments": item.get("comments"),
+                "snippet": item.get("snippet") or item.get("text"),
+            }
+            for item in items
+            if isinstance(item, dict)
+        ]
+    except ValueError:
+        pass
+
+    soup = BeautifulSoup(body, "html.parser")
+    posts = []
+    for node in soup.find_all(attrs={"data-post-url": True}):
+        posts.append({
+            "post_url": node["data-post-url"],
+            "posted_at": node.get("data-posted-at"),
+            "reactions": node.get("data-reactions"),
+            "comments": node.get("data-comments"),
+            "snippet": node.get_text(" ", strip=True)[:500],
+        })
+    return posts
+
+
+class HostRateLimiter:
+    """Spaces out requests to the same host by at least ``min_interval`` seconds."""
+
+    def __init__(self, min_interval: float = HOST_MIN_INTERVAL):
+        self.min_interval = min_interval
+        self._next_slot: Dict[str, float] = {}
+        self._lock = threading.Lock()
+
+    def wait(self, url: str) -> None:
+        host = urlsplit(url).netloc.lower()
+        with self._lock:
+            now = time.monotonic()
+            slot = max(now, self._next_slot.get(host, 0.0))
+            self._next_slot[host] = slot + self.min_interval
+        if slot > now:
+            time.sleep(slot - now)
+
+
+class HttpFetcher:
+    """GETs each profile URL and hands the body to ``parser``. The default
+    ``parse_posts`` only handles fixture markup; pass a real parser for live sites."""
+
+    def __init__(self, parser: Callable[[str, str], List[Dict]] = parse_posts,
+                 limiter: Optional[HostRateLimiter] = None, timeout: float = FETCH_TIMEOUT):
+        self.parser = parser
+        self.limiter = limiter or HostRateLimiter()
+        self.timeout = timeout
+
+    def fetch(self, profile: Dict) -> List[Dict]:
+        url = profile["profile_url"]
+        self.limiter.wait(url)
+        res = get_session().get(url, timeout=self.timeout)
+        res.raise_for_status()
+        return self.parser(res.text, url)
+
+
+def _crawl_profile(fetcher, profile: Dict, fetched_at: str) -> List[Dict]:
+    posts = []
+    for post in fetcher.fetch(profile):
+        if not post.get("post_url"):
+            continue
+        posts.append({
+            "profile_id": profile["id"],
+            "post_url": post["post_url"],
+            "posted_at": _normalize_timestamp(post.get("posted_at")),
+            "reactions": _int(post.get("reactions")),
+            "comments": _int(post.get("comments")),
+            "snippet": post.get("snippet"),
+            "fetched_at": fetched_at,
+        })
+    # Newest first, capped at the profile's max_per_crawl
+    posts.sort(key=lambda p: p["posted_at"] or "", reverse=True)
+    return posts[: max(0, profile.get("max_per_crawl") or 10)]
+
+
+def run_once(conn: sqlite3.Connection, fetcher=None, max_workers: int = MAX_WORKERS) -> Dict[str, int]:
+    """Crawl every due profile once and store the results in a single transaction."""
+    fetcher = fetcher or HttpFetcher()
+    profiles = due_profiles(conn)
+    stats = {"profiles": len(profiles), "failed": 0, "posts": 0}
+    if not profiles:
+        return stats
+
+    fetched_at = utc_now()
+    all_posts: List[Dict] = []
+    crawled_ids: List[int] = []
+    with ThreadPoolExecutor(max_workers=max(1, min(max_workers, len(profiles)))) as pool:
+        futures = [(p, pool.submit(_crawl_profile, fetcher, p, fetched_at)) for p in profiles]
+        for profile, future in futures:
+            try:
+                all_posts.extend(future.result())
+            except Exception as e:
+                stats["failed"] += 1
+                log.warning("crawl failed for %s: %s", profile["profile_url"], e)
+            # Failed profiles are stamped too, so they wait a full period before retrying
+            crawled_ids.append(profile["id"])
+
+    store_crawl(conn, all_posts, crawled_ids, fetched_at)
+    stats["posts"] = len(all_posts)
+    return stats
+
+
+def connect(db_path: str) -> sqlite3.Connection:
+    conn = sqlite3.connect(db_path, timeout=30)
+    enable_wal(conn)
+    ensure_schema(conn)
+    return conn
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Crawl due watchlist profiles into the posts table.")
+    parser.add_argument("--db", default=os.getenv("BLOGBUDDY_DB", "data.db"))
+    parser.add_argument("--once", action="store_true", help="run a single cycle and exit")
+    parser.add_argument("--interval", type=float, default=float(os.getenv("BLOGBUDDY_CRAWL_INTERVAL", POLL_INTERVAL)))
+    parser.add_argument("--workers", type=int, default=MAX_WORKERS)
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(name)s %(levelname)s %(message)s")
+    conn = connect(args.db)
+    fetcher = HttpFetcher()
+    while True:
+        stats = run_once(conn, fetcher, args.workers)
+        if stats["profiles"]:
+            log.info("crawled %(profiles)d profiles (%(failed)d failed), stored %(posts)d posts", stats)
+        if args.once:
+            return 0
+        time.sleep(args.interval)
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,341 @@
+"""
+Background jobs that outlive the Streamlit script run that started them.
+
+A Streamlit button handler dies with its script run: any widget interaction,
+or a closed tab, throws the work away. Long-blog generation is therefore
+submitted here instead. It runs on a small per-process worker pool and
+records its status, current stage, progress, partial draft and final result
+in a SQLite job table. Any later script run (including one after a browser
+reload) polls the table by job id.
+
+Workers are shared fairly: pending jobs are kept in one FIFO per owner (a
+Streamlit session) and dispatched round-robin across owners, so one user
+queueing several blogs doesn't hold up everyone else. Each owner may have
+MAX_ACTIVE jobs queued or running at once. Jobs that were queued or running
+when the process stopped are queued again on the next start.
+
+Handlers are plain functions ``handler(params, report) -> result dict``.
+Progress follows the pipeline's metrics spans: each job runs inside a trace
+whose ``on_stage`` callback maps stage names to (progress, label) through the
+table given to ``register``. ``report(progress=..., partial=...)`` adds
+finer-grained updates; ``partial`` may be a callable, which is only rendered
+when a partial-draft write is due. If the job was cancelled, ``report``
+raises JobCancelled.
+
+Configuration (env vars):
+- BLOGBUDDY_JOBS_DB: path to the job table (default cache/jobs.db)
+- BLOGBUDDY_JOB_WORKERS: jobs run at once per process (default 2)
+- BLOGBUDDY_JOB_MAX_ACTIVE: queued + running jobs allowed per owner (default 3)
+- BLOGBUDDY_JOB_RETENTION_DAYS: finished jobs are deleted after this long (default 7)
+"""
+
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+import uuid
+from collections import deque
+from dataclasses import dataclass
+from typing import Callable, Deque, Dict, List, Optional, Tuple
+
+from metrics import trace
+
+log = logging.getLogger("blogbuddy.jobs")
+
+DEFAULT_PATH = os.path.join("cache", "jobs.db")
+DEFAULT_WORKERS = 2
+DEFAULT_MAX_ACTIVE = 3
+DEFAULT_RETENTION_DAYS = 7
+PARTIAL_INTERVAL = 0.5  # seconds between partial-draft writes
+
+QUEUED, RUNNING, DONE, ERROR, CANCELLED = "queued", "running", "done", "error", "cancelled"
+ACTIVE = (QUEUED, RUNNING)
+
+Handler = Callable[[Dict, Callable], Dict]
+
+
+class QueueFull(ValueError):
+    pass
+
+
+class JobCancelled(Exception):
+    pass
+
+
+class JobFailed(Exception):
+    """Raised by a handler for an expected failure; ``result`` is kept (e.g. warnings)."""
+
+    def __init__(self, message: str, result: Optional[Dict] = None):
+        super().__init__(message)
+        self.result = result or {}
+
+
+@dataclass
+class Job:
+    id: str
+    owner: str
+    workspace: Optional[str]
+    kind: str
+    label: str
+    params: Dict
+    status: str
+    stage: str
+    progress: float
+    partial: str
+    result: Optional[Dict]
+    error: Optional[str]
+    created_at: float
+    started_at: Optional[float]
+    finished_at: Optional[float]
+
+    @property
+    def done(self) -> bool:
+        return self.status not in ACTIVE
+
+
+_COLUMNS = ("id, owner, workspace, kind, label, params, status, stage, progress, partial, result, error, "
+            "created_at, started_at, finished_at")
+
+
+def _job_from_row(row) -> Job:
+    values = list(row)
+    values[5] = json.loads(values[5] or "{}")
+    values[10] = json.loads(values[10]) if values[10] else None
+    return Job(*values)
+
+
+class JobQueue:
+    def __init__(self, path: str = DEFAULT_PATH, workers: int = DEFAULT_WORKERS,
+                 max_active: int = DEFAULT_MAX_ACTIVE, retention_days: float = DEFAULT_RETENTION_DAYS):
+        self.path = path
+        self.workers = max(1, workers)
+        self.max_active = max_active
+        self._handlers: Dict[str, Tuple[Handler, Dict[str, Tuple[float, str]]]] = {}
+        self._pending: Dict[str, Deque[str]] = {}
+        self._owners: Deque[str] = deque()  # round-robin order of owners with pending jobs
+        self._cancelled = set()
+        self._threads: List[threading.Thread] = []
+        self._lock = threading.Lock()
+        self._work = threading.Condition(self._lock)
+        directory = os.path.dirname(path)
+        if directory and not os.path.exists(directory):
+            os.makedirs(directory, exist_ok=True)
+        self._conn = sqlite3.connect(path, check_same_thread=False, timeout=30)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS jobs (
+                id TEXT PRIMARY KEY,
+                owner TEXT,
+                workspace TEXT,
+                kind TEXT,
+                label TEXT,
+                params TEXT,
+                status TEXT,
+                stage TEXT,
+                progress REAL,
+                partial TEXT,
+                result TEXT,
+                error TEXT,
+                created_at REAL,
+                started_at REAL,
+                finished_at REAL
+            );
+            """
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS idx_jobs_workspace ON jobs(workspace, created_at)")
+        self._conn.execute("CREATE INDEX IF NOT EXISTS idx_jobs_status ON jobs(status)")
+        self._conn.execute(
+            "DELETE FROM jobs WHERE status NOT IN (?, ?) AND finished_at < ?",
+            (QUEUED, RUNNING, time.time() - retention_days * 86400),
+        )
+        self._conn.commit()
+        self._restore()
+
+    def _restore(self) -> None:
+        # Work interrupted by a restart starts over; the page and AI caches make the rerun cheap
+        rows = self._conn.execute(
+            "SELECT id, owner FROM jobs WHERE status IN (?, ?) ORDER BY created_at", (QUEUED, RUNNING)
+        ).fetchall()
+        self._conn.execute(
+            "UPDATE jobs SET status = ?, stage = 'Queued (restarted)', progress = 0, partial = '' WHERE status = ?",
+            (QUEUED, RUNNING),
+        )
+        self._conn.commit()
+        for job_id, owner in rows:
+            self._enqueue(owner, job_id)
+
+    def _enqueue(self, owner: str, job_id: str) -> None:
+        # Caller holds self._lock (or is __init__)
+        if owner not in self._pending:
+            self._pending[owner] = deque()
+            self._owners.append(owner)
+        self._pending[owner].append(job_id)
+
+    def register(self, kind: str, handler: Handler, stages: Optional[Dict[str, Tuple[float, str]]] = None) -> None:
+        """Route ``kind`` jobs to ``handler``; ``stages`` maps span names to (progress, label). Starts the workers."""
+        with self._lock:
+            self._handlers[kind] = (handler, stages or {})
+            if not self._threads:
+                for i in range(self.workers):
+                    thread = threading.Thread(target=self._worker, name=f"blogbuddy-job-{i}", daemon=True)
+                    thread.start()
+                    self._threads.append(thread)
+            self._work.notify_all()
+
+    def submit(self, owner: str, kind: str, params: Dict, label: str = "", workspace: Optional[str] = None) -> str:
+        job_id = uuid.uuid4().hex
+        with self._lock:
+            active = self._conn.execute(
+                "SELECT COUNT(*) FROM jobs WHERE owner = ? AND status IN (?, ?)", (owner, QUEUED, RUNNING)
+            ).fetchone()[0]
+            if active >= self.max_active:
+                raise QueueFull(f"You already have {active} generations in progress; wait for one to finish.")
+            self._conn.execute(
+                f"INSERT INTO jobs ({_COLUMNS}) VALUES (?, ?, ?, ?, ?, ?, ?, ?, 0, '', NULL, NULL, ?, NULL, NULL)",
+                (job_id, owner, workspace, kind, label, json.dumps(params), QUEUED, "Queued", time.time()),
+            )
+            self._conn.commit()
+            self._enqueue(owner, job_id)
+            self._work.notify()
+        return job_id
+
+    def get(self, job_id: str) -> Optional[Job]:
+        with self._lock:
+            row = self._conn.execute(f"SELECT {_COLUMNS} FROM jobs WHERE id = ?", (job_id,)).fetchone()
+        return _job_from_row(row) if row else None
+
+    def recent(self, workspace: str, limit: int = 10) -> List[Job]:
+        with self._lock:
+            rows = self._conn.execute(
+                f"SELECT {_COLUMNS} FROM jobs WHERE workspace = ? ORDER BY created_at DESC LIMIT ?", (workspace, limit)
+            ).fetchall()
+        return [_job_from_row(r) for r in rows]
+
+    def waiting_ahead(self, job_id: str) -> int:
+        """Jobs that will be dispatched before ``job_id`` under round-robin (0 if it isn't queued)."""
+        with self._lock:
+            queues = [list(self._pending[o]) for o in self._owners]
+        for owner_index, queue in enumerate(queues):
+            if job_id in queue:
+                depth = queue.index(job_id)
+                # Each earlier round serves every owner that still has jobs at that depth
+                ahead = sum(min(len(q), depth) for q in queues)
+                return ahead + sum(1 for q in queues[:owner_index] if len(q) > depth)
+        return 0
+
+    def cancel(self, job_id: str) -> None:
+        with self._lock:
+            for owner, queue in list(self._pending.items()):
+                if job_id in queue:
+                    queue.remove(job_id)
+                    if not queue:
+                        del self._pending[owner]
+                        self._owners.remove(owner)
+                    self._set(job_id, status=CANCELLED, stage="Cancelled", finished_at=time.time())
+                    return
+            self._cancelled.add(job_id)  # running: stops at its next report
+
+    def _set(self, job_id: str, **fields) -> None:
+        # Caller holds self._lock
+        if "result" in fields:
+            fields["result"] = json.dumps(fields["result"], default=str) if fields["result"] is not None else None
+        assignments = ", ".join(f"{name} = ?" for name in fields)
+        self._conn.execute(f"UPDATE jobs SET {assignments} WHERE id = ?", (*fields.values(), job_id))
+        self._conn.commit()
+
+    def _next(self) -> str:
+        with self._lock:
+            while not self._owners:
+                self._work.wait()
+            owner = self._owners.popleft()
+            queue = self._pending[owner]
+            job_id = queue.popleft()
+            if queue:
+                self._owners.append(owner)
+            else:
+                del self._pending[owner]
+            return job_id
+
+    def _worker(self) -> None:
+        while True:
+            job_id = self._next()
+            try:
+                self._run(job_id)
+            except Exception:  # a broken job must never take a worker down with it
+                log.exception("job %s crashed", job_id)
+
+    def _reporter(self, job_id: str, stages: Dict[str, Tuple[float, str]]):
+        state = {"progress": 0.0, "stage": "", "partial_at": 0.0}
+
+        def report(stage: Optional[str] = None, progress: Optional[float] = None, partial: Optional[str] = None):
+            with self._lock:
+                if job_id in self._cancelled:
+                    raise JobCancelled()
+                fields = {}
+                if stage is not None and stage in stages:
+                    stage_progress, label = stages[stage]
+                    progress = max(progress or 0.0, stage_progress)
+                    if label != state["stage"]:
+                        state["stage"] = fields["stage"] = label
+                if progress is not None and progress > state["progress"] + 0.005:
+                    state["progress"] = fields["progress"] = min(progress, 1.0)
+                now = time.monotonic()
+                if partial is not None and now - state["partial_at"] >= PARTIAL_INTERVAL:
+                    state["partial_at"] = now
+                    # A callable is only rendered when a write is due
+                    fields["partial"] = partial() if callable(partial) else partial
+                if fields:
+                    self._set(job_id, **fields)
+
+        return report
+
+    def _run(self, job_id: str) -> None:
+        job = self.get(job_id)
+        if job is None or job.status != QUEUED:
+            return
+        with self._lock:
+            handler, stages = self._handlers.get(job.kind, (None, {}))
+            self._set(job_id, status=RUNNING, stage="Starting", started_at=time.time())
+        if handler is None:
+            with self._lock:
+                self._set(job_id, status=ERROR, error=f"No handler for job kind {job.kind!r}", finished_at=time.time())
+            return
+
+        report = self._reporter(job_id, stages)
+        fields = {}
+        with trace(f"job_{job.kind}", on_stage=lambda stage: report(stage=stage)) as job_trace:
+            try:
+                result = handler(job.params, report) or {}
+                fields = {"status": DONE, "stage": "Done", "progress": 1.0, "result": result}
+            except JobCancelled:
+                fields = {"status": CANCELLED, "stage": "Cancelled", "result": {}}
+            except JobFailed as e:
+                fields = {"status": ERROR, "stage": "Failed", "error": str(e), "result": e.result}
+            except Exception as e:
+                log.exception("job %s failed", job_id)
+                fields = {"status": ERROR, "stage": "Failed", "error": f"{type(e).__name__}: {e}", "result": {}}
+        fields["result"]["trace"] = job_trace.to_dict()
+        with self._lock:
+            self._cancelled.discard(job_id)
+            self._set(job_id, finished_at=time.time(), **fields)
+
+
+_queue: Optional[JobQueue] = None
+_queue_lock = threading.Lock()
+
+
+def get_job_queue() -> JobQueue:
+    """Process-wide queue shared by all Streamlit sessions."""
+    global _queue
+    with _queue_lock:
+        if _queue is None:
+            _queue = JobQueue(
+                path=os.getenv("BLOGBUDDY_JOBS_DB", DEFAULT_PATH),
+                workers=int(os.getenv("BLOGBUDDY_JOB_WORKERS", DEFAULT_WORKERS)),
+                max_active=int(os.getenv("BLOGBUDDY_JOB_MAX_ACTIVE", DEFAULT_MAX_ACTIVE)),
+                retention_days=float(os.getenv("BLOGBUDDY_JOB_RETENTION_DAYS", DEFAULT_RETENTION_DAYS)),
+            )
+        return _queue
@@ -0,0 +1,122 @@
+"""
+Single-pass keyword hyperlinker.
+
+All keywords are compiled once into one trie-shaped regular expression, so
+linking is a single left-to-right scan of the text no matter how many entries
+the keyword map has. At any position the longest keyword wins, matching is
+case-insensitive on word boundaries, and text that is already a markdown
+link, an HTML tag/anchor, a bare URL or a code span is left untouched.
+"""
+
+import re
+from typing import Dict, List, Optional
+
+# Regions that must never be re-linked, tried before any keyword at each position
+_PROTECTED = "|".join([
+    r"```[\s\S]*?```",              # fenced code blocks
+    r"`[^`\n]*`",                   # inline code spans
+    r"!?\[[^\]\n]*\]\([^)\n]*\)",   # existing markdown links / images
+    r"<a\b[^>]*>[\s\S]*?</a>",      # existing HTML anchors
+    r"<[^>\n]+>",                   # any other HTML tag
+    r"https?://[^\s)\]]+",          # bare URLs
+])
+
+
+def _build_trie(words: List[str]) -> dict:
+    trie: dict = {}
+    for word in words:
+        node = trie
+        for ch in word:
+            node = node.setdefault(ch, {})
+        node[""] = True
+    return trie
+
+
+def _trie_pattern(node: dict) -> Optional[str]:
+    """Render a trie as a regex; greedy optional groups make longer keywords win."""
+    if "" in node and len(node) == 1:
+        return None
+    alternatives, leaves = [], []
+    for ch in sorted(k for k in node if k):
+        sub = _trie_pattern(node[ch])
+        if sub is None:
+            leaves.append(re.escape(ch))
+        else:
+            alternatives.append(re.escape(ch) + sub)
+    if leaves:
+        alternatives.append(leaves[0] if len(leaves) == 1 else "[" + "".join(leaves) + "]")
+    pattern = alternatives[0] if len(alternatives) == 1 else "(?:" + "|".join(alternatives) + ")"
+    if "" in node:
+        pattern = "(?:" + pattern + ")?"
+    return pattern
+
+
+class KeywordLinker:
+    def __init__(self, mapping: Dict[str, List[str]]):
+        # First spelling of a keyword wins when keys differ only by case
+        self.urls: Dict[str, str] = {}
+        for kw, urls in mapping.items():
+            key = kw.lower()
+            if key and urls and key not in self.urls:
+                self.urls[key] = urls[0]
+        self._regex = None
+        if self.urls:
+            keywords = _trie_pattern(_build_trie(list(self.urls)))
+            self._regex = re.compile(
+                rf"(?P<skip>{_PROTECTED})|\b(?P<kw>{keywords})\b",
+                flags=re.IGNORECASE,
+            )
+
+    def _replace(self, m: "re.Match") -> str:
+        kw = m.group("kw")
+        if kw is None:
+            return m.group(0)
+        return f"[{kw}]({self.urls[kw.lower()]})"
+
+    def link(self, text: str) -> str:
+        if self._regex is None or not text:
+            return text
+        return self._regex.sub(self._replace, text)
+
+
+class StreamingLinker:
+    """
+    Links a streamed document paragraph by paragraph. Completed paragraphs
+    (terminated by a blank line outside a ``` fence) are linked once as they
+    arrive; the unfinished tail, including any open code block, is shown raw
+    until its paragraph ends or ``finish``.
+    """
+
+    def __init__(self, linker: KeywordLinker):
+        self.linker = linker
+        self.paragraphs: List[str] = []
+        self.tail = ""
+        # Where the next feed resumes scanning the tail, and whether a fence is open there
+        self._scan = 0
+        self._fenced = False
+
+    def feed(self, delta: str) -> None:
+        self.tail += delta
+        pos, fenced = self._scan, self._fenced
+        while True:
+            fence = self.tail.find("```", pos)
+            cut = -1 if fenced else self.tail.find("\n\n", pos)
+            if cut >= 0 and (fence < 0 or cut < fence):
+                self.paragraphs.append(self.linker.link(self.tail[:cut]))
+                self.tail, pos = self.tail[cut + 2:], 0
+            elif fence >= 0:
+                fenced, pos = not fenced, fence + 3
+            else:
+                break
+        # The last two characters may start a fence or blank line the next delta completes
+        self._scan, self._fenced = max(pos, len(self.tail) - 2), fenced
+
+    def render(self) -> str:
+        return "\n\n".join(self.paragraphs + [self.tail])
+
+    def finish(self) -> str:
+        if self.tail:
+            self.paragraphs.append(self.linker.link(self.tail))
+            self.tail = ""
+        self._scan, self._fenced = 0, False
+        return "\n\n".join(self.paragraphs)
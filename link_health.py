@@ -0,0 +1,146 @@
+"""
+Concurrent, cached health checks for authority links.
+
+Each link is probed with a HEAD request, falling back to a one-byte ranged GET
+for servers that reject HEAD. Results are cached process-wide with separate
+TTLs for healthy and broken links, and checks already in flight are shared,
+so a background pre-warm of technical_links.json makes verification on the
+request path essentially free. The pre-warm runs on its own small pool and is
+repeated whenever the pool file changes; a request that needs a link whose
+pre-warm check hasn't started yet takes it over instead of queueing behind it.
+"""
+
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+
+from metrics import record_request, submit_in_context
+from scraper import get_session
+
+CHECK_TIMEOUT = 5
+MAX_WORKERS = 8
+PREWARM_WORKERS = 2
+POSITIVE_TTL = 24 * 3600
+NEGATIVE_TTL = 15 * 60
+
+_results: Dict[str, Tuple[bool, float]] = {}
+_inflight: Dict[str, Future] = {}
+_lock = threading.Lock()
+_executor: Optional[ThreadPoolExecutor] = None
+_prewarm_executor: Optional[ThreadPoolExecutor] = None
+_background: Set[Future] = set()  # pre-warm checks, which requests may take over
+_prewarmed: Dict[str, int] = {}  # pool path -> file version last pre-warmed
+
+
+def _get_executor() -> ThreadPoolExecutor:
+    global _executor
+    if _executor is None:
+        _executor = ThreadPoolExecutor(max_workers=MAX_WORKERS, thread_name_prefix="link-health")
+    return _executor
+
+
+def _get_prewarm_executor() -> ThreadPoolExecutor:
+    global _prewarm_executor
+    if _prewarm_executor is None:
+        _prewarm_executor = ThreadPoolExecutor(max_workers=PREWARM_WORKERS, thread_name_prefix="link-prewarm")
+    return _prewarm_executor
+
+
+def check_link(url: str, timeout: float = CHECK_TIMEOUT) -> bool:
+    """Uncached probe: HEAD first, then a ranged GET if HEAD is refused or fails."""
+    session = get_session()
+    start = time.perf_counter()
+    try:
+        res = session.head(url, timeout=timeout, allow_redirects=True)
+        record_request(url, res.status_code, 0, time.perf_counter() - start, method="HEAD")
+        if res.status_code == 200:
+            return True
+    except Exception as e:
+        record_request(url, None, 0, time.perf_counter() - start, method="HEAD", error=type(e).__name__)
+    start = time.perf_counter()
+    try:
+        res = session.get(url, timeout=timeout, headers={"Range": "bytes=0-0"}, stream=True)
+        res.close()
+        record_request(url, res.status_code, 0, time.perf_counter() - start, method="GET")
+        return res.status_code in (200, 206)
+    except Exception as e:
+        record_request(url, None, 0, time.perf_counter() - start, method="GET", error=type(e).__name__)
+        return False
+
+
+def _cached(url: str) -> Optional[bool]:
+    # Caller holds _lock
+    entry = _results.get(url)
+    if entry is None:
+        return None
+    healthy, checked_at = entry
+    ttl = POSITIVE_TTL if healthy else NEGATIVE_TTL
+    if time.time() - checked_at > ttl:
+        return None
+    return healthy
+
+
+def _run_check(url: str) -> bool:
+    healthy = check_link(url)
+    with _lock:
+        _results[url] = (healthy, time.time())
+        _inflight.pop(url, None)
+    return healthy
+
+
+def _submit(url: str, background: bool = False) -> Future:
+    # Caller holds _lock
+    future = _inflight.get(url)
+    if future is not None and not background and future in _background and future.cancel():
+        # Still queued behind the pre-warm: check it now on the request pool instead
+        _background.discard(future)
+        future = None
+    if future is None:
+        executor = _get_prewarm_executor() if background else _get_executor()
+        future = _inflight[url] = submit_in_context(executor, _run_check, url)
+        if background:
+            _background.add(future)
+            future.add_done_callback(_background.discard)
+    return future
+
+
+def verify_links(urls: Iterable[str]) -> List[str]:
+    """Return the healthy subset of ``urls``, preserving order and dropping duplicates."""
+    ordered = list(dict.fromkeys(urls))
+    status: Dict[str, bool] = {}
+    pending: Dict[str, Future] = {}
+    with _lock:
+        for url in ordered:
+            cached = _cached(url)
+            if cached is None:
+                pending[url] = _submit(url)
+            else:
+                status[url] = cached
+    for url, future in pending.items():
+        try:
+            status[url] = future.result()
+        except Exception:
+            status[url] = False
+    return [url for url in ordered if status.get(url)]
+
+
+def prewarm(urls: Iterable[str]) -> None:
+    """Queue background checks for every link not already cached; returns immediately."""
+    with _lock:
+        for url in dict.fromkeys(urls):
+            if _cached(url) is None:
+                _submit(url, background=True)
+
+
+def prewarm_pool(path: Optional[str] = None) -> None:
+    """Pre-warm every link in the technical pool file, again whenever the file changes. Cheap to call often."""
+    from resources import KEYWORD_MAP_PATH, json_resource
+    path = path or KEYWORD_MAP_PATH
+    resource = json_resource(path)
+    pool = resource.get()
+    with _lock:
+        if _prewarmed.get(path) == resource.version:
+            return
+        _prewarmed[path] = resource.version
+    prewarm(url for links in pool.values() for url in links or ())
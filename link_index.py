@@ -0,0 +1,145 @@
+"""
+Ranked authority-link lookup over the curated technical pool.
+
+Every topic in technical_links.json (plus its aliases) is tokenized once into
+a token trie. Matching a keyword walks the trie from each of its token
+positions, so lookup cost depends on the keyword, not on how many topics the
+pool has. Matching is on whole words after light normalization (case,
+hyphens, a trailing plural "s"), so "Zero-Trust" and "zero trust" meet but
+"trust" no longer matches inside "distrust".
+
+A link's score is the sum, over every keyword/topic match that yields it, of
+the keyword's weight times the match strength: 1.0 when the keyword is the
+topic, ALIAS_STRENGTH for an alias, and the fraction of the keyword the topic
+covers when the topic is only part of a longer keyword. Ties keep the order
+of the pool file.
+
+Aliases are optional and live beside the pool in link_aliases.json
+(BLOGBUDDY_LINK_ALIASES) as ``{"zero trust": ["ztna", "zero trust architecture"]}``.
+When either file changes, only the topics whose links or aliases differ are
+re-indexed.
+"""
+
+import re
+import threading
+from typing import Dict, Iterable, List, Mapping, Optional, Sequence, Tuple, Union
+
+ALIAS_STRENGTH = 0.9
+_TOKEN = re.compile(r"[a-z0-9]+")
+_END = None  # trie key holding {topic: strength} for sequences that end here
+
+
+def normalize(text: str) -> Tuple[str, ...]:
+    tokens = []
+    for token in _TOKEN.findall(text.lower()):
+        if len(token) > 3 and token.endswith("s") and not token.endswith("ss"):
+            token = token[:-1]
+        tokens.append(token)
+    return tuple(tokens)
+
+
+def _variants(topic: str, aliases: Sequence[str]) -> Dict[Tuple[str, ...], float]:
+    """Token sequences that stand for ``topic``, with their match strength."""
+    variants: Dict[Tuple[str, ...], float] = {}
+    tokens = normalize(topic)
+    if tokens:
+        variants[tokens] = 1.0
+        if len(tokens) > 1:
+            variants.setdefault(("".join(tokens),), ALIAS_STRENGTH)  # "zerotrust"
+    for alias in aliases:
+        alias_tokens = normalize(alias)
+        if alias_tokens:
+            variants.setdefault(alias_tokens, ALIAS_STRENGTH)
+    return variants
+
+
+def keyword_weights(kw_guidance: Iterable[Tuple[str, Union[str, float]]],
+                    tfidf_keywords: Iterable[Tuple[str, float]]) -> Dict[str, float]:
+    """
+    One weight per keyword from both analyses. Each list is scaled so its top
+    keyword weighs 1.0, and a keyword found by both gets both weights.
+    """
+    weights: Dict[str, float] = {}
+    for pairs in (kw_guidance, tfidf_keywords):
+        values = [(kw, float(str(v).rstrip("%") or 0)) for kw, v in pairs]
+        top = max((v for _, v in values), default=0.0) or 1.0
+        for kw, v in values:
+            weights[kw] = weights.get(kw, 0.0) + v / top
+    return weights
+
+
+class LinkIndex:
+    def __init__(self, pool: Optional[Mapping[str, List[str]]] = None,
+                 aliases: Optional[Mapping[str, List[str]]] = None):
+        self._trie: dict = {}
+        self._entries: Dict[str, Tuple[Tuple[str, ...], Tuple[str, ...]]] = {}  # topic -> (links, aliases)
+        self._link_order: Dict[str, int] = {}
+        self._lock = threading.Lock()
+        self.update(pool or {}, aliases)
+
+    def _insert(self, topic: str, tokens: Tuple[str, ...], strength: float) -> None:
+        node = self._trie
+        for token in tokens:
+            node = node.setdefault(token, {})
+        node.setdefault(_END, {})[topic] = strength
+
+    def _remove(self, topic: str, tokens: Tuple[str, ...]) -> None:
+        node = self._trie
+        for token in tokens:
+            node = node.get(token)
+            if node is None:
+                return
+        node.get(_END, {}).pop(topic, None)
+
+    def update(self, pool: Mapping[str, List[str]], aliases: Optional[Mapping[str, List[str]]] = None) -> int:
+        """Re-index only the topics that were added, removed or changed. Returns how many."""
+        aliases = aliases or {}
+        new = {topic: (tuple(links or ()), tuple(aliases.get(topic, ()))) for topic, links in pool.items()}
+        with self._lock:
+            changed = [t for t in self._entries if new.get(t) != self._entries[t]]
+            for topic in changed:
+                for tokens in _variants(topic, self._entries[topic][1]):
+                    self._remove(topic, tokens)
+                del self._entries[topic]
+            added = [t for t in new if t not in self._entries]
+            for topic in added:
+                self._entries[topic] = new[topic]
+                for tokens, strength in _variants(topic, new[topic][1]).items():
+                    self._insert(topic, tokens, strength)
+            self._link_order = {}
+            for topic in pool:
+                for link in new[topic][0]:
+                    self._link_order.setdefault(link, len(self._link_order))
+            return len(set(changed) | set(added))
+
+    def _match_topics(self, keyword: str) -> Dict[str, float]:
+        tokens = normalize(keyword)
+        found: Dict[str, float] = {}
+        for start in range(len(tokens)):
+            node = self._trie
+            for end in range(start, len(tokens)):
+                node = node.get(tokens[end])
+                if node is None:
+                    break
+                for topic, strength in node.get(_END, {}).items():
+                    coverage = (end - start + 1) / len(tokens)
+                    found[topic] = max(found.get(topic, 0.0), strength * coverage)
+        return found
+
+    def scored(self, keywords: Mapping[str, float]) -> List[Tuple[str, float]]:
+        """(link, score) pairs for weighted ``keywords``, best first."""
+        scores: Dict[str, float] = {}
+        with self._lock:
+            for keyword, weight in keywords.items():
+                for topic, strength in self._match_topics(keyword).items():
+                    for link in self._entries[topic][0]:
+                        scores[link] = scores.get(link, 0.0) + weight * strength
+            order = self._link_order
+            return sorted(scores.items(), key=lambda kv: (-kv[1], order.get(kv[0], 0)))
+
+    def match(self, keywords: Mapping[str, float]) -> List[str]:
+        """Links for weighted ``keywords``, best first."""
+        return [link for link, _ in self.scored(keywords)]
+
+    def __len__(self) -> int:
+        return len(self._entries)
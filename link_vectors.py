@@ -0,0 +1,165 @@
+"""
+Content-similarity index over the curated technical links.
+
+Topic matching (link_index.py) only finds a link when one of its topic names
+shows up among the run's keywords. This index looks at what the linked pages
+actually say: an offline build scrapes every curated link once (through the
+page cache), hashes its text into a fixed number of TF-IDF features and
+stores the l2-normalized rows as a float32 ``.npy`` matrix. The app
+memory-maps that file, so every process on the dyno shares one copy. A query
+(the competitor articles, or the draft blog) is vectorized the same way and
+scored against every link with a single matrix-vector product. Everything is
+local; there is no embedding service.
+
+Files, all next to BLOGBUDDY_LINK_VECTORS (default cache/link_vectors):
+- ``<path>.npy``: one row per link
+- ``<path>.idf.npy``: IDF weights of the link corpus
+- ``<path>.json``: URLs, their topics, dimensions and build time (written last)
+
+Build or refresh it with:
+    python link_vectors.py [--pool technical_links.json] [--refresh]
+"""
+
+import argparse
+import json
+import os
+import sys
+import time
+from typing import Dict, Iterable, List, Sequence, Tuple
+
+DEFAULT_PATH = os.path.join("cache", "link_vectors")
+DIMS = int(os.getenv("BLOGBUDDY_LINK_VECTOR_DIMS", 2 ** 12))
+MIN_SCORE = 0.05
+
+
+def _vectorizer(dims: int):
+    from sklearn.feature_extraction.text import HashingVectorizer
+    return HashingVectorizer(n_features=dims, alternate_sign=False, norm=None, stop_words="english")
+
+
+def _normalize_rows(matrix):
+    import numpy as np
+    norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+    norms[norms == 0] = 1.0
+    return matrix / norms
+
+
+def vectorize(texts: Sequence[str], idf, dims: int):
+    """l2-normalized TF-IDF rows (float32) for ``texts``."""
+    import numpy as np
+    counts = _vectorizer(dims).transform(texts)
+    counts.data = 1.0 + np.log(counts.data)  # sublinear tf: long pages don't drown out short ones
+    return _normalize_rows(counts.toarray().astype(np.float32) * idf)
+
+
+def build(pool: Dict[str, List[str]], path: str = DEFAULT_PATH, dims: int = DIMS,
+          use_cache: bool = True) -> Tuple[int, List[str]]:
+    """Scrape every link in ``pool`` and write the index. Returns (links indexed, links that failed)."""
+    import numpy as np
+    from pipeline import scrape_articles
+
+    topics: Dict[str, List[str]] = {}
+    for topic, links in pool.items():
+        for link in links or ():
+            topics.setdefault(link, []).append(topic)
+    urls = list(topics)
+    texts, failed = scrape_articles(urls, use_cache=use_cache)
+    urls = [u for u in urls if u in texts]
+    if not urls:
+        return 0, list(failed)
+
+    # Topic names are part of each document, so a thin page still carries its curated label
+    docs = [" ".join(topics[u]) + "\n" + texts[u] for u in urls]
+    counts = _vectorizer(dims).transform(docs)
+    df = np.bincount(counts.indices, minlength=dims)
+    idf = (np.log((1.0 + len(docs)) / (1.0 + df)) + 1.0).astype(np.float32)
+    matrix = vectorize(docs, idf, dims)
+
+    directory = os.path.dirname(path)
+    if directory and not os.path.exists(directory):
+        os.makedirs(directory, exist_ok=True)
+    # Matrix and IDF first, metadata last: readers key off the metadata file
+    for suffix, array in ((".npy", matrix), (".idf.npy", idf)):
+        tmp = f"{path}.{os.getpid()}.tmp{suffix}"
+        np.save(tmp, array)
+        os.replace(tmp, path + suffix)
+    meta = {"urls": urls, "topics": [topics[u] for u in urls], "dims": dims, "built_at": time.time()}
+    tmp = f"{path}.{os.getpid()}.tmp.json"
+    with open(tmp, "w") as f:
+        json.dump(meta, f)
+    os.replace(tmp, path + ".json")
+    return len(urls), list(failed)
+
+
+class LinkVectors:
+    """A loaded index; empty (no suggestions) when nothing has been built yet."""
+
+    def __init__(self, urls: List[str], topics: List[List[str]], matrix, idf, dims: int):
+        self.urls = urls
+        self.topics = topics
+        self.matrix = matrix
+        self.idf = idf
+        self.dims = dims
+
+    @classmethod
+    def load(cls, meta_path: str) -> "LinkVectors":
+        import numpy as np
+        with open(meta_path, "r") as f:
+            meta = json.load(f)
+        path = meta_path[:-len(".json")]
+        matrix = np.load(path + ".npy", mmap_mode="r")
+        idf = np.load(path + ".idf.npy")
+        if matrix.shape != (len(meta["urls"]), meta["dims"]) or idf.shape != (meta["dims"],):
+            raise ValueError(f"{path}: index files are out of step; rebuild with python link_vectors.py")
+        return cls(meta["urls"], meta["topics"], matrix, idf, meta["dims"])
+
+    def __len__(self) -> int:
+        return len(self.urls)
+
+    def suggest(self, texts: Iterable[str], k: int = 5, exclude: Iterable[str] = (),
+                min_score: float = MIN_SCORE) -> List[Tuple[str, float]]:
+        """The ``k`` links most similar to ``texts`` taken together, as (url, cosine score)."""
+        import numpy as np
+        texts = [t for t in texts if t and t.strip()]
+        if not texts or not self.urls:
+            return []
+        # Each text counts equally, however long it is
+        query = _normalize_rows(vectorize(texts, self.idf, self.dims).sum(axis=0, keepdims=True))[0]
+        scores = np.asarray(self.matrix @ query)
+        excluded = set(exclude)
+        top = np.argsort(-scores, kind="stable")[:k + len(excluded)]
+        return [(self.urls[i], float(scores[i])) for i in top
+                if scores[i] >= min_score and self.urls[i] not in excluded][:k]
+
+
+_EMPTY = LinkVectors([], [], None, None, DIMS)
+
+
+def get_link_vectors() -> LinkVectors:
+    """The shared index, reloaded when a rebuild replaces the metadata file."""
+    from resources import file_resource
+    meta_path = os.getenv("BLOGBUDDY_LINK_VECTORS", DEFAULT_PATH) + ".json"
+    return file_resource(meta_path, LinkVectors.load, default=_EMPTY, kind="link_vectors").get()
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Scrape the curated links and build the similarity index.")
+    parser.add_argument("--pool", default="technical_links.json", help="topic -> links JSON file")
+    parser.add_argument("--out", default=os.getenv("BLOGBUDDY_LINK_VECTORS", DEFAULT_PATH),
+                        help="index path prefix")
+    parser.add_argument("--dims", type=int, default=DIMS, help="hashed feature dimensions")
+    parser.add_argument("--refresh", action="store_true", help="re-download pages instead of using the page cache")
+    args = parser.parse_args(argv)
+
+    with open(args.pool, "r") as f:
+        pool = json.load(f)
+    started = time.monotonic()
+    indexed, failed = build(pool, args.out, args.dims, use_cache=not args.refresh)
+    for url in failed:
+        print(f"[skipped] {url}", file=sys.stderr)
+    print(f"Indexed {indexed} links ({len(failed)} skipped) in {time.monotonic() - started:.1f}s -> {args.out}.npy")
+    return 0 if indexed else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,175 @@
+"""
+OpenAI chat-completion helpers.
+
+``call_openai`` returns the whole completion; ``stream_openai`` yields content
+deltas as they arrive so the UI can render tokens immediately. Point
+OPENAI_API_BASE at a local fake server to exercise either path offline.
+
+Both accept ``use_cache`` (defaults to BLOGBUDDY_LLM_CACHE) to serve repeat
+prompts from the response cache in llm_cache.py, and ``force_refresh`` to
+skip the lookup and overwrite the stored answer.
+
+Each call is timed as an ``llm`` span (streams also note time to first
+token) and reported as an outbound request to the chat-completions endpoint.
+
+Uncached calls first reserve their estimated tokens from the process-wide
+RPM/TPM budget in rate_limit.py, and a 429, 5xx, timeout or dropped
+connection is retried with backoff (honouring Retry-After) up to
+BLOGBUDDY_OPENAI_RETRIES times; a 429 for an exhausted quota is raised at once. A stream is only retried before its first
+chunk arrives.
+"""
+
+import os
+import time
+from typing import Iterator, Optional
+
+import openai
+import openai.error
+
+from company_config import openai_api_base, openai_api_key
+from llm_cache import CACHE_ENABLED_BY_DEFAULT, cache_key, get_llm_cache
+from metrics import record_request, span
+from rate_limit import backoff_delay, get_rate_limiter
+
+MODEL = "gpt-4-turbo"
+TEMPERATURE = 0.7
+SYSTEM_PROMPT = "You are a concise, insightful summarizer and formatter."
+# Reserved against the TPM budget on top of the prompt; the model usually writes less
+EXPECTED_COMPLETION_TOKENS = 1000
+MAX_RETRIES = int(os.getenv("BLOGBUDDY_OPENAI_RETRIES", 4))
+
+_RETRYABLE = (
+    openai.error.RateLimitError,
+    openai.error.ServiceUnavailableError,
+    openai.error.Timeout,
+    openai.error.APIConnectionError,
+    openai.error.TryAgain,
+)
+# A 429 with one of these codes means the account is out of credit, not too fast; retrying can't help
+QUOTA_CODES = {"insufficient_quota"}
+
+openai.api_key = openai_api_key
+if openai_api_base:
+    openai.api_base = openai_api_base
+
+
+def _messages(prompt: str):
+    return [
+        {"role": "system", "content": SYSTEM_PROMPT},
+        {"role": "user", "content": prompt},
+    ]
+
+
+def _cache_enabled(use_cache: Optional[bool]) -> bool:
+    return CACHE_ENABLED_BY_DEFAULT if use_cache is None else use_cache
+
+
+def _endpoint() -> str:
+    return f"{openai.api_base.rstrip('/')}/chat/completions"
+
+
+def _error_code(e: Exception) -> Optional[str]:
+    # openai 0.x doesn't set .code on a RateLimitError; the code is in the JSON body
+    body = getattr(e, "json_body", None)
+    error = body.get("error") if isinstance(body, dict) else None
+    if isinstance(error, dict) and (error.get("code") or error.get("type")):
+        return error.get("code") or error.get("type")
+    return getattr(e, "code", None)
+
+
+def _is_retryable(e: Exception) -> bool:
+    if isinstance(e, openai.error.RateLimitError) and _error_code(e) in QUOTA_CODES:
+        return False
+    if isinstance(e, _RETRYABLE):
+        return True
+    status = getattr(e, "http_status", None)
+    return isinstance(e, openai.error.APIError) and status is not None and status >= 500
+
+
+def _retry_after(e: Exception) -> Optional[float]:
+    headers = getattr(e, "headers", None) or {}
+    try:
+        return float(headers.get("retry-after") or headers.get("Retry-After"))
+    except (TypeError, ValueError):
+        return None
+
+
+def _create(messages, attrs, **kwargs):
+    """ChatCompletion.create within the rate budget, retrying transient failures."""
+    from summarize import count_tokens
+
+    tokens = sum(count_tokens(m["content"]) for m in messages) + EXPECTED_COMPLETION_TOKENS
+    waited = get_rate_limiter().acquire(tokens)
+    if waited:
+        attrs["rate_wait_seconds"] = round(waited, 3)
+    for attempt in range(MAX_RETRIES + 1):
+        start = time.monotonic()
+        try:
+            return openai.ChatCompletion.create(
+                model=MODEL,
+                messages=messages,
+                temperature=TEMPERATURE,
+                **kwargs,
+            )
+        except Exception as e:
+            record_request(_endpoint(), getattr(e, "http_status", None), 0, time.monotonic() - start,
+                           error=type(e).__name__)
+            if attempt >= MAX_RETRIES or not _is_retryable(e):
+                raise
+            attrs["retries"] = attempt + 1
+            time.sleep(backoff_delay(attempt, _retry_after(e)))
+            # A retry spends another request from the budget, but its tokens were already reserved
+            get_rate_limiter().acquire(1)
+
+
+def call_openai(prompt, use_cache: Optional[bool] = None, force_refresh: bool = False):
+    messages = _messages(prompt)
+    cache = get_llm_cache() if _cache_enabled(use_cache) else None
+    key = cache_key(MODEL, messages, TEMPERATURE) if cache else None
+    with span("llm", stream=False, cached=False) as attrs:
+        if cache and not force_refresh:
+            cached = cache.get(key)
+            if cached is not None:
+                attrs["cached"] = True
+                return cached
+
+        start = time.monotonic()
+        res = _create(messages, attrs)
+        content = res.choices[0].message.content.strip()
+        record_request(_endpoint(), 200, len(content.encode("utf-8")), time.monotonic() - start)
+        if cache:
+            cache.put(key, content, time.monotonic() - start)
+        return content
+
+
+def stream_openai(prompt, use_cache: Optional[bool] = None, force_refresh: bool = False) -> Iterator[str]:
+    """Yield content deltas from a streamed completion (a cache hit arrives as one delta)."""
+    messages = _messages(prompt)
+    cache = get_llm_cache() if _cache_enabled(use_cache) else None
+    key = cache_key(MODEL, messages, TEMPERATURE) if cache else None
+    # The span covers the whole stream, including time the consumer spends rendering
+    with span("llm", stream=True, cached=False) as attrs:
+        if cache and not force_refresh:
+            cached = cache.get(key)
+            if cached is not None:
+                attrs["cached"] = True
+                yield cached
+                return
+
+        start = time.monotonic()
+        res = _create(messages, attrs, stream=True)
+        parts = []
+        for chunk in res:
+            if not chunk.choices:
+                continue
+            delta = chunk.choices[0].get("delta", {}).get("content")
+            if delta:
+                if not parts:
+                    attrs["first_token_seconds"] = time.monotonic() - start
+                parts.append(delta)
+                yield delta
+        content = "".join(parts).strip()
+        record_request(_endpoint(), 200, len(content.encode("utf-8")), time.monotonic() - start, stream=True)
+        # Only complete streams are cached
+        if cache:
+            cache.put(key, content, time.monotonic() - start)
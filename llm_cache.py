@@ -0,0 +1,122 @@
+"""
+Content-addressed cache for chat completions.
+
+Responses are keyed by a hash of model, messages and temperature and stored
+in a SQLite file next to the page cache. Entries older than the max age are
+ignored and purged; total size is capped with least-recently-used eviction.
+Each hit records the latency of the original call so we can report how much
+time the cache saved.
+
+Configuration (env vars):
+- BLOGBUDDY_LLM_CACHE: "1" to enable by default (the UI can still toggle it)
+- BLOGBUDDY_LLM_CACHE_PATH: path to the cache database (default cache/llm.db)
+- BLOGBUDDY_LLM_CACHE_MAX_AGE: seconds before an entry expires (default 7 days)
+- BLOGBUDDY_LLM_CACHE_MAX_MB: total size before LRU eviction (default 50)
+"""
+
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+from typing import Dict, List, Optional
+
+DEFAULT_PATH = os.path.join("cache", "llm.db")
+DEFAULT_MAX_AGE = 7 * 24 * 3600
+DEFAULT_MAX_MB = 50
+
+CACHE_ENABLED_BY_DEFAULT = os.getenv("BLOGBUDDY_LLM_CACHE", "").lower() in ("1", "true", "yes", "on")
+
+
+def cache_key(model: str, messages: List[Dict[str, str]], temperature: float) -> str:
+    payload = json.dumps({"model": model, "messages": messages, "temperature": temperature}, sort_keys=True)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+class LLMCache:
+    def __init__(self, path: str = DEFAULT_PATH, max_age: float = DEFAULT_MAX_AGE, max_bytes: int = DEFAULT_MAX_MB * 1024 * 1024):
+        self.path = path
+        self.max_age = max_age
+        self.max_bytes = max_bytes
+        self.stats = {"hits": 0, "misses": 0, "saved_seconds": 0.0}
+        self._lock = threading.Lock()
+        directory = os.path.dirname(path)
+        if directory and not os.path.exists(directory):
+            os.makedirs(directory, exist_ok=True)
+        self._conn = sqlite3.connect(path, check_same_thread=False, timeout=30)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS responses (
+                key TEXT PRIMARY KEY,
+                content TEXT,
+                size INTEGER,
+                latency REAL,
+                created_at REAL,
+                accessed_at REAL
+            );
+            """
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS idx_responses_accessed ON responses(accessed_at)")
+        self._conn.commit()
+
+    def get(self, key: str) -> Optional[str]:
+        now = time.time()
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT content, latency, created_at FROM responses WHERE key = ?", (key,)
+            ).fetchone()
+            if row is None or now - row[2] > self.max_age:
+                self.stats["misses"] += 1
+                return None
+            self._conn.execute("UPDATE responses SET accessed_at = ? WHERE key = ?", (now, key))
+            self._conn.commit()
+            self.stats["hits"] += 1
+            self.stats["saved_seconds"] += row[1] or 0.0
+            return row[0]
+
+    def put(self, key: str, content: str, latency: float) -> None:
+        now = time.time()
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO responses(key, content, size, latency, created_at, accessed_at) VALUES(?, ?, ?, ?, ?, ?)",
+                (key, content, len(content.encode("utf-8")), latency, now, now),
+            )
+            self._conn.execute("DELETE FROM responses WHERE created_at < ?", (now - self.max_age,))
+            self._evict()
+            self._conn.commit()
+
+    def _evict(self) -> None:
+        # Caller holds self._lock
+        total = self._conn.execute("SELECT COALESCE(SUM(size), 0) FROM responses").fetchone()[0]
+        if total <= self.max_bytes:
+            return
+        doomed = []
+        for key, size in self._conn.execute("SELECT key, size FROM responses ORDER BY accessed_at ASC").fetchall():
+            if total <= self.max_bytes:
+                break
+            doomed.append((key,))
+            total -= size
+        self._conn.executemany("DELETE FROM responses WHERE key = ?", doomed)
+
+    def snapshot(self) -> Dict[str, float]:
+        with self._lock:
+            return dict(self.stats)
+
+
+_cache: Optional[LLMCache] = None
+_cache_lock = threading.Lock()
+
+
+def get_llm_cache() -> LLMCache:
+    """Process-wide cache instance shared by all Streamlit sessions."""
+    global _cache
+    with _cache_lock:
+        if _cache is None:
+            _cache = LLMCache(
+                path=os.getenv("BLOGBUDDY_LLM_CACHE_PATH", DEFAULT_PATH),
+                max_age=float(os.getenv("BLOGBUDDY_LLM_CACHE_MAX_AGE", DEFAULT_MAX_AGE)),
+                max_bytes=int(float(os.getenv("BLOGBUDDY_LLM_CACHE_MAX_MB", DEFAULT_MAX_MB)) * 1024 * 1024),
+            )
+        return _cache
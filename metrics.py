@@ -0,0 +1,269 @@
+"""
+Span-style timing for pipeline stages and outbound requests.
+
+Wrap a unit of work in ``trace(name)`` and its stages in ``span(stage)``;
+outbound HTTP calls report themselves with ``record_request``. A trace can
+also be given an ``on_stage`` callback, which is called as each stage starts
+(background jobs drive their progress bars with it). Each trace
+keeps its own spans/requests (for the Streamlit debug expander), while
+process-wide aggregates feed p50/p95 stage latencies and per-host stats
+shared by every session.
+
+Exports (all optional, env vars):
+- BLOGBUDDY_METRICS_LOG: append one JSON object per span/request/trace to this file
+- BLOGBUDDY_METRICS_FILE: rewrite Prometheus text metrics here after every trace
+- BLOGBUDDY_METRICS_PORT: serve Prometheus text metrics at http://0.0.0.0:<port>/metrics
+"""
+
+import json
+import logging
+import os
+import threading
+import time
+from collections import defaultdict, deque
+from contextlib import contextmanager
+from concurrent.futures import Executor, Future
+from contextvars import ContextVar, copy_context
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Callable, Dict, Iterator, List, Optional
+from urllib.parse import urlsplit
+
+log = logging.getLogger("blogbuddy.metrics")
+
+SAMPLES_PER_SERIES = 1000
+QUANTILES = (0.5, 0.95, 0.99)
+
+_lock = threading.Lock()
+_stage_samples: Dict[str, deque] = defaultdict(lambda: deque(maxlen=SAMPLES_PER_SERIES))
+_stage_totals: Dict[str, List[float]] = defaultdict(lambda: [0, 0.0])  # count, sum
+_host_samples: Dict[str, deque] = defaultdict(lambda: deque(maxlen=SAMPLES_PER_SERIES))
+_host_totals: Dict[str, Dict[str, float]] = defaultdict(lambda: {"requests": 0, "errors": 0, "seconds": 0.0, "bytes": 0})
+_log_lock = threading.Lock()
+
+
+class Trace:
+    def __init__(self, name: str, on_stage: Optional[Callable[[str], None]] = None):
+        self.name = name
+        self.on_stage = on_stage
+        self.started_at = time.time()
+        self.duration: Optional[float] = None
+        self.spans: List[Dict] = []
+        self.requests: List[Dict] = []
+        self._lock = threading.Lock()
+
+    def stage_totals(self) -> Dict[str, float]:
+        """Seconds per stage; stages that ran several times are summed."""
+        totals: Dict[str, float] = defaultdict(float)
+        with self._lock:
+            for s in self.spans:
+                totals[s["stage"]] += s["seconds"]
+        return dict(totals)
+
+    def to_dict(self) -> Dict:
+        stages = self.stage_totals()
+        with self._lock:
+            return {
+                "trace": self.name,
+                "started_at": self.started_at,
+                "seconds": self.duration,
+                "stages": stages,
+                "spans": list(self.spans),
+                "requests": list(self.requests),
+            }
+
+
+_current: ContextVar[Optional[Trace]] = ContextVar("blogbuddy_trace", default=None)
+
+
+def current_trace() -> Optional[Trace]:
+    return _current.get()
+
+
+def submit_in_context(pool: Executor, fn: Callable, *args: Any) -> Future:
+    """
+    ``pool.submit(fn, *args)``, run in a copy of the caller's context. Worker
+    threads don't inherit context variables, so without the copy the spans and
+    requests ``fn`` records would miss the caller's trace.
+    """
+    return pool.submit(copy_context().run, fn, *args)
+
+
+def _emit(record: Dict) -> None:
+    path = os.getenv("BLOGBUDDY_METRICS_LOG")
+    if log.isEnabledFor(logging.DEBUG) or path:
+        line = json.dumps(record, default=str)
+        log.debug(line)
+        if path:
+            with _log_lock, open(path, "a") as f:
+                f.write(line + "\n")
+
+
+def _observe_stage(stage: str, seconds: float) -> None:
+    with _lock:
+        _stage_samples[stage].append(seconds)
+        totals = _stage_totals[stage]
+        totals[0] += 1
+        totals[1] += seconds
+
+
+@contextmanager
+def span(stage: str, **attrs) -> Iterator[Dict]:
+    """Time a stage. The yielded dict can be filled with extra attributes."""
+    current = _current.get()
+    if current is not None and current.on_stage is not None:
+        current.on_stage(stage)
+    start = time.perf_counter()
+    try:
+        yield attrs
+    finally:
+        seconds = time.perf_counter() - start
+        _observe_stage(stage, seconds)
+        record = {"stage": stage, "seconds": seconds, **attrs}
+        trace_ = _current.get()
+        if trace_ is not None:
+            with trace_._lock:
+                trace_.spans.append(record)
+        _emit({"type": "span", "trace": trace_.name if trace_ else None, **record})
+
+
+def record_request(url: str, status: Optional[int], nbytes: int, seconds: float, **attrs) -> None:
+    host = urlsplit(url).netloc.lower()
+    failed = status is None or status >= 400
+    with _lock:
+        _host_samples[host].append(seconds)
+        totals = _host_totals[host]
+        totals["requests"] += 1
+        totals["errors"] += int(failed)
+        totals["seconds"] += seconds
+        totals["bytes"] += nbytes
+    record = {"url": url, "host": host, "status": status, "bytes": nbytes, "seconds": seconds, **attrs}
+    trace_ = _current.get()
+    if trace_ is not None:
+        with trace_._lock:
+            trace_.requests.append(record)
+    _emit({"type": "request", "trace": trace_.name if trace_ else None, **record})
+
+
+@contextmanager
+def trace(name: str, on_stage: Optional[Callable[[str], None]] = None) -> Iterator[Trace]:
+    """Collect every span/request made in this context (and contexts copied from it)."""
+    trace_ = Trace(name, on_stage)
+    token = _current.set(trace_)
+    start = time.perf_counter()
+    try:
+        yield trace_
+    finally:
+        trace_.duration = time.perf_counter() - start
+        _current.reset(token)
+        _observe_stage(f"{name}_total", trace_.duration)
+        _emit({"type": "trace", "trace": name, "seconds": trace_.duration, "stages": trace_.stage_totals()})
+        write_prometheus_file()
+
+
+def _quantile(samples: List[float], q: float) -> float:
+    if not samples:
+        return 0.0
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(round(q * (len(ordered) - 1))))]
+
+
+def stage_summary() -> Dict[str, Dict[str, float]]:
+    with _lock:
+        snapshot = {stage: (list(samples), list(_stage_totals[stage])) for stage, samples in _stage_samples.items()}
+    return {
+        stage: {"count": totals[0], "sum": totals[1], "p50": _quantile(samples, 0.5), "p95": _quantile(samples, 0.95)}
+        for stage, (samples, totals) in snapshot.items()
+    }
+
+
+def host_summary() -> Dict[str, Dict[str, float]]:
+    with _lock:
+        snapshot = {host: (list(samples), dict(_host_totals[host])) for host, samples in _host_samples.items()}
+    return {
+        host: {**totals, "p50": _quantile(samples, 0.5), "p95": _quantile(samples, 0.95)}
+        for host, (samples, totals) in snapshot.items()
+    }
+
+
+def _label(value: str) -> str:
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", " ")
+
+
+def render_prometheus() -> str:
+    lines = [
+        "# HELP blogbuddy_stage_seconds Wall time per pipeline stage.",
+        "# TYPE blogbuddy_stage_seconds summary",
+    ]
+    with _lock:
+        stages = {s: (list(samples), list(_stage_totals[s])) for s, samples in _stage_samples.items()}
+        hosts = {h: (list(samples), dict(_host_totals[h])) for h, samples in _host_samples.items()}
+    for stage, (samples, (count, total)) in sorted(stages.items()):
+        for q in QUANTILES:
+            lines.append(f'blogbuddy_stage_seconds{{stage="{_label(stage)}",quantile="{q}"}} {_quantile(samples, q):.6f}')
+        lines.append(f'blogbuddy_stage_seconds_sum{{stage="{_label(stage)}"}} {total:.6f}')
+        lines.append(f'blogbuddy_stage_seconds_count{{stage="{_label(stage)}"}} {count}')
+
+    lines += [
+        "# HELP blogbuddy_http_request_seconds Outbound request duration per host.",
+        "# TYPE blogbuddy_http_request_seconds summary",
+    ]
+    for host, (samples, totals) in sorted(hosts.items()):
+        for q in QUANTILES:
+            lines.append(f'blogbuddy_http_request_seconds{{host="{_label(host)}",quantile="{q}"}} {_quantile(samples, q):.6f}')
+        lines.append(f'blogbuddy_http_request_seconds_sum{{host="{_label(host)}"}} {totals["seconds"]:.6f}')
+        lines.append(f'blogbuddy_http_request_seconds_count{{host="{_label(host)}"}} {totals["requests"]}')
+    lines += ["# HELP blogbuddy_http_request_errors_total Failed outbound requests per host.",
+              "# TYPE blogbuddy_http_request_errors_total counter"]
+    for host, (_, totals) in sorted(hosts.items()):
+        lines.append(f'blogbuddy_http_request_errors_total{{host="{_label(host)}"}} {totals["errors"]}')
+    lines += ["# HELP blogbuddy_http_response_bytes_total Bytes downloaded per host.",
+              "# TYPE blogbuddy_http_response_bytes_total counter"]
+    for host, (_, totals) in sorted(hosts.items()):
+        lines.append(f'blogbuddy_http_response_bytes_total{{host="{_label(host)}"}} {totals["bytes"]}')
+    return "\n".join(lines) + "\n"
+
+
+def write_prometheus_file(path: Optional[str] = None) -> None:
+    path = path or os.getenv("BLOGBUDDY_METRICS_FILE")
+    if not path:
+        return
+    tmp = f"{path}.{os.getpid()}.tmp"
+    with open(tmp, "w") as f:
+        f.write(render_prometheus())
+    os.replace(tmp, path)
+
+
+class _MetricsHandler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        if self.path.split("?")[0] != "/metrics":
+            self.send_response(404)
+            self.end_headers()
+            return
+        body = render_prometheus().encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", "text/plain; version=0.0.4")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+_server: Optional[ThreadingHTTPServer] = None
+
+
+def start_metrics_server(port: Optional[int] = None) -> Optional[ThreadingHTTPServer]:
+    """Serve /metrics once per process; a no-op without a port."""
+    global _server
+    port = port or int(os.getenv("BLOGBUDDY_METRICS_PORT", "0") or 0)
+    with _lock:
+        if _server is not None or not port:
+            return _server
+        try:
+            _server = ThreadingHTTPServer(("0.0.0.0", port), _MetricsHandler)
+        except OSError as e:
+            log.warning("metrics endpoint not started on port %s: %s", port, e)
+            return None
+    threading.Thread(target=_server.serve_forever, daemon=True, name="metrics-server").start()
+    return _server
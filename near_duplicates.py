@@ -0,0 +1,224 @@
+"""
+Near-duplicate detection for scraped articles.
+
+Search results for a news topic are often syndicated copies of one wire story
+on different domains, so URL canonicalization (urlnorm.py) can't catch them.
+Each article is reduced to a MinHash signature over 5-word shingles; the
+fraction of matching signature slots estimates the Jaccard similarity of the
+two texts. Candidate pairs come from LSH banding, so comparing n articles
+costs roughly O(n) rather than O(n^2).
+
+Signatures and duplicate relations are kept in a small SQLite index. A URL
+already known to duplicate another URL in the same request is not fetched
+again, and an unchanged text reuses its stored signature.
+
+Configuration (env vars):
+- BLOGBUDDY_FINGERPRINTS: path to the fingerprint database (default cache/fingerprints.db)
+- BLOGBUDDY_DUP_THRESHOLD: estimated Jaccard similarity that counts as a duplicate (default 0.8)
+- BLOGBUDDY_SKIP_KNOWN_DUPLICATES: skip fetching known duplicates (default 1)
+"""
+
+import os
+import re
+import sqlite3
+import threading
+import time
+import zlib
+from typing import Dict, Iterable, List, Optional
+
+from urlnorm import canonical_url
+
+DEFAULT_PATH = os.path.join("cache", "fingerprints.db")
+DUP_THRESHOLD = float(os.getenv("BLOGBUDDY_DUP_THRESHOLD", 0.8))
+SKIP_KNOWN_DUPLICATES = os.getenv("BLOGBUDDY_SKIP_KNOWN_DUPLICATES", "1") != "0"
+SHINGLE_WORDS = 5
+NUM_PERM = 64
+BANDS = 16  # 4 rows per band: pairs above ~0.5 similarity almost always share a band
+
+_MERSENNE = (1 << 61) - 1
+_WORD = re.compile(r"\w+")
+_perms = None
+
+
+def _permutations():
+    # Fixed seed: signatures must stay comparable across processes and runs
+    global _perms
+    if _perms is None:
+        import numpy as np
+        rng = np.random.RandomState(1337)
+        _perms = (
+            rng.randint(1, 1 << 31, size=NUM_PERM, dtype=np.uint64),
+            rng.randint(0, 1 << 31, size=NUM_PERM, dtype=np.uint64),
+        )
+    return _perms
+
+
+def shingles(text: str) -> List[int]:
+    """32-bit hashes of the overlapping SHINGLE_WORDS-word windows of ``text``."""
+    words = _WORD.findall(text.lower())
+    if len(words) < SHINGLE_WORDS:
+        return []
+    return list({
+        zlib.crc32(" ".join(words[i:i + SHINGLE_WORDS]).encode("utf-8"))
+        for i in range(len(words) - SHINGLE_WORDS + 1)
+    })
+
+
+def minhash(text: str):
+    """MinHash signature (NUM_PERM uint64 values), or None for texts too short to shingle."""
+    import numpy as np
+    hashes = shingles(text)
+    if not hashes:
+        return None
+    a, b = _permutations()
+    x = np.asarray(hashes, dtype=np.uint64)[:, None]
+    # a < 2**31 and x < 2**32, so a*x + b stays below 2**64 before the modulus
+    return ((a * x + b) % np.uint64(_MERSENNE)).min(axis=0)
+
+
+def similarity(sig_a, sig_b) -> float:
+    """Estimated Jaccard similarity of the texts behind two signatures."""
+    return float((sig_a == sig_b).mean())
+
+
+def _band_keys(signature) -> List[bytes]:
+    rows = NUM_PERM // BANDS
+    return [bytes([i]) + signature[i * rows:(i + 1) * rows].tobytes() for i in range(BANDS)]
+
+
+def find_near_duplicates(signatures: Dict[str, object], threshold: float = DUP_THRESHOLD) -> Dict[str, str]:
+    """
+    Map each duplicate URL to the earlier URL it copies. ``signatures`` is in
+    priority order (the first of a group is kept); None signatures are ignored.
+    """
+    buckets: Dict[bytes, List[str]] = {}
+    duplicates: Dict[str, str] = {}
+    for url, signature in signatures.items():
+        if signature is None:
+            continue
+        keys = _band_keys(signature)
+        candidates = dict.fromkeys(c for key in keys for c in buckets.get(key, ()))
+        for candidate in candidates:
+            if similarity(signature, signatures[candidate]) >= threshold:
+                duplicates[url] = candidate
+                break
+        else:
+            # Only originals go into the buckets, so every duplicate points at a kept URL
+            for key in keys:
+                buckets.setdefault(key, []).append(url)
+    return duplicates
+
+
+class FingerprintIndex:
+    def __init__(self, path: str = DEFAULT_PATH):
+        self.path = path
+        self.stats = {"signatures_reused": 0, "duplicates_found": 0, "fetches_skipped": 0}
+        self._lock = threading.Lock()
+        directory = os.path.dirname(path)
+        if directory and not os.path.exists(directory):
+            os.makedirs(directory, exist_ok=True)
+        self._conn = sqlite3.connect(path, check_same_thread=False, timeout=30)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS fingerprints (
+                url TEXT PRIMARY KEY,
+                text_crc INTEGER,
+                signature BLOB,
+                duplicate_of TEXT,
+                seen_at REAL
+            );
+            """
+        )
+        self._conn.commit()
+
+    def signature(self, url: str, text: str):
+        """Signature for ``text``, reused from the index when the text hasn't changed."""
+        import numpy as np
+        key, crc = canonical_url(url), zlib.crc32(text.encode("utf-8"))
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT text_crc, signature FROM fingerprints WHERE url = ?", (key,)
+            ).fetchone()
+        if row and row[0] == crc and row[1]:
+            with self._lock:
+                self.stats["signatures_reused"] += 1
+            return np.frombuffer(row[1], dtype=np.uint64)
+        signature = minhash(text)
+        with self._lock:
+            self._conn.execute(
+                """
+                INSERT INTO fingerprints (url, text_crc, signature, duplicate_of, seen_at) VALUES (?, ?, ?, NULL, ?)
+                ON CONFLICT(url) DO UPDATE SET text_crc = excluded.text_crc, signature = excluded.signature,
+                    seen_at = excluded.seen_at
+                """,
+                (key, crc, signature.tobytes() if signature is not None else None, time.time()),
+            )
+            self._conn.commit()
+        return signature
+
+    def record_duplicates(self, checked: Iterable[str], duplicates: Dict[str, str]) -> None:
+        """Store this run's verdicts: ``duplicates`` map to their originals, the rest of ``checked`` to none."""
+        now = time.time()
+        rows = [(canonical_url(u), canonical_url(duplicates[u]) if u in duplicates else None, now) for u in checked]
+        with self._lock:
+            self._conn.executemany(
+                """
+                INSERT INTO fingerprints (url, duplicate_of, seen_at) VALUES (?, ?, ?)
+                ON CONFLICT(url) DO UPDATE SET duplicate_of = excluded.duplicate_of, seen_at = excluded.seen_at
+                """,
+                rows,
+            )
+            self._conn.commit()
+            self.stats["duplicates_found"] += len(duplicates)
+
+    def known_duplicates(self, urls: Iterable[str]) -> Dict[str, str]:
+        """
+        URLs that needn't be fetched: each is known to copy the same original
+        as an earlier URL in ``urls``. Maps the skipped URL to the URL kept.
+        """
+        urls = list(urls)
+        keys = {u: canonical_url(u) for u in urls}
+        with self._lock:
+            rows = self._conn.execute(
+                f"SELECT url, duplicate_of FROM fingerprints WHERE duplicate_of IS NOT NULL "
+                f"AND url IN ({','.join('?' * len(keys))})",
+                list(keys.values()),
+            ).fetchall() if keys else []
+        original = dict(rows)
+        kept: Dict[str, str] = {}
+        skipped: Dict[str, str] = {}
+        for url in urls:
+            root = original.get(keys[url], keys[url])
+            if root in kept:
+                skipped[url] = kept[root]
+            else:
+                kept[root] = url
+        with self._lock:
+            self.stats["fetches_skipped"] += len(skipped)
+        return skipped
+
+    def forget(self, urls: Iterable[str]) -> None:
+        """Drop duplicate relations for ``urls`` (e.g. when the page they point at stopped working)."""
+        with self._lock:
+            self._conn.executemany(
+                "UPDATE fingerprints SET duplicate_of = NULL WHERE url = ?", [(canonical_url(u),) for u in urls]
+            )
+            self._conn.commit()
+
+    def snapshot(self) -> Dict[str, int]:
+        with self._lock:
+            return dict(self.stats)
+
+
+_index: Optional[FingerprintIndex] = None
+_index_lock = threading.Lock()
+
+
+def get_fingerprint_index() -> FingerprintIndex:
+    """Process-wide index shared by all Streamlit sessions."""
+    global _index
+    with _index_lock:
+        if _index is None:
+            _index = FingerprintIndex(os.getenv("BLOGBUDDY_FINGERPRINTS", DEFAULT_PATH))
+        return _index
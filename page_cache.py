@@ -0,0 +1,169 @@
+"""
+Persistent on-disk cache for scraped pages.
+
+Entries are keyed by canonical URL and hold the raw body plus the extracted
+article text and snippet format, so a repeat run on the same story skips both
+the download and the parse. Stale entries are revalidated with conditional GETs
+(ETag / Last-Modified). The store is a single SQLite file, which makes it
+shared by every Streamlit session (and process) on the dyno; total size is
+capped with least-recently-used eviction.
+
+Configuration (env vars):
+- BLOGBUDDY_PAGE_CACHE: path to the cache database (default cache/pages.db)
+- BLOGBUDDY_PAGE_CACHE_TTL: seconds an entry is served without revalidation (default 21600)
+- BLOGBUDDY_PAGE_CACHE_MAX_MB: total body size before LRU eviction kicks in (default 200)
+"""
+
+import os
+import sqlite3
+import threading
+import time
+import zlib
+from typing import Dict, Optional
+
+from urlnorm import canonical_url
+
+DEFAULT_PATH = os.path.join("cache", "pages.db")
+DEFAULT_TTL = 6 * 3600
+DEFAULT_MAX_MB = 200
+
+
+class CachedPage:
+    def __init__(self, url: str, html: str, etag: Optional[str], last_modified: Optional[str],
+                 fetched_at: float, text: Optional[str], snippet_format: Optional[str]):
+        self.url = url
+        self.html = html
+        self.etag = etag
+        self.last_modified = last_modified
+        self.fetched_at = fetched_at
+        self.text = text
+        self.snippet_format = snippet_format
+
+
+class PageCache:
+    def __init__(self, path: str = DEFAULT_PATH, ttl: float = DEFAULT_TTL, max_bytes: int = DEFAULT_MAX_MB * 1024 * 1024):
+        self.path = path
+        self.ttl = ttl
+        self.max_bytes = max_bytes
+        self.stats = {"hits": 0, "revalidated": 0, "misses": 0, "stores": 0, "evictions": 0}
+        self._lock = threading.Lock()
+        directory = os.path.dirname(path)
+        if directory and not os.path.exists(directory):
+            os.makedirs(directory, exist_ok=True)
+        self._conn = sqlite3.connect(path, check_same_thread=False, timeout=30)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS pages (
+                url TEXT PRIMARY KEY,
+                body BLOB,
+                size INTEGER,
+                etag TEXT,
+                last_modified TEXT,
+                fetched_at REAL,
+                accessed_at REAL,
+                text TEXT,
+                snippet_format TEXT
+            );
+            """
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS idx_pages_accessed ON pages(accessed_at)")
+        self._conn.commit()
+
+    def is_fresh(self, page: CachedPage) -> bool:
+        return (time.time() - page.fetched_at) < self.ttl
+
+    def get(self, url: str) -> Optional[CachedPage]:
+        key = canonical_url(url)
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT body, etag, last_modified, fetched_at, text, snippet_format FROM pages WHERE url = ?",
+                (key,),
+            ).fetchone()
+            if row is None:
+                return None
+            self._conn.execute("UPDATE pages SET accessed_at = ? WHERE url = ?", (time.time(), key))
+            self._conn.commit()
+        body, etag, last_modified, fetched_at, text, snippet_format = row
+        html = zlib.decompress(body).decode("utf-8", errors="replace")
+        return CachedPage(url, html, etag, last_modified, fetched_at, text, snippet_format)
+
+    def put(self, url: str, html: str, etag: Optional[str] = None, last_modified: Optional[str] = None) -> None:
+        """Store a freshly downloaded body. Any previously extracted text is dropped."""
+        key = canonical_url(url)
+        body = zlib.compress(html.encode("utf-8"))
+        now = time.time()
+        with self._lock:
+            self._conn.execute(
+                """
+                INSERT OR REPLACE INTO pages(url, body, size, etag, last_modified, fetched_at, accessed_at, text, snippet_format)
+                VALUES(?, ?, ?, ?, ?, ?, ?, NULL, NULL)
+                """,
+                (key, body, len(body), etag, last_modified, now, now),
+            )
+            self._conn.commit()
+            self.stats["stores"] += 1
+            self._evict()
+
+    def touch(self, url: str) -> None:
+        """Mark an entry as revalidated (the origin answered 304 Not Modified)."""
+        now = time.time()
+        with self._lock:
+            self._conn.execute(
+                "UPDATE pages SET fetched_at = ?, accessed_at = ? WHERE url = ?",
+                (now, now, canonical_url(url)),
+            )
+            self._conn.commit()
+
+    def store_extraction(self, url: str, text: Optional[str], snippet_format: Optional[str] = None) -> None:
+        with self._lock:
+            self._conn.execute(
+                "UPDATE pages SET text = ?, snippet_format = COALESCE(?, snippet_format) WHERE url = ?",
+                (text, snippet_format, canonical_url(url)),
+            )
+            self._conn.commit()
+
+    def record(self, outcome: str) -> None:
+        with self._lock:
+            self.stats[outcome] += 1
+
+    def total_bytes(self) -> int:
+        with self._lock:
+            return self._conn.execute("SELECT COALESCE(SUM(size), 0) FROM pages").fetchone()[0]
+
+    def _evict(self) -> None:
+        # Caller holds self._lock
+        total = self._conn.execute("SELECT COALESCE(SUM(size), 0) FROM pages").fetchone()[0]
+        if total <= self.max_bytes:
+            return
+        rows = self._conn.execute("SELECT url, size FROM pages ORDER BY accessed_at ASC").fetchall()
+        doomed = []
+        for url, size in rows:
+            if total <= self.max_bytes:
+                break
+            doomed.append((url,))
+            total -= size
+        self._conn.executemany("DELETE FROM pages WHERE url = ?", doomed)
+        self._conn.commit()
+        self.stats["evictions"] += len(doomed)
+
+    def snapshot(self) -> Dict[str, int]:
+        with self._lock:
+            return dict(self.stats)
+
+
+_cache: Optional[PageCache] = None
+_cache_lock = threading.Lock()
+
+
+def get_page_cache() -> PageCache:
+    """Process-wide cache instance shared by all Streamlit sessions."""
+    global _cache
+    with _cache_lock:
+        if _cache is None:
+            _cache = PageCache(
+                path=os.getenv("BLOGBUDDY_PAGE_CACHE", DEFAULT_PATH),
+                ttl=float(os.getenv("BLOGBUDDY_PAGE_CACHE_TTL", DEFAULT_TTL)),
+                max_bytes=int(float(os.getenv("BLOGBUDDY_PAGE_CACHE_MAX_MB", DEFAULT_MAX_MB)) * 1024 * 1024),
+            )
+        return _cache
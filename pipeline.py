@@ -0,0 +1,402 @@
+"""
+Streamlit-free long-blog pipeline.
+
+Search, scraping, readability, keyword analysis, link matching and prompt
+building live here so both the Streamlit app and the headless batch CLI can
+drive them. Nothing in this module touches ``st``; problems are collected in
+``Research.warnings`` for the caller to surface.
+
+textstat (which pulls in nltk and scipy), the scikit-learn corpus model and
+openai are imported inside the stages that use them, so importing this module
+from app.py stays cheap until a blog is actually generated.
+"""
+
+import os
+import re
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from dataclasses import asdict, dataclass, field, fields
+from typing import Callable, Dict, Iterator, List, Optional, Tuple
+
+from jobs import JobFailed
+from keyword_linker import KeywordLinker, StreamingLinker
+from link_index import keyword_weights
+from link_vectors import get_link_vectors
+from link_health import verify_links
+from metrics import span, submit_in_context
+from near_duplicates import SKIP_KNOWN_DUPLICATES, find_near_duplicates, get_fingerprint_index
+from prompt_templates import SOCIAL_SECTION, TemplateError, get_template_registry
+from research_store import bundle_key, get_research_store
+from resources import KEYWORD_MAP_PATH, get_keyword_linker, get_link_index, read_json_resource
+from scraper import MIN_ARTICLE_CHARS, extract_page, fetch_pages, remember_extraction
+from search import search
+from summarize import prepare_article
+from urlnorm import dedupe_urls
+
+SUGGESTED_LINKS = 5
+SHORT_BATCH_WORKERS = int(os.getenv("BLOGBUDDY_SHORT_BATCH_WORKERS", 4))
+STOPWORDS = set("the and that with this from have which will would there their what when where while about these those been because could into upon some other than then they them were such only also very many more most over your ours ourselves hers herself his himself yourself yourselves does did had has was are not for but you its our can may might shall should must been who whom how why each few both same once".split())
+
+
+@dataclass
+class Research:
+    """Everything the analysis stage produces for build_prompt."""
+    comp_urls: List[str]
+    tech_urls: List[str]
+    article_texts: List[str] = field(default_factory=list)
+    avg_read: Optional[float] = None
+    kw_guidance: List[Tuple[str, str]] = field(default_factory=list)
+    tfidf_keywords: List[Tuple[str, float]] = field(default_factory=list)
+    format_summary: str = "unknown"
+    news_links: List[str] = field(default_factory=list)
+    authority_links: List[str] = field(default_factory=list)
+    solution_links: List[str] = field(default_factory=list)
+    # Curated links whose content resembles the articles, beyond the topic matches
+    suggested_links: List[str] = field(default_factory=list)
+    # Near-duplicate URL -> the URL whose copy was analyzed instead
+    duplicates: Dict[str, str] = field(default_factory=dict)
+    warnings: List[str] = field(default_factory=list)
+
+    @property
+    def ok(self) -> bool:
+        return self.avg_read is not None
+
+
+def google_search_urls(query, num=5):
+    """Result links only; use search.search() to see cache hits and errors."""
+    return search(query, num).urls
+
+def extract_keywords(text):
+    words = re.findall(r"\w+", text.lower())
+    filtered = [w for w in words if w not in STOPWORDS and len(w) > 4]
+    return Counter(filtered).most_common(10)
+
+def keyword_share(counter):
+    total = sum(counter.values())
+    return [(kw, f"{(cnt/total)*100:.1f}%") for kw, cnt in counter.most_common(10)] if total else []
+
+def compute_tfidf_keywords(texts):
+    """Top TF-IDF terms for this run, weighted by IDF from every article seen so far."""
+    if not texts:
+        return []
+    from corpus_model import get_corpus_model
+    return get_corpus_model().top_keywords(texts, top_n=10)
+
+def load_tagged_technical_pool(filepath=KEYWORD_MAP_PATH):
+    return read_json_resource(filepath)
+
+def build_prompt(avg_read, kw_guidance, tfidf_keywords, user_additional_info, format_summary,
+                 news_links, authority_links, solution_links,
+                 company_context_text: str, template_name: Optional[str] = None):
+    """Render the named template (default: blog_prompt_template.txt). Raises TemplateError if it is invalid."""
+    template = get_template_registry().get(template_name)
+    kw_lines = "\n".join([f"- {kw}: {share}" for kw, share in kw_guidance])
+    tfidf_lines = "\n".join([f"- {kw} (priority keyword)" for kw, _ in tfidf_keywords])
+
+    return template.render(
+        kw_lines=kw_lines,
+        tfidf_lines=tfidf_lines,
+        company_context=company_context_text,
+        user_additional_info=user_additional_info,
+        format_summary=format_summary,
+        news_links=", ".join([f"[{url}]({url})" for url in news_links]),
+        authority_links=", ".join([f"[{url}]({url})" for url in authority_links]),
+        solution_links=", ".join([f"[{url}]({url})" for url in solution_links]),
+        avg_read=avg_read
+    )
+
+
+def _extract_all(pages) -> None:
+    for page in pages.values():
+        if page.ok and (page.text is None or page.snippet_format is None):
+            with span("extract", url=page.url, chars=len(page.html)):
+                page.text, page.snippet_format = extract_page(page.url, page.html)
+            remember_extraction(page)
+
+
+def _readable(page) -> bool:
+    return page.ok and page.text is not None and len(page.text) >= MIN_ARTICLE_CHARS
+
+
+def _fetch_without_duplicates(urls: List[str], research: Research):
+    """
+    Fetch and extract ``urls``, leaving out copies of the same story: known
+    duplicates aren't downloaded at all, and newly spotted ones are recorded.
+    """
+    index = get_fingerprint_index()
+    skipped = index.known_duplicates(urls) if SKIP_KNOWN_DUPLICATES else {}
+    pages = fetch_pages([u for u in urls if u not in skipped])
+    _extract_all(pages)
+    # If the copy we kept didn't come through this time, fall back to the skipped ones
+    retry = [u for u, kept in skipped.items() if not _readable(pages[kept])]
+    if retry:
+        index.forget(retry)
+        pages.update(fetch_pages(retry))
+        _extract_all(pages)
+        for url in retry:
+            del skipped[url]
+
+    with span("near_duplicates", docs=len(pages)):
+        readable = [u for u in urls if u in pages and _readable(pages[u])]
+        signatures = {u: index.signature(u, pages[u].text) for u in readable}
+        found = find_near_duplicates(signatures)
+        index.record_duplicates(readable, found)
+    research.duplicates = {**skipped, **found}
+    return pages
+
+
+def run_research(comp_urls: List[str], tech_urls: List[str]) -> Research:
+    """Scrape and analyze competitor/technical URLs. Check ``.ok`` before prompting."""
+    import textstat
+
+    # Canonical URLs, one per story, so AMP/mobile/tracking variants aren't scraped twice
+    comp_urls = dedupe_urls(comp_urls)
+    tech_urls = dedupe_urls(tech_urls, exclude=comp_urls)
+    research = Research(comp_urls=comp_urls, tech_urls=tech_urls)
+    read_scores, kw_counter, formats = [], Counter(), []
+
+    # Download every URL once, concurrently; a single parse of each body
+    # yields both the article text and the snippet format. Syndicated copies
+    # are dropped so one wire story isn't counted several times.
+    pages = _fetch_without_duplicates(comp_urls + tech_urls, research)
+
+    for url in comp_urls:
+        if url in research.duplicates:
+            continue
+        page = pages[url]
+        if not page.ok:
+            continue
+        formats.append(page.snippet_format)
+        txt = page.text
+        if len(txt) >= MIN_ARTICLE_CHARS:
+            research.article_texts.append(txt)
+            with span("readability"):
+                read_scores.append(textstat.flesch_reading_ease(txt))
+            with span("keywords"):
+                kw_counter.update(dict(extract_keywords(txt)))
+        else:
+            research.warnings.append(f"Article parsed but too short: {url}")
+
+    for url in tech_urls:
+        if url in research.duplicates:
+            continue
+        page = pages[url]
+        if not page.ok:
+            continue
+        txt = page.text
+        if len(txt) >= MIN_ARTICLE_CHARS:
+            research.article_texts.append(txt)
+            with span("keywords"):
+                kw_counter.update(dict(extract_keywords(txt)))
+        else:
+            research.warnings.append(f"Article parsed but too short: {url}")
+
+    if not read_scores:
+        research.warnings.append("No readable competitor content scraped.")
+        return research
+
+    research.avg_read = sum(read_scores) / len(read_scores)
+    research.kw_guidance = keyword_share(kw_counter)
+    with span("tfidf", docs=len(research.article_texts)):
+        research.tfidf_keywords = compute_tfidf_keywords(research.article_texts)
+    research.format_summary = ", ".join(formats) if formats else "unknown"
+    research.news_links = [u for u in comp_urls if u not in research.duplicates][:5]
+
+    # Ranked by match strength and keyword weight, so the [:10] and [:3] cuts keep the best links
+    weights = keyword_weights(research.kw_guidance, research.tfidf_keywords)
+    candidates = get_link_index().match(weights)
+    # Pages that cover the same ground under different wording, from the offline similarity index
+    research.suggested_links = [
+        url for url, _ in get_link_vectors().suggest(research.article_texts, k=SUGGESTED_LINKS, exclude=candidates)
+    ]
+    candidates += research.suggested_links
+    with span("verify_links", links=len(candidates)):
+        research.authority_links = verify_links(candidates)[:10]
+    # Fr0ntierX-links logic removed:
+    research.solution_links = research.authority_links[:3]
+    return research
+
+
+def build_short_prompt(article_text: str, url: str, template_name: Optional[str] = None) -> str:
+    """
+    Short Blog prompt: the template's social-mode instructions plus the article.
+    Templates without that section borrow it from the default template.
+    """
+    registry = get_template_registry()
+    social_instructions = registry.get(template_name).section(SOCIAL_SECTION) or registry.get().section(SOCIAL_SECTION)
+    return f"""
+You are a formatting assistant. Follow the exact instructions below to generate a polished, insight-driven short-form blog post.
+
+{social_instructions}
+
+Article text:
+{article_text}
+
+Source URL:
+{url}
+
+Only return the final formatted result.
+"""
+
+
+def scrape_articles(urls: List[str], use_cache: bool = True) -> Tuple[Dict[str, str], Dict[str, str]]:
+    """
+    Fetch and extract ``urls`` concurrently. Returns (article text by URL,
+    failure reason by URL); every input URL lands in exactly one of the two.
+    """
+    pages = fetch_pages(urls, use_cache=use_cache)
+    _extract_all(pages)
+    texts, failed = {}, {}
+    for url in dict.fromkeys(u for u in urls if u):
+        page = pages[url]
+        if not page.ok:
+            failed[url] = page.error or "couldn't be fetched"
+        elif len(page.text) < MIN_ARTICLE_CHARS:
+            failed[url] = "article parsed but too short"
+        else:
+            texts[url] = page.text
+    return texts, failed
+
+
+@dataclass
+class ShortPost:
+    url: str
+    markdown: str = ""
+    error: Optional[str] = None
+
+
+def generate_short_post(article_text: str, url: str, template_name: Optional[str] = None,
+                        use_cache: Optional[bool] = None, force_refresh: bool = False) -> str:
+    """One Short Blog post: condense if needed, prompt, complete."""
+    from llm import call_openai
+    article_text = prepare_article(article_text, use_cache=use_cache, force_refresh=force_refresh)
+    prompt = build_short_prompt(article_text, url, template_name)
+    return call_openai(prompt, use_cache=use_cache, force_refresh=force_refresh).strip()
+
+
+def generate_short_posts(articles: Dict[str, str], template_name: Optional[str] = None,
+                         use_cache: Optional[bool] = None, force_refresh: bool = False,
+                         workers: int = SHORT_BATCH_WORKERS) -> Iterator[ShortPost]:
+    """
+    Generate a post per article concurrently, yielding each as soon as it is
+    done. Call pacing and 429/5xx retries are handled inside call_openai.
+    """
+    if not articles:
+        return
+    with ThreadPoolExecutor(max_workers=max(1, min(workers, len(articles)))) as pool:
+        futures = {
+            submit_in_context(pool, generate_short_post, text, url, template_name, use_cache, force_refresh): url
+            for url, text in articles.items()
+        }
+        for future in as_completed(futures):
+            url = futures[future]
+            try:
+                yield ShortPost(url, future.result())
+            except Exception as e:
+                yield ShortPost(url, error=f"{type(e).__name__}: {e}")
+
+
+def related_links(research: Research, draft: str, k: int = SUGGESTED_LINKS) -> List[str]:
+    """Healthy curated links close to the articles and the draft that the prompt didn't already offer."""
+    offered = research.authority_links + research.news_links
+    suggestions = get_link_vectors().suggest(research.article_texts + [draft], k=k, exclude=offered)
+    return verify_links(url for url, _ in suggestions)
+
+
+def research_prompt(research: Research, user_additional_info: str, company_context_text: str,
+                    template_name: Optional[str] = None) -> str:
+    return build_prompt(
+        research.avg_read,
+        research.kw_guidance,
+        research.tfidf_keywords,
+        user_additional_info,
+        research.format_summary,
+        research.news_links,
+        research.authority_links,
+        research.solution_links,
+        company_context_text,
+        template_name,
+    )
+
+
+def generate_blog(research: Research, user_additional_info: str, company_context_text: str,
+                  linker: KeywordLinker, use_cache: Optional[bool] = None, force_refresh: bool = False,
+                  template_name: Optional[str] = None) -> str:
+    """Non-streaming generation for headless callers: prompt, complete, link keywords."""
+    from llm import call_openai
+    prompt = research_prompt(research, user_additional_info, company_context_text, template_name)
+    return linker.link(call_openai(prompt, use_cache=use_cache, force_refresh=force_refresh))
+
+
+# Span name -> (progress when it starts, what the progress bar says)
+LONG_BLOG_STAGES = {
+    "fetch": (0.05, "Fetching articles"),
+    "extract": (0.15, "Reading articles"),
+    "near_duplicates": (0.25, "Skipping duplicate stories"),
+    "readability": (0.3, "Analyzing articles"),
+    "tfidf": (0.35, "Finding keywords"),
+    "verify_links": (0.4, "Checking authority links"),
+    "llm": (0.5, "Writing the blog"),
+    "related_links": (0.95, "Finding related links"),
+}
+EXPECTED_BLOG_CHARS = 6000
+
+
+def save_research(research: Research) -> None:
+    """Store a successful analysis so the same URLs can be regenerated without it (research_store.py)."""
+    if research.ok:
+        get_research_store().put(bundle_key(research.comp_urls, research.tech_urls), asdict(research))
+
+
+def load_research(comp_urls: List[str], tech_urls: List[str]) -> Tuple[Optional[Research], Optional[float]]:
+    """The saved analysis of these URLs and when it was saved, or (None, None)."""
+    found = get_research_store().get(bundle_key(comp_urls, tech_urls))
+    if found is None:
+        return None, None
+    bundle, saved_at = found
+    known = {f.name for f in fields(Research)}
+    research = Research(**{k: v for k, v in bundle.items() if k in known})
+    # JSON turns the (keyword, value) pairs into lists
+    research.kw_guidance = [tuple(pair) for pair in research.kw_guidance]
+    research.tfidf_keywords = [tuple(pair) for pair in research.tfidf_keywords]
+    return research, saved_at
+
+
+def long_blog_job(params: Dict, report: Callable) -> Dict:
+    """
+    Job handler for the Long Blog mode (see jobs.py): research (or load the
+    saved research when ``reuse_research`` is set), stream the draft into the
+    job's partial text, then link keywords and suggest links.
+    """
+    from llm import stream_openai
+
+    comp_urls, tech_urls = params["comp_urls"], params.get("tech_urls", [])
+    research, saved_at = load_research(comp_urls, tech_urls) if params.get("reuse_research") else (None, None)
+    if research is None:
+        research = run_research(comp_urls, tech_urls)
+        save_research(research)
+        if params.get("reuse_research"):
+            research.warnings.insert(0, "No saved research for these URLs (it may have expired), so they were analyzed again.")
+    result = {"warnings": research.warnings, "duplicates": research.duplicates, "research_saved_at": saved_at}
+    if not research.ok:
+        raise JobFailed("No readable competitor content scraped.", result)
+
+    try:
+        prompt = research_prompt(research, params.get("additional_info", ""), params.get("company_context", ""),
+                                 params.get("template_name"))
+    except TemplateError as e:
+        raise JobFailed(str(e), result)
+    # Paragraphs are keyword-linked as they complete, so the partial draft already has its links
+    stream = StreamingLinker(get_keyword_linker())
+    written = 0
+    llm_start, llm_end = LONG_BLOG_STAGES["llm"][0], LONG_BLOG_STAGES["related_links"][0]
+    for delta in stream_openai(prompt, use_cache=params.get("use_cache"), force_refresh=params.get("force_refresh", False)):
+        stream.feed(delta)
+        written += len(delta)
+        report(progress=llm_start + (llm_end - llm_start) * min(1.0, written / EXPECTED_BLOG_CHARS), partial=stream.render)
+
+    blog = stream.finish().strip()
+    with span("related_links"):
+        result["related_links"] = related_links(research, blog)
+    result["blog"] = blog
+    return result
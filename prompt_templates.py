@@ -0,0 +1,141 @@
+"""
+Registry of parsed prompt templates.
+
+Each template file is parsed once into its ``###SECTION`` blocks and its set
+of ``{placeholders}``, which are checked against the fields build_prompt
+supplies, so a typo in a template is reported when it is loaded rather than
+as a KeyError halfway through a run. Parsed templates are cached per process
+and re-parsed when the file's mtime changes, so rendering a prompt is a
+dictionary lookup plus one ``str.format`` call.
+
+``blog_prompt_template.txt`` is the "default" template. Further named
+templates live in ``prompt_templates/<name>.txt`` (BLOGBUDDY_PROMPT_TEMPLATES)
+and can be chosen per company context for the long and short modes.
+"""
+
+import os
+import string
+from dataclasses import dataclass, field
+from typing import Dict, FrozenSet, List, Optional
+
+from resources import file_resource
+
+DEFAULT_TEMPLATE = "default"
+DEFAULT_TEMPLATE_PATH = "blog_prompt_template.txt"
+TEMPLATE_DIR = os.getenv("BLOGBUDDY_PROMPT_TEMPLATES", "prompt_templates")
+SOCIAL_SECTION = "###SOCIAL_MODE_INSTRUCTIONS"
+
+# Every field build_prompt passes to str.format
+LONG_PLACEHOLDERS = frozenset({
+    "kw_lines", "tfidf_lines", "company_context", "user_additional_info", "format_summary",
+    "news_links", "authority_links", "solution_links", "avg_read",
+})
+
+
+class TemplateError(ValueError):
+    pass
+
+
+@dataclass(frozen=True)
+class PromptTemplate:
+    name: str
+    path: str
+    text: str
+    sections: Dict[str, str] = field(default_factory=dict)
+    placeholders: FrozenSet[str] = frozenset()
+    error: Optional[str] = None
+
+    def render(self, **values) -> str:
+        """The whole template with placeholders filled in."""
+        if self.error:
+            raise TemplateError(self.error)
+        return self.text.format(**values)
+
+    def section(self, header: str) -> str:
+        return self.sections.get(header, "")
+
+
+def _split_sections(text: str) -> Dict[str, str]:
+    # Same rules as the old line scanner: a header is a line that is exactly
+    # "###NAME"; its body runs to the next line starting with "###".
+    sections: Dict[str, str] = {}
+    header, body = None, []
+    for line in text.splitlines():
+        if line.startswith("###") and line.strip() != header:
+            if header is not None and header not in sections:
+                sections[header] = "\n".join(body).strip()
+            header, body = line.strip(), []
+        elif header is not None:
+            body.append(line)
+    if header is not None and header not in sections:
+        sections[header] = "\n".join(body).strip()
+    return sections
+
+
+def parse_template(name: str, path: str, text: str) -> PromptTemplate:
+    """Index sections and check placeholders; problems are kept in ``.error``."""
+    sections = _split_sections(text)
+    try:
+        fields = {f for _, f, _, _ in string.Formatter().parse(text) if f is not None}
+    except ValueError as e:
+        return PromptTemplate(name, path, text, sections, error=f"Template '{name}' ({path}) is malformed: {e}")
+    # "{avg_read:.1f}" parses to "avg_read"; "{a.b}" / "{a[0]}" look up "a"
+    placeholders = frozenset(f.split(".")[0].split("[")[0] for f in fields)
+    unknown = sorted(p for p in placeholders if p not in LONG_PLACEHOLDERS)
+    error = None
+    if "" in placeholders:
+        error = f"Template '{name}' ({path}) has an empty {{}} placeholder; write literal braces as {{{{ }}}}"
+    elif unknown:
+        error = (f"Template '{name}' ({path}) uses unknown placeholder(s) {', '.join('{' + u + '}' for u in unknown)}; "
+                 f"available: {', '.join(sorted(LONG_PLACEHOLDERS))}")
+    return PromptTemplate(name, path, text, sections, placeholders, error)
+
+
+class TemplateRegistry:
+    def __init__(self, default_path: str = DEFAULT_TEMPLATE_PATH, directory: str = TEMPLATE_DIR):
+        self.default_path = default_path
+        self.directory = directory
+
+    def path_for(self, name: Optional[str]) -> str:
+        """File for a template name. Names come from contexts and batch rows, so they must stay inside ``directory``."""
+        if not name or name == DEFAULT_TEMPLATE:
+            return self.default_path
+        path = os.path.join(self.directory, f"{name}.txt")
+        if os.path.dirname(os.path.abspath(path)) != os.path.abspath(self.directory):
+            raise TemplateError(f"Template name '{name}' must be a file name in {self.directory}/, not a path")
+        return path
+
+    def names(self) -> List[str]:
+        try:
+            extra = sorted(f[:-4] for f in os.listdir(self.directory) if f.endswith(".txt"))
+        except OSError:
+            extra = []
+        return [DEFAULT_TEMPLATE] + [n for n in extra if n != DEFAULT_TEMPLATE]
+
+    def get(self, name: Optional[str] = None) -> PromptTemplate:
+        """Parsed template by name; unknown names fall back to the default."""
+        name = name or DEFAULT_TEMPLATE
+        path = self.path_for(name)
+        if name != DEFAULT_TEMPLATE and not os.path.exists(path):
+            name, path = DEFAULT_TEMPLATE, self.default_path
+        return load_template_file(path, name)
+
+
+def load_template_file(path: str, name: Optional[str] = None) -> PromptTemplate:
+    """Parsed template for ``path``, cached until the file changes. A missing file is an empty template."""
+    name = name or os.path.splitext(os.path.basename(path))[0]
+    resource = file_resource(path, lambda p: parse_template(name, p, _read(p)),
+                             default=PromptTemplate(name, path, ""), kind="template")
+    return resource.get()
+
+
+def _read(path: str) -> str:
+    with open(path, "r") as f:
+        return f.read()
+
+
+_registry = TemplateRegistry()
+
+
+def get_template_registry() -> TemplateRegistry:
+    return _registry
@@ -0,0 +1,99 @@
+"""
+Process-wide request and token budgets for OpenAI calls.
+
+Two token buckets, one for requests per minute and one for tokens per minute,
+refill continuously. A call first reserves one request plus its estimated
+token count, and waits (without holding the lock) until both buckets can
+cover it. Every session and worker thread in the process shares the same
+limiter, so a batch run can't push the account into 429s for everyone else.
+
+Configuration (env vars, 0 disables a limit):
+- BLOGBUDDY_OPENAI_RPM: requests per minute (default 60)
+- BLOGBUDDY_OPENAI_TPM: tokens per minute, prompt plus expected completion (default 150000)
+"""
+
+import os
+import random
+import threading
+import time
+from typing import Optional
+
+DEFAULT_RPM = 60
+DEFAULT_TPM = 150_000
+BACKOFF_BASE = 1.0
+BACKOFF_MAX = 30.0
+
+
+class TokenBucket:
+    def __init__(self, per_minute: float):
+        self.capacity = float(per_minute)
+        self.rate = per_minute / 60.0
+        self.tokens = self.capacity
+        self.updated = time.monotonic()
+
+    def refill(self, now: float) -> None:
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def wait_time(self, amount: float) -> float:
+        """Seconds until ``amount`` is available (call after refill)."""
+        amount = min(amount, self.capacity)  # a single oversized call still gets through once the bucket is full
+        return 0.0 if self.tokens >= amount else (amount - self.tokens) / self.rate
+
+    def take(self, amount: float) -> None:
+        self.tokens -= min(amount, self.capacity)
+
+
+class RateLimiter:
+    def __init__(self, rpm: float = DEFAULT_RPM, tpm: float = DEFAULT_TPM):
+        self.requests = TokenBucket(rpm) if rpm > 0 else None
+        self.tokens = TokenBucket(tpm) if tpm > 0 else None
+        self.stats = {"calls": 0, "waited_seconds": 0.0}
+        self._lock = threading.Lock()
+
+    def acquire(self, tokens: int) -> float:
+        """Block until one request and ``tokens`` tokens fit the budget. Returns seconds waited."""
+        waited = 0.0
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                wait = 0.0
+                for bucket, amount in ((self.requests, 1), (self.tokens, tokens)):
+                    if bucket is not None:
+                        bucket.refill(now)
+                        wait = max(wait, bucket.wait_time(amount))
+                if wait == 0.0:
+                    for bucket, amount in ((self.requests, 1), (self.tokens, tokens)):
+                        if bucket is not None:
+                            bucket.take(amount)
+                    self.stats["calls"] += 1
+                    self.stats["waited_seconds"] += waited
+                    return waited
+            time.sleep(wait)
+            waited += wait
+
+    def snapshot(self):
+        with self._lock:
+            return dict(self.stats)
+
+
+def backoff_delay(attempt: int, retry_after: Optional[float] = None) -> float:
+    """Delay before retry ``attempt`` (0-based): the server's Retry-After if given, else capped exponential with full jitter."""
+    if retry_after is not None and retry_after >= 0:
+        return min(retry_after, BACKOFF_MAX)
+    return random.uniform(0, min(BACKOFF_MAX, BACKOFF_BASE * (2 ** attempt)))
+
+
+_limiter: Optional[RateLimiter] = None
+_limiter_lock = threading.Lock()
+
+
+def get_rate_limiter() -> RateLimiter:
+    global _limiter
+    with _limiter_lock:
+        if _limiter is None:
+            _limiter = RateLimiter(
+                rpm=float(os.getenv("BLOGBUDDY_OPENAI_RPM", DEFAULT_RPM)),
+                tpm=float(os.getenv("BLOGBUDDY_OPENAI_TPM", DEFAULT_TPM)),
+            )
+        return _limiter
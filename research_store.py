@@ -0,0 +1,121 @@
+"""
+Saved research bundles, so a blog can be regenerated without re-analyzing.
+
+The analysis stage (scraping, readability, keyword counts, TF-IDF, link
+matching and verification) depends only on the competitor and technical URLs.
+Its output is stored here as one zlib-compressed JSON bundle per URL set. The
+key is a hash of the URLs after the de-duplication run_research applies
+(canonical form, AMP/mobile variants folded, technical URLs minus competitor
+ones), sorted, so order, tracking parameters and page variants don't matter.
+Regenerating with different additional information or company context then
+goes straight to prompting.
+
+Bundles carry BUNDLE_VERSION. A bundle written by an older format is treated
+as missing and replaced on the next full run. Bundles older than the max age
+are ignored and purged.
+
+Configuration (env vars):
+- BLOGBUDDY_RESEARCH_STORE: path to the bundle database (default cache/research.db)
+- BLOGBUDDY_RESEARCH_MAX_AGE: seconds before a bundle expires (default 7 days)
+"""
+
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+import zlib
+from typing import Dict, Iterable, Optional, Tuple
+
+from urlnorm import dedupe_urls
+
+DEFAULT_PATH = os.path.join("cache", "research.db")
+DEFAULT_MAX_AGE = 7 * 24 * 3600
+BUNDLE_VERSION = 1  # bump when the shape of pipeline.Research changes
+
+
+def bundle_key(comp_urls: Iterable[str], tech_urls: Iterable[str]) -> str:
+    # Same de-duplication as run_research, so raw inputs and analyzed URLs share a key
+    comp = dedupe_urls(comp_urls)
+    tech = dedupe_urls(tech_urls, exclude=comp)
+    payload = json.dumps({"comp": sorted(comp), "tech": sorted(tech)})
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+class ResearchStore:
+    def __init__(self, path: str = DEFAULT_PATH, max_age: float = DEFAULT_MAX_AGE):
+        self.path = path
+        self.max_age = max_age
+        self.stats = {"hits": 0, "misses": 0, "saved": 0}
+        self._lock = threading.Lock()
+        directory = os.path.dirname(path)
+        if directory and not os.path.exists(directory):
+            os.makedirs(directory, exist_ok=True)
+        self._conn = sqlite3.connect(path, check_same_thread=False, timeout=30)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS bundles (
+                key TEXT PRIMARY KEY,
+                version INTEGER,
+                data BLOB,
+                created_at REAL
+            );
+            """
+        )
+        self._conn.commit()
+
+    def get(self, key: str) -> Optional[Tuple[Dict, float]]:
+        """The bundle stored under ``key`` and when it was saved, or None."""
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT version, data, created_at FROM bundles WHERE key = ?", (key,)
+            ).fetchone()
+            if row is None or row[0] != BUNDLE_VERSION or time.time() - row[2] > self.max_age:
+                self.stats["misses"] += 1
+                return None
+            self.stats["hits"] += 1
+        return json.loads(zlib.decompress(row[1]).decode("utf-8")), row[2]
+
+    def saved_at(self, key: str) -> Optional[float]:
+        """When a usable bundle for ``key`` was saved, without loading it."""
+        with self._lock:
+            row = self._conn.execute("SELECT version, created_at FROM bundles WHERE key = ?", (key,)).fetchone()
+        if row is None or row[0] != BUNDLE_VERSION or time.time() - row[1] > self.max_age:
+            return None
+        return row[1]
+
+    def put(self, key: str, bundle: Dict) -> None:
+        data = zlib.compress(json.dumps(bundle).encode("utf-8"), 6)
+        now = time.time()
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO bundles(key, version, data, created_at) VALUES(?, ?, ?, ?)",
+                (key, BUNDLE_VERSION, data, now),
+            )
+            self._conn.execute(
+                "DELETE FROM bundles WHERE created_at < ? OR version != ?", (now - self.max_age, BUNDLE_VERSION)
+            )
+            self._conn.commit()
+            self.stats["saved"] += 1
+
+    def snapshot(self) -> Dict[str, int]:
+        with self._lock:
+            return dict(self.stats)
+
+
+_store: Optional[ResearchStore] = None
+_store_lock = threading.Lock()
+
+
+def get_research_store() -> ResearchStore:
+    """Process-wide store shared by all Streamlit sessions and the batch CLI."""
+    global _store
+    with _store_lock:
+        if _store is None:
+            _store = ResearchStore(
+                path=os.getenv("BLOGBUDDY_RESEARCH_STORE", DEFAULT_PATH),
+                max_age=float(os.getenv("BLOGBUDDY_RESEARCH_MAX_AGE", DEFAULT_MAX_AGE)),
+            )
+        return _store
@@ -0,0 +1,165 @@
+"""
+Process-wide, file-backed resources shared by every Streamlit session.
+
+Streamlit re-executes app.py on every widget interaction, so anything loaded
+at the top of the script is rebuilt on each rerun. The accessors here load
+once per process and only reload when the underlying file changes on disk
+(checked with a cheap ``os.stat`` per access), so a rerun costs a dictionary
+lookup instead of a file read and a regex compile.
+
+- get_keyword_map(): technical_links.json
+- get_keyword_linker(): KeywordLinker compiled from the current keyword map
+- get_link_index(): ranked LinkIndex over the keyword map and link_aliases.json
+- get_context_manager(): the shared ContextManager (reopened if contexts.db is replaced)
+- file_resource(): the same caching for any other file (prompt templates use it)
+"""
+
+import json
+import os
+import threading
+from typing import Any, Callable, Dict, Optional, Tuple
+
+from keyword_linker import KeywordLinker
+from link_index import LinkIndex
+
+KEYWORD_MAP_PATH = "technical_links.json"
+LINK_ALIASES_PATH = os.getenv("BLOGBUDDY_LINK_ALIASES", "link_aliases.json")
+
+
+def _content_signature(path: str) -> Optional[Tuple]:
+    try:
+        st = os.stat(path)
+    except OSError:
+        return None
+    return (st.st_mtime_ns, st.st_size)
+
+
+def _identity_signature(path: str) -> Optional[Tuple]:
+    try:
+        st = os.stat(path)
+    except OSError:
+        return None
+    return (st.st_dev, st.st_ino)
+
+
+class FileResource:
+    """A value derived from a file, rebuilt when the file's signature changes."""
+
+    def __init__(self, path: str, loader: Callable[[str], Any], default: Any = None,
+                 signature: Callable[[str], Optional[Tuple]] = _content_signature):
+        self.path = path
+        self.loader = loader
+        self.default = default
+        self.signature = signature
+        self.version = 0
+        self._value = default
+        self._signature: Optional[Tuple] = None
+        self._loaded = False
+        self._lock = threading.Lock()
+
+    def get(self) -> Any:
+        signature = self.signature(self.path)
+        if self._loaded and signature == self._signature:
+            return self._value
+        with self._lock:
+            if not self._loaded or signature != self._signature:
+                try:
+                    self._value = self.loader(self.path) if signature is not None else self.default
+                except (OSError, ValueError):
+                    self._value = self.default
+                self._signature = signature
+                self._loaded = True
+                self.version += 1
+            return self._value
+
+
+def _read_json(path: str) -> Dict:
+    with open(path, "r") as f:
+        return json.load(f)
+
+
+_resources: Dict[Tuple[str, str], FileResource] = {}
+_resources_lock = threading.Lock()
+
+
+def file_resource(path: str, loader: Callable[[str], Any], default: Any = None, kind: str = "") -> FileResource:
+    """
+    The shared FileResource for ``path``, one per (kind, path) per process;
+    ``kind`` tells apart different views of the same file.
+    """
+    with _resources_lock:
+        resource = _resources.get((kind, path))
+        if resource is None:
+            resource = _resources[(kind, path)] = FileResource(path, loader, default)
+        return resource
+
+
+def json_resource(path: str) -> FileResource:
+    return file_resource(path, _read_json, default={}, kind="json")
+
+
+_keyword_map = json_resource(KEYWORD_MAP_PATH)
+
+
+def get_keyword_map() -> Dict:
+    return _keyword_map.get()
+
+
+def read_json_resource(path: str) -> Dict:
+    return json_resource(path).get()
+
+
+_linker: Optional[KeywordLinker] = None
+_linker_version = -1
+_linker_lock = threading.Lock()
+
+
+def get_keyword_linker() -> KeywordLinker:
+    """KeywordLinker for the current keyword map; recompiled only when the map changes."""
+    global _linker, _linker_version
+    mapping = _keyword_map.get()
+    with _linker_lock:
+        if _linker is None or _linker_version != _keyword_map.version:
+            _linker = KeywordLinker(mapping)
+            _linker_version = _keyword_map.version
+        return _linker
+
+
+_link_aliases = file_resource(LINK_ALIASES_PATH, _read_json, default={}, kind="json")
+_link_index = LinkIndex()
+_link_index_versions: Tuple[int, int] = (-1, -1)
+_link_index_lock = threading.Lock()
+
+
+def get_link_index() -> LinkIndex:
+    """The shared LinkIndex, patched in place (changed topics only) when either file changes."""
+    global _link_index_versions
+    mapping, aliases = _keyword_map.get(), _link_aliases.get()
+    with _link_index_lock:
+        versions = (_keyword_map.version, _link_aliases.version)
+        if versions != _link_index_versions:
+            _link_index.update(mapping, aliases)
+            _link_index_versions = versions
+        return _link_index
+
+
+_context_manager = None
+_context_manager_signature: Optional[Tuple] = None
+_context_manager_lock = threading.Lock()
+
+
+def get_context_manager():
+    """
+    One ContextManager per process. Its own read cache already tracks content
+    changes; this only reopens the database when the file is replaced or removed.
+    """
+    global _context_manager, _context_manager_signature
+    from context_manager import ContextManager  # imports streamlit; only the UI needs it
+    with _context_manager_lock:
+        if _context_manager is not None:
+            if _identity_signature(_context_manager.db_path) == _context_manager_signature:
+                return _context_manager
+            _context_manager.close()
+        _context_manager = ContextManager()
+        _context_manager_signature = _identity_signature(_context_manager.db_path)
+        return _context_manager
@@ -0,0 +1,232 @@
+"""
+Page fetching and article extraction for the blog pipeline: concurrent,
+per-host limited, size-capped downloads through the page cache in page_cache.py.
+"""
+
+import importlib.util
+import os
+import re
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Iterable, Optional, Tuple
+from urllib.parse import urlsplit
+
+import requests
+from bs4 import BeautifulSoup, SoupStrainer
+from requests.adapters import HTTPAdapter
+
+from metrics import record_request, span, submit_in_context
+from page_cache import CachedPage, get_page_cache
+
+USER_AGENT = "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 Chrome/110.0.0.0 Safari/537.36"
+FETCH_TIMEOUT = 10
+MAX_WORKERS = 16
+PER_HOST_LIMIT = 2
+MIN_ARTICLE_CHARS = 100
+MAX_PAGE_BYTES = int(os.getenv("BLOGBUDDY_MAX_PAGE_BYTES", 3 * 1024 * 1024))
+CHUNK_BYTES = 64 * 1024
+
+HTML_PARSER = "lxml" if importlib.util.find_spec("lxml") else "html.parser"
+
+_newspaper_article = False  # resolved on first extraction; None when newspaper3k is unavailable
+
+# Only these subtrees are built when parsing; everything else is skipped
+CONTENT_STRAINER = SoupStrainer(["article", "p", "ol", "ul", "table"])
+_FAQ_MARKER = re.compile(r"<div\b[^>]*class=[\"'][^\"']*\brelated-question-pair\b", re.IGNORECASE)
+
+_session: Optional[requests.Session] = None
+_session_lock = threading.Lock()
+_host_slots: Dict[str, threading.BoundedSemaphore] = {}
+_host_slots_lock = threading.Lock()
+
+
+class FetchResult:
+    def __init__(self, url: str, status: Optional[int] = None, html: str = "", error: Optional[str] = None,
+                 from_cache: bool = False):
+        self.url = url
+        self.status = status
+        self.html = html
+        self.error = error
+        self.from_cache = from_cache
+        # Filled in from the page cache, or by the caller after extraction
+        self.text: Optional[str] = None
+        self.snippet_format: Optional[str] = None
+
+    @classmethod
+    def from_cached(cls, url: str, cached: CachedPage) -> "FetchResult":
+        result = cls(url, 200, cached.html, from_cache=True)
+        result.text = cached.text
+        result.snippet_format = cached.snippet_format
+        return result
+
+    @property
+    def ok(self) -> bool:
+        return self.error is None and self.status is not None and 200 <= self.status < 300
+
+
+def get_session() -> requests.Session:
+    """Process-wide session so connections are pooled across URLs and reruns."""
+    global _session
+    with _session_lock:
+        if _session is None:
+            session = requests.Session()
+            adapter = HTTPAdapter(pool_connections=MAX_WORKERS, pool_maxsize=MAX_WORKERS)
+            session.mount("http://", adapter)
+            session.mount("https://", adapter)
+            session.headers["User-Agent"] = USER_AGENT
+            _session = session
+        return _session
+
+
+def _host_slot(url: str) -> threading.BoundedSemaphore:
+    host = urlsplit(url).netloc.lower()
+    with _host_slots_lock:
+        slot = _host_slots.get(host)
+        if slot is None:
+            slot = _host_slots[host] = threading.BoundedSemaphore(PER_HOST_LIMIT)
+        return slot
+
+
+def fetch_page(url: str, timeout: float = FETCH_TIMEOUT, use_cache: bool = True) -> FetchResult:
+    cache = get_page_cache() if use_cache else None
+    cached = cache.get(url) if cache else None
+    if cached and cache.is_fresh(cached):
+        cache.record("hits")
+        return FetchResult.from_cached(url, cached)
+
+    headers = {}
+    if cached:
+        if cached.etag:
+            headers["If-None-Match"] = cached.etag
+        if cached.last_modified:
+            headers["If-Modified-Since"] = cached.last_modified
+    start = time.perf_counter()
+    try:
+        with _host_slot(url):
+            start = time.perf_counter()
+            res = get_session().get(url, headers=headers, timeout=timeout, stream=True)
+            try:
+                body, truncated = (b"", False) if res.status_code == 304 else read_capped(res)
+            finally:
+                res.close()
+            record_request(url, res.status_code, len(body), time.perf_counter() - start)
+        html = decode_body(res, body)
+    except Exception as e:
+        record_request(url, None, 0, time.perf_counter() - start, error=type(e).__name__)
+        return FetchResult(url, error=str(e) or type(e).__name__)
+
+    if cached and res.status_code == 304:
+        cache.touch(url)
+        cache.record("revalidated")
+        return FetchResult.from_cached(url, cached)
+
+    result = FetchResult(url, res.status_code, html)
+    if cache:
+        cache.record("misses")
+        if result.ok and truncated:
+            # No validators: a 304 would otherwise vouch for the cut-off copy as the whole page
+            cache.put(url, html)
+        elif result.ok:
+            cache.put(url, html, res.headers.get("ETag"), res.headers.get("Last-Modified"))
+    return result
+
+
+def read_capped(res: requests.Response, max_bytes: int = MAX_PAGE_BYTES) -> Tuple[bytes, bool]:
+    """Read a streamed response body up to ``max_bytes``. Returns the body and whether it was cut off."""
+    chunks, size = [], 0
+    for chunk in res.iter_content(CHUNK_BYTES):
+        chunks.append(chunk)
+        size += len(chunk)
+        if size > max_bytes:
+            return b"".join(chunks)[:max_bytes], True
+    return b"".join(chunks), False
+
+
+def decode_body(res: requests.Response, body: bytes) -> str:
+    # requests assumes ISO-8859-1 for text/* without a charset; pages are overwhelmingly UTF-8
+    content_type = res.headers.get("Content-Type", "")
+    encoding = res.encoding if "charset" in content_type.lower() and res.encoding else "utf-8"
+    return body.decode(encoding, errors="replace")
+
+
+def remember_extraction(page: FetchResult) -> None:
+    """Persist extracted text/format so the next cache hit skips the parse."""
+    if page.ok:
+        get_page_cache().store_extraction(page.url, page.text, page.snippet_format)
+
+
+def fetch_pages(urls: Iterable[str], timeout: float = FETCH_TIMEOUT, use_cache: bool = True) -> Dict[str, FetchResult]:
+    """
+    Fetch every distinct URL once, in parallel. Wall time is roughly that of
+    the slowest page rather than the sum of all of them.
+    """
+    unique = list(dict.fromkeys(u for u in urls if u))
+    if not unique:
+        return {}
+    workers = min(MAX_WORKERS, len(unique))
+    with span("fetch", urls=len(unique)), ThreadPoolExecutor(max_workers=workers) as pool:
+        futures = [submit_in_context(pool, fetch_page, u, timeout, use_cache) for u in unique]
+        return {f.result().url: f.result() for f in futures}
+
+
+def detect_snippet_format(soup: Optional[BeautifulSoup], html: str = "") -> str:
+    if soup is None:
+        return "unknown"
+    if _FAQ_MARKER.search(html) or soup.find_all('div', class_='related-question-pair'):
+        return "faq"
+    if soup.find('ol') or soup.find('ul'):
+        return "list"
+    if soup.find('table'):
+        return "table"
+    return "paragraph"
+
+
+def parse_content(html: str) -> BeautifulSoup:
+    """Parse only the content-bearing subtrees, with the fastest available parser."""
+    soup = BeautifulSoup(html, HTML_PARSER, parse_only=CONTENT_STRAINER)
+    # Remove script/style
+    for tag in soup(["script", "style", "noscript"]):
+        tag.extract()
+    return soup
+
+
+def _paragraph_text(soup: BeautifulSoup) -> str:
+    # Prefer <article> content
+    article_tag = soup.find("article")
+    root = article_tag if article_tag else soup
+    return "\n".join(p.get_text(strip=True) for p in root.find_all("p")).strip()
+
+
+def _article_class():
+    # newspaper3k drags in nltk and friends, so it is only imported once a page is extracted
+    global _newspaper_article
+    if _newspaper_article is False:
+        try:
+            from newspaper import Article
+        except Exception:  # optional dependency; import can also fail on missing nltk data
+            Article = None
+        _newspaper_article = Article
+    return _newspaper_article
+
+
+def extract_page(url: str, html: str) -> Tuple[str, str]:
+    """
+    Article text and snippet format from a single parse. newspaper3k, when
+    installed, still gets first shot at the text.
+    """
+    soup = parse_content(html)
+    snippet_format = detect_snippet_format(soup, html)
+    Article = _article_class()
+    if Article is not None:
+        try:
+            article = Article(url)
+            article.set_html(html)
+            article.parse()
+            text = article.text.strip()
+            if len(text) >= MIN_ARTICLE_CHARS:
+                return text, snippet_format
+        except Exception:
+            pass
+    return _paragraph_text(soup), snippet_format
+
@@ -0,0 +1,276 @@
+"""
+Google Custom Search with caching, fan-out and quota tracking.
+
+Results are cached per (normalized query, num) in a SQLite file next to the
+other caches, so repeat searches from any session cost nothing. Custom Search
+returns at most 10 results per call; larger requests fan out over result
+pages in parallel. Links are canonicalized and de-duplicated (tracking
+params, AMP and mobile renditions) before anyone scrapes them.
+
+Every API call is counted against a daily quota (the free tier resets at
+midnight Pacific time). Once the quota is used up, or Google reports the
+daily quota as exhausted, only cached results are served until the next
+reset. Short-term rate limits (HTTP 429, per-minute limits) are retried with
+backoff instead and don't touch the daily state.
+
+Configuration (env vars):
+- BLOGBUDDY_GOOGLE_ENDPOINT: Custom Search endpoint (e.g. a local fake)
+- BLOGBUDDY_SEARCH_CACHE: path to the cache database (default cache/search.db)
+- BLOGBUDDY_SEARCH_TTL: seconds a cached result set is reused (default 86400)
+- BLOGBUDDY_SEARCH_DAILY_QUOTA: API calls allowed per day (default 100)
+- BLOGBUDDY_SEARCH_RETRIES: retries of a rate-limited result page (default 2)
+"""
+
+import json
+import logging
+import os
+import re
+import sqlite3
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from typing import Dict, List, Optional, Tuple
+
+import requests
+
+from company_config import google_api_key, google_cx
+from metrics import record_request, span, submit_in_context
+from rate_limit import backoff_delay
+from scraper import get_session
+from urlnorm import dedupe_urls
+
+log = logging.getLogger("blogbuddy.search")
+
+GOOGLE_SEARCH_ENDPOINT = os.getenv("BLOGBUDDY_GOOGLE_ENDPOINT", "https://www.googleapis.com/customsearch/v1")
+DEFAULT_PATH = os.path.join("cache", "search.db")
+DEFAULT_TTL = 24 * 3600
+DEFAULT_DAILY_QUOTA = 100
+PAGE_SIZE = 10  # Custom Search maximum per call
+MAX_RESULTS = 100  # Custom Search never returns results past start=91
+SEARCH_TIMEOUT = 8
+SEARCH_RETRIES = int(os.getenv("BLOGBUDDY_SEARCH_RETRIES", 2))
+QUOTA_REASONS = {"dailyLimitExceeded", "quotaExceeded"}  # the day's quota is gone
+RATE_LIMIT_REASONS = {"rateLimitExceeded", "userRateLimitExceeded"}  # too fast; retry shortly
+
+try:
+    from zoneinfo import ZoneInfo
+    QUOTA_TZ = ZoneInfo("America/Los_Angeles")
+except Exception:  # no tz database available
+    QUOTA_TZ = timezone.utc
+
+
+class QuotaExceeded(Exception):
+    pass
+
+
+class RateLimited(Exception):
+    def __init__(self, message: str, retry_after: Optional[float] = None):
+        super().__init__(message)
+        self.retry_after = retry_after
+
+
+@dataclass
+class SearchResult:
+    query: str
+    urls: List[str]
+    cached: bool = False
+    error: Optional[str] = None
+
+
+def normalize_query(query: str) -> str:
+    return re.sub(r"\s+", " ", (query or "").strip().lower())
+
+
+def quota_day(now: Optional[float] = None) -> str:
+    return datetime.fromtimestamp(now or time.time(), QUOTA_TZ).strftime("%Y-%m-%d")
+
+
+class SearchCache:
+    def __init__(self, path: str = DEFAULT_PATH, ttl: float = DEFAULT_TTL, daily_quota: int = DEFAULT_DAILY_QUOTA):
+        self.path = path
+        self.ttl = ttl
+        self.daily_quota = daily_quota
+        self.stats = {"hits": 0, "misses": 0, "errors": 0}
+        self._lock = threading.Lock()
+        directory = os.path.dirname(path)
+        if directory and not os.path.exists(directory):
+            os.makedirs(directory, exist_ok=True)
+        self._conn = sqlite3.connect(path, check_same_thread=False, timeout=30)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.executescript(
+            """
+            CREATE TABLE IF NOT EXISTS searches (
+                query TEXT,
+                num INTEGER,
+                urls TEXT,
+                fetched_at REAL,
+                PRIMARY KEY (query, num)
+            );
+            CREATE TABLE IF NOT EXISTS quota (
+                day TEXT PRIMARY KEY,
+                calls INTEGER NOT NULL DEFAULT 0,
+                exhausted INTEGER NOT NULL DEFAULT 0
+            );
+            """
+        )
+        self._conn.commit()
+
+    def get(self, query: str, num: int) -> Optional[List[str]]:
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT urls, fetched_at FROM searches WHERE query = ? AND num = ?", (query, num)
+            ).fetchone()
+            if row is None or time.time() - row[1] > self.ttl:
+                self.stats["misses"] += 1
+                return None
+            self.stats["hits"] += 1
+        return json.loads(row[0])
+
+    def put(self, query: str, num: int, urls: List[str]) -> None:
+        now = time.time()
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO searches(query, num, urls, fetched_at) VALUES(?, ?, ?, ?)",
+                (query, num, json.dumps(urls), now),
+            )
+            self._conn.execute("DELETE FROM searches WHERE fetched_at < ?", (now - self.ttl,))
+            self._conn.commit()
+
+    def reserve(self, calls: int) -> None:
+        """Count ``calls`` API requests against today's quota, or raise QuotaExceeded."""
+        day = quota_day()
+        with self._lock:
+            self._conn.execute("INSERT OR IGNORE INTO quota(day) VALUES(?)", (day,))
+            used, exhausted = self._conn.execute(
+                "SELECT calls, exhausted FROM quota WHERE day = ?", (day,)
+            ).fetchone()
+            if exhausted or used + calls > self.daily_quota:
+                self._conn.commit()
+                raise QuotaExceeded(f"daily search quota reached ({used}/{self.daily_quota} calls)")
+            self._conn.execute("UPDATE quota SET calls = calls + ? WHERE day = ?", (calls, day))
+            self._conn.commit()
+
+    def mark_exhausted(self) -> None:
+        with self._lock:
+            self._conn.execute(
+                "INSERT INTO quota(day, exhausted) VALUES(?, 1) ON CONFLICT(day) DO UPDATE SET exhausted = 1",
+                (quota_day(),),
+            )
+            self._conn.commit()
+
+    def record_error(self) -> None:
+        with self._lock:
+            self.stats["errors"] += 1
+
+    def snapshot(self) -> Dict[str, int]:
+        with self._lock:
+            row = self._conn.execute("SELECT calls, exhausted FROM quota WHERE day = ?", (quota_day(),)).fetchone()
+            calls, exhausted = row or (0, 0)
+            return {**self.stats, "calls_today": calls, "daily_quota": self.daily_quota, "exhausted": bool(exhausted)}
+
+
+def _fetch_page(query: str, start: int, num: int) -> List[str]:
+    params = {"q": query, "cx": google_cx, "key": google_api_key, "num": num, "start": start}
+    started = time.perf_counter()
+    try:
+        res = get_session().get(GOOGLE_SEARCH_ENDPOINT, params=params, timeout=SEARCH_TIMEOUT)
+    except requests.RequestException as e:
+        record_request(GOOGLE_SEARCH_ENDPOINT, None, 0, time.perf_counter() - started, error=type(e).__name__)
+        raise
+    record_request(GOOGLE_SEARCH_ENDPOINT, res.status_code, len(res.content), time.perf_counter() - started)
+    if res.status_code in (403, 429):
+        try:
+            reasons = {e.get("reason") for e in res.json().get("error", {}).get("errors", [])}
+        except ValueError:
+            reasons = set()
+        if reasons & QUOTA_REASONS:
+            raise QuotaExceeded(f"Google reported the daily quota as exhausted ({res.status_code})")
+        if res.status_code == 429 or reasons & RATE_LIMIT_REASONS:
+            try:
+                retry_after = float(res.headers.get("Retry-After"))
+            except (TypeError, ValueError):
+                retry_after = None
+            raise RateLimited(f"Google rate limit ({res.status_code})", retry_after)
+    res.raise_for_status()
+    return [item["link"] for item in res.json().get("items", []) if item.get("link")]
+
+
+def _fetch_page_with_retry(cache: "SearchCache", query: str, start: int, num: int) -> List[str]:
+    """``_fetch_page``, retried with backoff on rate limits. Each retry counts against the quota."""
+    for attempt in range(SEARCH_RETRIES + 1):
+        try:
+            return _fetch_page(query, start, num)
+        except RateLimited as e:
+            if attempt == SEARCH_RETRIES:
+                raise
+            time.sleep(backoff_delay(attempt, e.retry_after))
+            cache.reserve(1)
+
+
+def _pages(num: int) -> List[Tuple[int, int]]:
+    num = max(1, min(num, MAX_RESULTS))
+    return [(start, min(PAGE_SIZE, num - start + 1)) for start in range(1, num + 1, PAGE_SIZE)]
+
+
+def search(query: str, num: int = 5, use_cache: bool = True) -> SearchResult:
+    """
+    Canonical, de-duplicated result links for ``query``. Errors (network,
+    HTTP, quota) are reported in ``.error`` together with whatever was found.
+    """
+    key = normalize_query(query)
+    if not key:
+        return SearchResult(query, [])
+    cache = get_search_cache()
+    with span("search", query=key, num=num) as attrs:
+        cached = cache.get(key, num) if use_cache else None
+        attrs["cached"] = cached is not None
+        if cached is not None:
+            return SearchResult(query, cached, cached=True)
+
+        pages = _pages(num)
+        try:
+            cache.reserve(len(pages))
+        except QuotaExceeded as e:
+            return SearchResult(query, [], error=str(e))
+
+        links: List[str] = []
+        error = None
+        with ThreadPoolExecutor(max_workers=len(pages)) as pool:
+            futures = [submit_in_context(pool, _fetch_page_with_retry, cache, query, start, size)
+                       for start, size in pages]
+            for future in futures:
+                try:
+                    links.extend(future.result())
+                except QuotaExceeded as e:
+                    cache.mark_exhausted()
+                    error = str(e)
+                except RateLimited as e:
+                    error = str(e)
+                except (requests.RequestException, ValueError, KeyError) as e:
+                    error = f"search failed: {e}"
+        urls = dedupe_urls(links)
+        if error:
+            cache.record_error()
+            log.warning("search for %r: %s", query, error)
+        elif use_cache:
+            cache.put(key, num, urls)
+        return SearchResult(query, urls, error=error)
+
+
+_cache: Optional[SearchCache] = None
+_cache_lock = threading.Lock()
+
+
+def get_search_cache() -> SearchCache:
+    """Process-wide cache instance shared by all Streamlit sessions."""
+    global _cache
+    with _cache_lock:
+        if _cache is None:
+            _cache = SearchCache(
+                path=os.getenv("BLOGBUDDY_SEARCH_CACHE", DEFAULT_PATH),
+                ttl=float(os.getenv("BLOGBUDDY_SEARCH_TTL", DEFAULT_TTL)),
+                daily_quota=int(os.getenv("BLOGBUDDY_SEARCH_DAILY_QUOTA", DEFAULT_DAILY_QUOTA)),
+            )
+        return _cache
@@ -0,0 +1,207 @@
+"""
+Token-aware map-reduce over long article text.
+
+Short articles go to the model whole. Longer ones are split on paragraph and
+sentence boundaries into chunks of at most CHUNK_TOKENS (counted locally with
+tiktoken when it is installed, otherwise estimated), and each chunk is
+condensed into notes plus verbatim quote candidates concurrently. The notes
+are combined, and condensed again if they are still too long, so the final
+prompt stays within a fixed budget however long the article is. Everything
+past MAX_INPUT_TOKENS is dropped, which puts a ceiling on cost.
+
+Chunk calls go through call_openai, so the response cache applies per chunk;
+callers pass their cache toggle and "Force regenerate" choice through.
+
+Configuration (env vars):
+- BLOGBUDDY_DIRECT_TOKENS: articles up to this size are sent whole (default 6000)
+- BLOGBUDDY_CHUNK_TOKENS: chunk size for the map step (default 2500)
+- BLOGBUDDY_MAX_INPUT_TOKENS: article tokens considered at all (default 60000)
+- BLOGBUDDY_SUMMARY_WORKERS: concurrent chunk calls (default 4)
+"""
+
+import os
+import re
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from functools import partial
+from typing import Callable, List, Optional
+
+from metrics import span, submit_in_context
+
+DIRECT_TOKENS = int(os.getenv("BLOGBUDDY_DIRECT_TOKENS", 6000))
+CHUNK_TOKENS = int(os.getenv("BLOGBUDDY_CHUNK_TOKENS", 2500))
+MAX_INPUT_TOKENS = int(os.getenv("BLOGBUDDY_MAX_INPUT_TOKENS", 60000))
+MAX_WORKERS = int(os.getenv("BLOGBUDDY_SUMMARY_WORKERS", 4))
+NOTES_WORDS = 180
+QUOTES_PER_CHUNK = 2
+
+_TOKEN_PIECE = re.compile(r"\w+|[^\w\s]")
+_SENTENCE_END = re.compile(r"(?<=[.!?])\s+")
+_QUOTE_LINE = re.compile(r"^\s*QUOTE:\s*(.+?)\s*$", re.MULTILINE)
+
+_encoding = False  # resolved on first use; None when tiktoken is unavailable
+
+
+def _get_encoding():
+    global _encoding
+    if _encoding is False:
+        try:
+            import tiktoken
+            _encoding = tiktoken.get_encoding("cl100k_base")
+        except Exception:  # optional dependency (or its encoding file can't be fetched offline)
+            _encoding = None
+    return _encoding
+
+
+def count_tokens(text: str) -> int:
+    """Local token count: exact with tiktoken, otherwise ~4/3 tokens per word or symbol."""
+    if not text:
+        return 0
+    encoding = _get_encoding()
+    if encoding is not None:
+        return len(encoding.encode(text, disallowed_special=()))
+    return (len(_TOKEN_PIECE.findall(text)) * 4 + 2) // 3
+
+
+def _hard_split(text: str, max_tokens: int) -> List[str]:
+    # Last resort for a "sentence" that is itself too long: cut on words
+    words, pieces, current = text.split(), [], []
+    budget = max(1, max_tokens * 3 // 4)
+    for word in words:
+        current.append(word)
+        if len(current) >= budget:
+            pieces.append(" ".join(current))
+            current = []
+    if current:
+        pieces.append(" ".join(current))
+    return pieces
+
+
+def truncate_tokens(text: str, max_tokens: int) -> str:
+    """``text`` cut to roughly ``max_tokens``, on a paragraph boundary where possible."""
+    if count_tokens(text) <= max_tokens:
+        return text
+    kept, used = [], 0
+    for paragraph in text.split("\n"):
+        cost = count_tokens(paragraph) + 1
+        if used + cost > max_tokens:
+            break
+        kept.append(paragraph)
+        used += cost
+    return "\n".join(kept) if kept else _hard_split(text, max_tokens)[0]
+
+
+def split_into_chunks(text: str, max_tokens: int = CHUNK_TOKENS) -> List[str]:
+    """Greedy packing of paragraphs (then sentences, then words) into chunks of <= max_tokens."""
+    units: List[str] = []
+    for paragraph in (p.strip() for p in re.split(r"\n\s*\n|\n", text)):
+        if not paragraph:
+            continue
+        if count_tokens(paragraph) <= max_tokens:
+            units.append(paragraph)
+            continue
+        for sentence in _SENTENCE_END.split(paragraph):
+            units.extend([sentence] if count_tokens(sentence) <= max_tokens else _hard_split(sentence, max_tokens))
+
+    chunks, current, used = [], [], 0
+    for unit in units:
+        cost = count_tokens(unit) + 1
+        if current and used + cost > max_tokens:
+            chunks.append("\n\n".join(current))
+            current, used = [], 0
+        current.append(unit)
+        used += cost
+    if current:
+        chunks.append("\n\n".join(current))
+    return chunks
+
+
+@dataclass
+class Condensed:
+    notes: str
+    quotes: List[str] = field(default_factory=list)
+    chunks: int = 0
+    source_tokens: int = 0
+
+
+def _map_prompt(chunk: str, part: int, total: int) -> str:
+    return (
+        f"This is part {part} of {total} of a longer article.\n\n"
+        f"1) Write concise notes (at most {NOTES_WORDS} words) covering the key facts, figures, named people, "
+        "organizations and sources in this part. Do not add anything that is not in the text.\n"
+        f"2) Then copy up to {QUOTES_PER_CHUNK} of the most striking sentences verbatim, each on its own line "
+        "starting with 'QUOTE: '. Prefer direct quotations from named people.\n\n"
+        f"Text:\n{chunk}"
+    )
+
+
+def _parse_map_output(output: str):
+    quotes = [q.strip().strip('"“”') for q in _QUOTE_LINE.findall(output)]
+    notes = _QUOTE_LINE.sub("", output).strip()
+    return notes, [q for q in quotes if q]
+
+
+def _complete(prompt: str, use_cache: Optional[bool] = None, force_refresh: bool = False) -> str:
+    from llm import call_openai
+    return call_openai(prompt, use_cache=use_cache, force_refresh=force_refresh)
+
+
+def _map_chunks(chunks: List[str], complete: Callable[[str], str]) -> List[str]:
+    total = len(chunks)
+    with ThreadPoolExecutor(max_workers=max(1, min(MAX_WORKERS, total))) as pool:
+        futures = [
+            submit_in_context(pool, complete, _map_prompt(chunk, i + 1, total))
+            for i, chunk in enumerate(chunks)
+        ]
+        return [f.result() for f in futures]
+
+
+def condense(text: str, complete: Optional[Callable[[str], str]] = None,
+             budget: int = DIRECT_TOKENS, chunk_tokens: int = CHUNK_TOKENS,
+             use_cache: Optional[bool] = None, force_refresh: bool = False) -> Condensed:
+    """
+    Map-reduce ``text`` into notes that fit ``budget`` tokens, collecting quote
+    candidates from every chunk along the way. ``use_cache``/``force_refresh``
+    apply to the default call_openai completion.
+    """
+    complete = complete or partial(_complete, use_cache=use_cache, force_refresh=force_refresh)
+    source_tokens = count_tokens(text)
+    text = truncate_tokens(text, MAX_INPUT_TOKENS)
+    quotes: List[str] = []
+    chunks_done = 0
+    notes = text
+    # Each round shrinks the text by roughly CHUNK_TOKENS / NOTES_WORDS; rounds are capped in case a model rambles
+    for round_ in range(3):
+        if count_tokens(notes) <= budget:
+            break
+        chunks = split_into_chunks(notes, chunk_tokens)
+        with span("summarize_map", chunks=len(chunks), round=round_):
+            outputs = _map_chunks(chunks, complete)
+        chunks_done += len(chunks)
+        parts = []
+        for output in outputs:
+            chunk_notes, chunk_quotes = _parse_map_output(output)
+            parts.append(chunk_notes)
+            if round_ == 0:  # later rounds only see paraphrased notes
+                quotes.extend(chunk_quotes)
+        notes = "\n\n".join(p for p in parts if p)
+    notes = truncate_tokens(notes, budget)
+    return Condensed(notes, list(dict.fromkeys(quotes)), chunks_done, source_tokens)
+
+
+def prepare_article(text: str, complete: Optional[Callable[[str], str]] = None,
+                    use_cache: Optional[bool] = None, force_refresh: bool = False) -> str:
+    """
+    Article text for a single final prompt: unchanged when it fits the direct
+    budget, otherwise condensed notes plus verbatim quote candidates.
+    """
+    if count_tokens(text) <= DIRECT_TOKENS:
+        return text
+    condensed = condense(text, complete, use_cache=use_cache, force_refresh=force_refresh)
+    quote_lines = "\n".join(f'- "{q}"' for q in condensed.quotes[:8])
+    return (
+        f"(Condensed from a long article of about {condensed.source_tokens} tokens; "
+        "notes are paraphrased, quotes are verbatim.)\n\n"
+        f"Notes:\n{condensed.notes}"
+        + (f"\n\nQuotable sentences:\n{quote_lines}" if quote_lines else "")
+    )
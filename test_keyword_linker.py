@@ -0,0 +1,31 @@
+import pytest
+
+from keyword_linker import KeywordLinker, StreamingLinker
+
+DOC = (
+    "Zero trust starts with identity.\n\n"
+    "```python\n# zero trust in code\n\nverify(identity)\n```\n\n"
+    "Identity providers enforce zero trust."
+)
+
+
+@pytest.fixture
+def linker():
+    return KeywordLinker({"zero trust": ["https://zt.example.com"], "identity": ["https://id.example.com"]})
+
+
+@pytest.mark.parametrize("size", [1, 2, 3, 7, len(DOC)])
+def test_streamed_output_matches_linking_the_whole_document(linker, size):
+    stream = StreamingLinker(linker)
+    for i in range(0, len(DOC), size):
+        stream.feed(DOC[i:i + size])
+    assert stream.finish() == linker.link(DOC)
+
+
+def test_blank_line_inside_an_open_fence_does_not_end_the_paragraph(linker):
+    stream = StreamingLinker(linker)
+    stream.feed("Intro.\n\n```\nzero trust\n\nidentity\n")
+    assert stream.paragraphs == ["Intro."]
+    assert "[" not in stream.render()
+    stream.feed("```\n\nMore identity.")
+    assert stream.paragraphs == ["Intro.", "```\nzero trust\n\nidentity\n```"]
@@ -0,0 +1,46 @@
+import openai
+import openai.error
+import pytest
+
+import llm
+
+
+class FakeLimiter:
+    def acquire(self, tokens):
+        return 0.0
+
+
+def _rate_limit(code):
+    body = {"error": {"message": "limited", "type": code, "code": code}}
+    return openai.error.RateLimitError("limited", None, 429, body, {})
+
+
+@pytest.fixture
+def create(monkeypatch):
+    calls = []
+
+    def fake_create(errors):
+        def _create(**kwargs):
+            calls.append(kwargs)
+            if errors:
+                raise errors.pop(0)
+            return {"choices": [{"message": {"content": "ok"}}]}
+        monkeypatch.setattr(openai.ChatCompletion, "create", _create)
+        return calls
+
+    monkeypatch.setattr(llm, "get_rate_limiter", lambda: FakeLimiter())
+    monkeypatch.setattr(llm, "backoff_delay", lambda attempt, retry_after=None: 0)
+    return fake_create
+
+
+def test_rate_limit_is_retried(create):
+    calls = create([_rate_limit("rate_limit_exceeded")])
+    assert llm._create(llm._messages("hi"), {})["choices"][0]["message"]["content"] == "ok"
+    assert len(calls) == 2
+
+
+def test_exhausted_quota_is_raised_without_retrying(create):
+    calls = create([_rate_limit("insufficient_quota")])
+    with pytest.raises(openai.error.RateLimitError):
+        llm._create(llm._messages("hi"), {})
+    assert len(calls) == 1
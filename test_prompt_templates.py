@@ -0,0 +1,25 @@
+import pytest
+
+from prompt_templates import DEFAULT_TEMPLATE, TemplateError, TemplateRegistry
+
+
+@pytest.fixture
+def registry(tmp_path):
+    directory = tmp_path / "prompt_templates"
+    directory.mkdir()
+    (directory / "launch.txt").write_text("###SOCIAL_MODE_INSTRUCTIONS\nBe brief.\n")
+    (tmp_path / "secret.txt").write_text("not a template")
+    default = tmp_path / "blog_prompt_template.txt"
+    default.write_text("{company_context}")
+    return TemplateRegistry(str(default), str(directory))
+
+
+def test_named_template_loads_from_the_directory(registry):
+    assert registry.get("launch").name == "launch"
+    assert registry.get("missing").name == DEFAULT_TEMPLATE
+
+
+@pytest.mark.parametrize("name", ["../secret", "sub/../../secret", "sub/launch", "/etc/passwd"])
+def test_names_that_leave_the_directory_are_rejected(registry, name):
+    with pytest.raises(TemplateError):
+        registry.get(name)
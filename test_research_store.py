@@ -0,0 +1,83 @@
+import sqlite3
+
+import pytest
+
+import pipeline
+import research_store
+from pipeline import Research, load_research, save_research
+from research_store import ResearchStore, bundle_key
+
+
+@pytest.fixture
+def store(tmp_path, monkeypatch):
+    store = ResearchStore(str(tmp_path / "research.db"))
+    monkeypatch.setattr(pipeline, "get_research_store", lambda: store)
+    return store
+
+
+def _research(comp_urls, tech_urls):
+    return Research(
+        comp_urls=comp_urls,
+        tech_urls=tech_urls,
+        article_texts=["Zero trust " * 200],
+        avg_read=52.5,
+        kw_guidance=[("zero", "4.00%")],
+        tfidf_keywords=[("trust", 0.31)],
+        format_summary="prose",
+        authority_links=["https://docs.example.org/zt"],
+    )
+
+
+def test_key_ignores_order_tracking_params_and_page_variants():
+    plain = bundle_key(["https://a.com/story", "https://b.com/post"], ["https://t.com/ref"])
+    assert bundle_key(["https://b.com/post", "https://a.com/story"], ["https://t.com/ref"]) == plain
+    assert bundle_key(["https://a.com/story?utm_source=x", "https://b.com/post"], ["https://t.com/ref"]) == plain
+    # AMP and mobile renditions of a story that is also listed are folded into it
+    assert bundle_key(["https://a.com/story/amp", "https://a.com/story", "https://b.com/post"],
+                      ["https://t.com/ref"]) == plain
+    assert bundle_key(["https://m.a.com/story", "https://b.com/post", "https://a.com/story"],
+                      ["https://t.com/ref"]) == plain
+    # A technical URL that is also a competitor URL is analyzed once, as a competitor
+    assert bundle_key(["https://a.com/story", "https://b.com/post"], ["https://t.com/ref", "https://a.com/story"]) == plain
+    assert bundle_key(["https://a.com/story"], ["https://t.com/ref"]) != plain
+
+
+def test_amp_variant_in_raw_urls_finds_saved_research(store):
+    raw_comp = ["https://a.com/story", "https://a.com/story/amp", "https://b.com/post"]
+    analyzed = _research(pipeline.dedupe_urls(raw_comp), [])
+    save_research(analyzed)
+
+    assert store.saved_at(bundle_key(raw_comp, [])) is not None
+    loaded, saved_at = load_research(raw_comp, [])
+    assert loaded == analyzed
+    assert saved_at is not None
+
+
+def test_round_trip_with_reordered_and_tracked_urls(store):
+    analyzed = _research(["https://a.com/story", "https://b.com/post"], ["https://t.com/ref"])
+    save_research(analyzed)
+
+    loaded, _ = load_research(["https://b.com/post?utm_campaign=y", "https://a.com/story"], ["https://t.com/ref"])
+    assert loaded == analyzed
+    assert loaded.kw_guidance == [("zero", "4.00%")]
+
+
+def test_failed_research_is_not_saved(store):
+    save_research(Research(comp_urls=["https://a.com/story"], tech_urls=[]))
+    assert load_research(["https://a.com/story"], []) == (None, None)
+
+
+def test_old_bundle_version_is_missing(store):
+    save_research(_research(["https://a.com/story"], []))
+    key = bundle_key(["https://a.com/story"], [])
+    with sqlite3.connect(store.path) as conn:
+        conn.execute("UPDATE bundles SET version = ?", (research_store.BUNDLE_VERSION - 1,))
+
+    assert store.saved_at(key) is None
+    assert load_research(["https://a.com/story"], []) == (None, None)
+
+
+def test_expired_bundle_is_missing(tmp_path):
+    store = ResearchStore(str(tmp_path / "research.db"), max_age=-1)
+    store.put(bundle_key(["https://a.com/story"], []), {"comp_urls": ["https://a.com/story"]})
+    assert store.get(bundle_key(["https://a.com/story"], [])) is None
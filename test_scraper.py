@@ -0,0 +1,60 @@
+import pytest
+
+import scraper
+from page_cache import PageCache
+
+
+class FakeResponse:
+    def __init__(self, body, headers=None, chunk=64 * 1024):
+        self.status_code = 200
+        self.headers = {"Content-Type": "text/html; charset=utf-8", "ETag": '"v1"', **(headers or {})}
+        self.encoding = "utf-8"
+        self._chunks = [body[i:i + chunk] for i in range(0, len(body), chunk)]
+
+    def iter_content(self, size):
+        return iter(self._chunks)
+
+    def close(self):
+        pass
+
+
+class FakeSession:
+    def __init__(self, body):
+        self.body = body
+        self.headers_seen = []
+
+    def get(self, url, headers=None, timeout=None, stream=False):
+        self.headers_seen.append(headers or {})
+        return FakeResponse(self.body)
+
+
+@pytest.fixture
+def cache(tmp_path, monkeypatch):
+    cache = PageCache(str(tmp_path / "pages.db"), ttl=-1)  # always stale, so every fetch revalidates
+    monkeypatch.setattr(scraper, "get_page_cache", lambda: cache)
+    return cache
+
+
+@pytest.mark.parametrize("body, truncated", [(b"x" * 16, False), (b"x" * 17, True)])
+def test_read_capped_reports_truncation(body, truncated):
+    assert scraper.read_capped(FakeResponse(body, chunk=4), max_bytes=16) == (body[:16], truncated)
+
+
+def test_truncated_page_is_cached_without_validators(cache, monkeypatch):
+    session = FakeSession(b"<p>" + b"x" * scraper.MAX_PAGE_BYTES + b"</p>")
+    monkeypatch.setattr(scraper, "get_session", lambda: session)
+
+    assert len(scraper.fetch_page("https://a.com/long").html) == scraper.MAX_PAGE_BYTES
+    assert cache.get("https://a.com/long").etag is None
+    scraper.fetch_page("https://a.com/long")
+    assert "If-None-Match" not in session.headers_seen[-1]
+
+
+def test_complete_page_keeps_its_validators(cache, monkeypatch):
+    session = FakeSession(b"<p>short</p>")
+    monkeypatch.setattr(scraper, "get_session", lambda: session)
+
+    scraper.fetch_page("https://a.com/short")
+    assert cache.get("https://a.com/short").etag == '"v1"'
+    scraper.fetch_page("https://a.com/short")
+    assert session.headers_seen[-1]["If-None-Match"] == '"v1"'
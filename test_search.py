@@ -0,0 +1,93 @@
+import json
+
+import pytest
+
+import search
+from metrics import trace
+from search import SearchCache
+
+
+class FakeResponse:
+    def __init__(self, status_code, body, headers=None):
+        self.status_code = status_code
+        self.content = json.dumps(body).encode("utf-8")
+        self.headers = headers or {}
+        self._body = body
+
+    def json(self):
+        return self._body
+
+    def raise_for_status(self):
+        if self.status_code >= 400:
+            raise search.requests.HTTPError(f"{self.status_code} error")
+
+
+class FakeSession:
+    """Answers with the queued responses in order, then with results."""
+
+    def __init__(self, *responses):
+        self.responses = list(responses)
+        self.calls = 0
+
+    def get(self, url, params=None, timeout=None):
+        self.calls += 1
+        if self.responses:
+            return self.responses.pop(0)
+        return FakeResponse(200, {"items": [{"link": f"https://site{params['start']}.com/story"}]})
+
+
+def _error(status, reason, headers=None):
+    return FakeResponse(status, {"error": {"errors": [{"reason": reason}]}}, headers)
+
+
+@pytest.fixture
+def cache(tmp_path, monkeypatch):
+    cache = SearchCache(str(tmp_path / "search.db"))
+    monkeypatch.setattr(search, "get_search_cache", lambda: cache)
+    monkeypatch.setattr(search, "backoff_delay", lambda attempt, retry_after=None: 0)
+    return cache
+
+
+def _use(monkeypatch, session):
+    monkeypatch.setattr(search, "get_session", lambda: session)
+    return session
+
+
+@pytest.mark.parametrize("reason", ["dailyLimitExceeded", "quotaExceeded"])
+def test_daily_quota_reasons_mark_the_day_exhausted(cache, monkeypatch, reason):
+    _use(monkeypatch, FakeSession(_error(403, reason)))
+    result = search.search("zero trust")
+    assert result.error and not result.urls
+    assert cache.snapshot()["exhausted"]
+
+
+@pytest.mark.parametrize("response", [
+    FakeResponse(429, {}),
+    _error(403, "rateLimitExceeded"),
+    _error(403, "userRateLimitExceeded"),
+])
+def test_rate_limits_are_retried_without_marking_the_day(cache, monkeypatch, response):
+    session = _use(monkeypatch, FakeSession(response))
+    result = search.search("zero trust")
+    assert result.error is None
+    assert result.urls == ["https://site1.com/story"]
+    assert session.calls == 2
+    assert cache.snapshot()["calls_today"] == 2
+    assert not cache.snapshot()["exhausted"]
+
+
+def test_persistent_rate_limit_reports_error_but_keeps_searching_later(cache, monkeypatch):
+    _use(monkeypatch, FakeSession(*[FakeResponse(429, {}, {"Retry-After": "1"})] * (search.SEARCH_RETRIES + 1)))
+    result = search.search("zero trust")
+    assert "rate limit" in result.error
+    assert not cache.snapshot()["exhausted"]
+
+    assert search.search("zero trust").urls == ["https://site1.com/story"]
+
+
+def test_fan_out_requests_land_in_the_callers_trace(cache, monkeypatch):
+    _use(monkeypatch, FakeSession())
+    with trace("test") as run_trace:
+        result = search.search("zero trust", num=25)
+    assert len(result.urls) == 3
+    assert len(run_trace.requests) == 3
@@ -0,0 +1,88 @@
+from datetime import datetime, timedelta, timezone
+
+import pytest
+
+import trending
+from trending import DELTA_LIMIT, TrendingFeed, TrendingStore, julian_now, store_crawl
+
+
+def _iso(dt):
+    return dt.strftime("%Y-%m-%dT%H:%M:%S")
+
+
+def _posts(start, count, fetched_at):
+    posted_at = _iso(datetime.now(timezone.utc) - timedelta(hours=2))
+    return [
+        {"profile_id": 1, "post_url": f"https://example.com/post/{i}", "posted_at": posted_at,
+         "reactions": i % 50, "comments": 1, "snippet": f"post {i}", "fetched_at": fetched_at}
+        for i in range(start, start + count)
+    ]
+
+
+@pytest.fixture
+def store(tmp_path):
+    return TrendingStore(str(tmp_path / "data.db"))
+
+
+def test_refresh_reads_a_large_crawl_cycle_and_keeps_the_listing_bounded(store):
+    store_crawl(store._conn, _posts(0, 100, "2026-01-01T00:00:00"), [], "2026-01-01T00:00:00")
+    feed = TrendingFeed(store, page_size=20)
+    assert len(feed.posts) == 20 and feed.more
+
+    # One crawler cycle stamps every row with the same fetched_at: mostly quiet
+    # posts, plus a few that rank at the top and one refresh of a loaded post
+    cycle = _posts(100, DELTA_LIMIT + 250, "2026-01-01T01:00:00")
+    for post in cycle:
+        post["reactions"] = 0
+    for post in cycle[-3:]:
+        post["reactions"] = 10_000
+    loaded_url = next(iter(feed.posts.values()))["post_url"]
+    refreshed = _posts(int(loaded_url.rsplit("/", 1)[1]), 1, "2026-01-01T01:00:00")
+    refreshed[0]["reactions"] = 5_000
+    store_crawl(store._conn, cycle + refreshed, [], "2026-01-01T01:00:00")
+
+    assert feed.refresh() == 4
+    assert feed.mark[1] == max(p["id"] for p in store.changed_posts(("", 0), julian_now(), limit=10_000))
+    assert len(feed.posts) == 23
+    # The listing is exactly the top of the ranking, with no gaps
+    top = store.ranked_page(feed.now_jd, limit=len(feed.posts))
+    assert set(feed.posts) == {p["id"] for p in top}
+    ranked = feed.ranked()
+    assert [p["trend_rank"] for p in ranked] == sorted((p["trend_rank"] for p in ranked), reverse=True)
+    assert ranked[0]["reactions"] == 10_000
+
+    # Quiet posts come through paging, once each
+    while feed.more:
+        feed.load_more()
+    assert len(feed.posts) == DELTA_LIMIT + 350
+    assert feed.refresh() == 0
+
+
+def test_changed_posts_pages_through_rows_sharing_a_timestamp(store):
+    store_crawl(store._conn, _posts(0, 25, "2026-01-01T01:00:00"), [], "2026-01-01T01:00:00")
+    seen, cursor = [], ("", 0)
+    while True:
+        page = store.changed_posts(cursor, julian_now(), limit=10)
+        seen += [p["id"] for p in page]
+        if len(page) < 10:
+            break
+        cursor = (page[-1]["fetched_at"], page[-1]["id"])
+    assert sorted(seen) == seen and len(set(seen)) == 25
+
+
+def test_refreshed_post_moves_past_the_cursor(store):
+    store_crawl(store._conn, _posts(0, 3, "2026-01-01T00:00:00"), [], "2026-01-01T00:00:00")
+    feed = TrendingFeed(store)
+    updated = _posts(1, 1, "2026-01-01T02:00:00")
+    updated[0]["reactions"] = 500
+    store_crawl(store._conn, updated, [], "2026-01-01T02:00:00")
+    assert feed.refresh() == 1
+    assert feed.ranked()[0]["post_url"] == "https://example.com/post/1"
+
+
+def test_delta_query_uses_the_fetched_index(store):
+    plan = store._conn.execute(
+        "EXPLAIN QUERY PLAN " + trending.CHANGED_POSTS_QUERY,
+        {"since": "", "after_id": 0, "now_jd": julian_now(), "hours": 72, "limit": 10},
+    ).fetchall()
+    assert any("idx_posts_fetched" in row[-1] for row in plan)
@@ -0,0 +1,363 @@
+"""
+Storage and ranking for the Trending view.
+
+The trending score ``(reactions + comments) / (age_days + 0.02)`` decays with
+time, so it cannot be stored outright. Instead each post carries two
+precomputed columns, ``posted_jd`` (julian day of ``posted_at``) and
+``engagement`` (reactions + comments), kept current by triggers whenever a
+post is inserted or its counts are refreshed. A covering index on
+``(posted_jd, engagement)`` lets the ranking query touch only the posts in
+the time window instead of scanning and re-parsing every row.
+
+The Streamlit view reads through one long-lived WAL connection per database
+(``get_trending_store``), so the schema is checked once per process rather
+than on every rerun. Posts and the watchlist are paged with keyset cursors.
+Ranked pages pin "now" when the first page is read, so the decaying score
+stays a stable sort key for later pages. A refresh only asks for posts past
+the last poll's ``(fetched_at, id)`` cursor (indexed). The id matters: the
+crawler stamps a whole cycle with one ``fetched_at``, so a cycle larger than
+one delta page is read over several pages.
+"""
+
+import sqlite3
+import threading
+import time
+from typing import Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+SCHEMA = [
+    """
+    CREATE TABLE IF NOT EXISTS watchlist (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        profile_url TEXT UNIQUE,
+        display_name TEXT,
+        max_per_crawl INTEGER DEFAULT 10,
+        freq_hours INTEGER DEFAULT 24,
+        last_crawled_at TEXT,
+        status TEXT DEFAULT 'active'
+    );
+    """,
+    """
+    CREATE TABLE IF NOT EXISTS posts (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        profile_id INTEGER,
+        post_url TEXT UNIQUE,
+        posted_at TEXT,
+        reactions INTEGER,
+        comments INTEGER,
+        snippet TEXT,
+        fetched_at TEXT
+    );
+    """,
+]
+
+# Added after the original schema; existing databases are migrated in place
+RANK_COLUMNS = {"posted_jd": "REAL", "engagement": "INTEGER"}
+
+RANK_OBJECTS = [
+    "CREATE INDEX IF NOT EXISTS idx_posts_rank ON posts(posted_jd, engagement)",
+    "CREATE INDEX IF NOT EXISTS idx_posts_fetched ON posts(fetched_at)",
+    """
+    CREATE TRIGGER IF NOT EXISTS posts_rank_insert AFTER INSERT ON posts
+    BEGIN
+        UPDATE posts
+        SET posted_jd = julianday(NEW.posted_at),
+            engagement = COALESCE(NEW.reactions, 0) + COALESCE(NEW.comments, 0)
+        WHERE id = NEW.id;
+    END;
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS posts_rank_update AFTER UPDATE OF posted_at, reactions, comments ON posts
+    BEGIN
+        UPDATE posts
+        SET posted_jd = julianday(NEW.posted_at),
+            engagement = COALESCE(NEW.reactions, 0) + COALESCE(NEW.comments, 0)
+        WHERE id = NEW.id;
+    END;
+    """,
+]
+
+TRENDING_QUERY = """
+    SELECT p.post_url, p.reactions, p.comments, p.snippet, p.posted_at, p.fetched_at
+    FROM posts p
+    WHERE p.posted_jd >= julianday('now') - ? / 24.0
+    ORDER BY p.engagement * 1.0 / (julianday('now') - p.posted_jd + 0.02) DESC
+    LIMIT ?;
+"""
+
+
+PAGE_SIZE = 50
+DELTA_LIMIT = 1000
+POST_COLUMNS = ["id", "post_url", "reactions", "comments", "snippet", "posted_at", "fetched_at", "posted_jd", "engagement"]
+WATCHLIST_COLUMNS = ["id", "profile_url", "display_name", "status", "last_crawled_at"]
+
+# Same score as TRENDING_QUERY, against a pinned :now_jd so it can be a keyset cursor
+# (posts newer than the pin count as brand new)
+RANKED_PAGE_QUERY = f"""
+    SELECT {", ".join(POST_COLUMNS)}, engagement * 1.0 / (MAX(:now_jd - posted_jd, 0) + 0.02) AS trend_rank
+    FROM posts
+    WHERE posted_jd >= :now_jd - :hours / 24.0
+      AND (:after_rank IS NULL OR trend_rank < :after_rank OR (trend_rank = :after_rank AND id > :after_id))
+    ORDER BY trend_rank DESC, id
+    LIMIT :limit
+"""
+
+CHANGED_POSTS_QUERY = f"""
+    SELECT {", ".join(POST_COLUMNS)}
+    FROM posts
+    WHERE (fetched_at, id) > (:since, :after_id) AND posted_jd >= :now_jd - :hours / 24.0
+    ORDER BY fetched_at, id
+    LIMIT :limit
+"""
+
+
+def julian_now() -> float:
+    return time.time() / 86400.0 + 2440587.5
+
+
+def trend_rank(post: Dict, now_jd: float) -> float:
+    """RANKED_PAGE_QUERY's score for a loaded post."""
+    return (post["engagement"] or 0) / (max(now_jd - post["posted_jd"], 0.0) + 0.02)
+
+
+def ensure_schema(conn: sqlite3.Connection) -> None:
+    """Create tables, ranking columns, index and triggers; backfill older rows."""
+    for statement in SCHEMA:
+        conn.execute(statement)
+    existing = {row[1] for row in conn.execute("PRAGMA table_info(posts)")}
+    for column, kind in RANK_COLUMNS.items():
+        if column not in existing:
+            conn.execute(f"ALTER TABLE posts ADD COLUMN {column} {kind}")
+    for statement in RANK_OBJECTS:
+        conn.execute(statement)
+    conn.execute(
+        """
+        UPDATE posts
+        SET posted_jd = julianday(posted_at),
+            engagement = COALESCE(reactions, 0) + COALESCE(comments, 0)
+        WHERE posted_jd IS NULL AND posted_at IS NOT NULL
+        """
+    )
+    conn.commit()
+
+
+def fetch_trending(conn: sqlite3.Connection, hours: float = 72, limit: int = 50) -> pd.DataFrame:
+    return pd.read_sql_query(TRENDING_QUERY, conn, params=(hours, limit))
+
+
+def add_age_score(df: pd.DataFrame) -> pd.DataFrame:
+    """Vectorized per-hour score: engagement / age in hours (min 0.5h, 1h if unparseable)."""
+    posted = pd.to_datetime(df["posted_at"], errors="coerce", utc=True, format="ISO8601")
+    age_hours = (pd.Timestamp.now(tz="UTC") - posted).dt.total_seconds() / 3600.0
+    age_hours = age_hours.clip(lower=0.5).fillna(1.0)
+    engagement = df["reactions"].fillna(0) + df["comments"].fillna(0)
+    df["score"] = np.asarray(engagement, dtype=float) / age_hours.to_numpy()
+    return df
+
+
+def enable_wal(conn: sqlite3.Connection) -> None:
+    """WAL lets the crawler write while Streamlit sessions keep reading."""
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.execute("PRAGMA synchronous=NORMAL")
+    conn.execute("PRAGMA busy_timeout=5000")
+
+
+def due_profiles(conn: sqlite3.Connection, limit: Optional[int] = None) -> List[Dict]:
+    """Active profiles never crawled, or whose last crawl is at least freq_hours old."""
+    sql = """
+        SELECT id, profile_url, display_name, max_per_crawl, freq_hours, last_crawled_at
+        FROM watchlist
+        WHERE status = 'active'
+          AND (last_crawled_at IS NULL
+               OR julianday(last_crawled_at) + COALESCE(freq_hours, 24) / 24.0 <= julianday('now'))
+        ORDER BY last_crawled_at IS NOT NULL, last_crawled_at
+    """
+    params: tuple = ()
+    if limit:
+        sql += " LIMIT ?"
+        params = (limit,)
+    columns = ["id", "profile_url", "display_name", "max_per_crawl", "freq_hours", "last_crawled_at"]
+    return [dict(zip(columns, row)) for row in conn.execute(sql, params)]
+
+
+UPSERT_POST = """
+    INSERT INTO posts(profile_id, post_url, posted_at, reactions, comments, snippet, fetched_at)
+    VALUES(:profile_id, :post_url, :posted_at, :reactions, :comments, :snippet, :fetched_at)
+    ON CONFLICT(post_url) DO UPDATE SET
+        posted_at = COALESCE(excluded.posted_at, posts.posted_at),
+        reactions = excluded.reactions,
+        comments = excluded.comments,
+        snippet = COALESCE(excluded.snippet, posts.snippet),
+        fetched_at = excluded.fetched_at
+"""
+
+
+def store_crawl(conn: sqlite3.Connection, posts: List[Dict], crawled_profile_ids: List[int], crawled_at: str) -> None:
+    """Upsert a batch of posts and stamp the profiles as crawled in one transaction."""
+    with conn:
+        conn.executemany(UPSERT_POST, posts)
+        conn.executemany(
+            "UPDATE watchlist SET last_crawled_at = ? WHERE id = ?",
+            [(crawled_at, pid) for pid in crawled_profile_ids],
+        )
+
+
+def fetch_ranked_page(conn: sqlite3.Connection, now_jd: float, hours: float = 72, limit: int = PAGE_SIZE,
+                      after: Optional[Tuple[float, int]] = None) -> List[Dict]:
+    """
+    One page of trending posts ranked as of ``now_jd``. Pass the last row's
+    ``(trend_rank, id)`` as ``after`` for the next page.
+    """
+    after_rank, after_id = after if after else (None, None)
+    rows = conn.execute(RANKED_PAGE_QUERY, {"now_jd": now_jd, "hours": hours, "limit": limit,
+                                            "after_rank": after_rank, "after_id": after_id})
+    return [dict(zip(POST_COLUMNS + ["trend_rank"], row)) for row in rows]
+
+
+def fetch_changed_posts(conn: sqlite3.Connection, since: Tuple[str, int], now_jd: float, hours: float = 72,
+                        limit: int = DELTA_LIMIT) -> List[Dict]:
+    """
+    Posts in the window inserted or refreshed after the ``(fetched_at, id)``
+    cursor ``since``, oldest change first. Pass the last row's pair for the next page.
+    """
+    rows = conn.execute(CHANGED_POSTS_QUERY, {"since": since[0], "after_id": since[1], "now_jd": now_jd,
+                                              "hours": hours, "limit": limit})
+    return [dict(zip(POST_COLUMNS, row)) for row in rows]
+
+
+def fetch_watchlist_page(conn: sqlite3.Connection, limit: int = PAGE_SIZE,
+                         before_id: Optional[int] = None) -> List[Dict]:
+    """Newest watchlist entries first; pass the last row's id as ``before_id`` for the next page."""
+    rows = conn.execute(
+        f"SELECT {', '.join(WATCHLIST_COLUMNS)} FROM watchlist WHERE (? IS NULL OR id < ?) ORDER BY id DESC LIMIT ?",
+        (before_id, before_id, limit),
+    )
+    return [dict(zip(WATCHLIST_COLUMNS, row)) for row in rows]
+
+
+def rank_posts(posts: Iterable[Dict], now_jd: float, hours: float = 72) -> List[Dict]:
+    """Re-rank already loaded posts as of ``now_jd``, dropping those that left the window."""
+    cutoff = now_jd - hours / 24.0
+    ranked = []
+    for post in posts:
+        if post["posted_jd"] is None or post["posted_jd"] < cutoff:
+            continue
+        ranked.append({**post, "trend_rank": trend_rank(post, now_jd)})
+    ranked.sort(key=lambda p: (-p["trend_rank"], p["id"]))
+    return ranked
+
+
+class TrendingStore:
+    """A long-lived connection for the Trending view, shared by every session."""
+
+    def __init__(self, path: str):
+        self.path = path
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False, timeout=30)
+        enable_wal(self._conn)
+        ensure_schema(self._conn)
+
+    def ranked_page(self, now_jd: float, hours: float = 72, limit: int = PAGE_SIZE,
+                    after: Optional[Tuple[float, int]] = None) -> List[Dict]:
+        with self._lock:
+            return fetch_ranked_page(self._conn, now_jd, hours, limit, after)
+
+    def changed_posts(self, since: Tuple[str, int], now_jd: float, hours: float = 72,
+                      limit: int = DELTA_LIMIT) -> List[Dict]:
+        with self._lock:
+            return fetch_changed_posts(self._conn, since, now_jd, hours, limit)
+
+    def watchlist_page(self, limit: int = PAGE_SIZE, before_id: Optional[int] = None) -> List[Dict]:
+        with self._lock:
+            return fetch_watchlist_page(self._conn, limit, before_id)
+
+    def latest_fetch(self) -> Tuple[str, int]:
+        """The ``(fetched_at, id)`` of the most recently crawled post, as a changed_posts cursor."""
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT fetched_at, id FROM posts WHERE fetched_at IS NOT NULL ORDER BY fetched_at DESC, id DESC LIMIT 1"
+            ).fetchone()
+        return tuple(row) if row else ("", 0)
+
+    def watchlist_size(self) -> int:
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM watchlist").fetchone()[0]
+
+    def add_profile(self, profile_url: str, display_name: Optional[str] = None) -> None:
+        with self._lock, self._conn:
+            self._conn.execute(
+                "INSERT OR IGNORE INTO watchlist(profile_url, display_name, status, max_per_crawl, freq_hours) "
+                "VALUES(?, ?, 'active', 10, 24)",
+                (profile_url, display_name),
+            )
+
+
+class TrendingFeed:
+    """
+    One session's Trending listing: the posts loaded so far, the keyset cursor
+    for the next page and the (fetched_at, id) high-water mark for refreshes.
+    """
+
+    def __init__(self, store: TrendingStore, hours: float = 72, page_size: int = PAGE_SIZE):
+        self.store = store
+        self.hours = hours
+        self.page_size = page_size
+        self.now_jd = julian_now()
+        self.mark = store.latest_fetch()  # read before the first page, so nothing slips between them
+        self.posts: Dict[int, Dict] = {}
+        self.cursor: Optional[Tuple[float, int]] = None
+        self.more = True
+        self.load_more()
+
+    def load_more(self) -> int:
+        page = self.store.ranked_page(self.now_jd, self.hours, self.page_size, self.cursor)
+        for post in page:
+            self.posts.setdefault(post["id"], post)
+        if page:
+            self.cursor = (page[-1]["trend_rank"], page[-1]["id"])
+        self.more = len(page) == self.page_size
+        return len(page)
+
+    def _before_cursor(self, post: Dict) -> bool:
+        """Whether ``post`` falls within the pages loaded so far (as ranked when they were read)."""
+        if not self.more:
+            return True
+        rank = trend_rank(post, self.now_jd)
+        return (-rank, post["id"]) < (-self.cursor[0], self.cursor[1])
+
+    def refresh(self, limit: int = DELTA_LIMIT) -> int:
+        """
+        Apply posts crawled since the last poll, a delta page at a time: loaded
+        posts are updated, and new ones are added only if they rank within the
+        loaded pages; the rest arrive through ``load_more``. Returns how many
+        loaded posts changed.
+        """
+        now_jd, total = julian_now(), 0
+        while True:
+            changed = self.store.changed_posts(self.mark, now_jd, self.hours, limit)
+            for post in changed:
+                if post["id"] in self.posts or self._before_cursor(post):
+                    self.posts[post["id"]] = post
+                    total += 1
+            if changed:
+                self.mark = (changed[-1]["fetched_at"], changed[-1]["id"])
+            if len(changed) < limit:
+                return total
+
+    def ranked(self) -> List[Dict]:
+        return rank_posts(self.posts.values(), julian_now(), self.hours)
+
+
+_stores: Dict[str, TrendingStore] = {}
+_stores_lock = threading.Lock()
+
+
+def get_trending_store(path: str) -> TrendingStore:
+    """Process-wide store for ``path``; opened (and its schema checked) once."""
+    with _stores_lock:
+        store = _stores.get(path)
+        if store is None:
+            store = _stores[path] = TrendingStore(path)
+        return store
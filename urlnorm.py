@@ -0,0 +1,125 @@
+"""
+URL canonicalization shared by the page cache and anything else that keys on URLs.
+
+``canonical_url`` is the cache key for one exact page; ``dedupe_key`` goes
+further and treats AMP and mobile renditions of a story as the same page, so
+search results and manual URLs can be merged before anything is scraped.
+"""
+
+from urllib.parse import parse_qsl, urlencode, urlsplit, urlunsplit
+
+TRACKING_PARAMS = {"fbclid", "gclid", "mc_cid", "mc_eid", "igshid", "ref", "ref_src"}
+
+
+def _is_tracking_param(name: str) -> bool:
+    return name.lower().startswith("utm_") or name.lower() in TRACKING_PARAMS
+
+
+def canonical_url(url: str) -> str:
+    """
+    Normalize a URL so trivially different spellings of the same page share a key:
+    lowercased scheme/host, default ports and fragments dropped, tracking params
+    removed and the remaining query sorted.
+    """
+    url = (url or "").strip()
+    if not url:
+        return ""
+    parts = urlsplit(url)
+    scheme = (parts.scheme or "http").lower()
+    host = (parts.hostname or "").lower()
+    port = parts.port
+    if port and not ((scheme == "http" and port == 80) or (scheme == "https" and port == 443)):
+        host = f"{host}:{port}"
+    path = parts.path or "/"
+    query = urlencode(sorted((k, v) for k, v in parse_qsl(parts.query, keep_blank_values=True) if not _is_tracking_param(k)))
+    return urlunsplit((scheme, host, path, query, ""))
+
+
+ALTERNATE_HOST_PREFIXES = ("www.", "m.", "mobile.", "amp.")
+AMP_QUERY_PARAMS = {"amp", "outputtype", "output"}
+AMP_CACHE_SUFFIX = ".cdn.ampproject.org"
+
+
+def _unwrap_amp_cache(parts):
+    # https://example-com.cdn.ampproject.org/c/s/example.com/story -> https://example.com/story
+    segments = parts.path.lstrip("/").split("/")
+    if segments and segments[0] in ("c", "v", "i"):
+        segments = segments[1:]
+    scheme = "http"
+    if segments and segments[0] == "s":
+        scheme, segments = "https", segments[1:]
+    if not segments or not segments[0]:
+        return None
+    return urlunsplit((scheme, segments[0], "/" + "/".join(segments[1:]), parts.query, ""))
+
+
+def preferred_url(url: str) -> str:
+    """canonical_url, with Google AMP cache links unwrapped to the publisher's URL."""
+    url = (url or "").strip()
+    parts = urlsplit(url)
+    if (parts.hostname or "").lower().endswith(AMP_CACHE_SUFFIX):
+        url = _unwrap_amp_cache(parts) or url
+    return canonical_url(url)
+
+
+def _strip_amp_path(path: str) -> str:
+    path = path.rstrip("/")
+    if path.endswith("/amp"):
+        path = path[: -len("/amp")]
+    if path.startswith("/amp/"):
+        path = path[len("/amp"):]
+    if path.endswith(".amp.html"):
+        path = path[: -len(".amp.html")] + ".html"
+    elif path.endswith(".amp"):
+        path = path[: -len(".amp")]
+    return path or "/"
+
+
+def is_alternate_url(url: str) -> bool:
+    """True for AMP and mobile renditions of a page."""
+    parts = urlsplit(preferred_url(url))
+    host = parts.netloc
+    if host.startswith(("m.", "mobile.", "amp.")):
+        return True
+    if _strip_amp_path(parts.path) != (parts.path.rstrip("/") or "/"):
+        return True
+    return any(k.lower() in AMP_QUERY_PARAMS for k, _ in parse_qsl(parts.query, keep_blank_values=True))
+
+
+def dedupe_key(url: str) -> str:
+    """
+    Identity of the underlying story: preferred_url with scheme, www/m/mobile/amp
+    host prefixes, AMP path and query markers and trailing slashes ignored.
+    """
+    parts = urlsplit(preferred_url(url))
+    host = parts.netloc
+    for prefix in ALTERNATE_HOST_PREFIXES:
+        if host.startswith(prefix):
+            host = host[len(prefix):]
+            break
+    query = urlencode([(k, v) for k, v in parse_qsl(parts.query, keep_blank_values=True)
+                       if k.lower() not in AMP_QUERY_PARAMS])
+    return urlunsplit(("", host, _strip_amp_path(parts.path), query, ""))
+
+
+def dedupe_urls(urls, exclude=()) -> list:
+    """
+    Canonicalize and drop duplicates, keeping first-seen order. When a story
+    appears both as an AMP/mobile rendition and as the regular page, the
+    regular page is kept. URLs whose story is in ``exclude`` are dropped.
+    """
+    excluded = {dedupe_key(u) for u in exclude if u}
+    kept, position = [], {}
+    for url in urls:
+        if not url or not url.strip():
+            continue
+        key = dedupe_key(url)
+        if key in excluded:
+            continue
+        url = preferred_url(url)
+        if key not in position:
+            position[key] = len(kept)
+            kept.append(url)
+        elif is_alternate_url(kept[position[key]]) and not is_alternate_url(url):
+            kept[position[key]] = url
+    return kept